@@ -0,0 +1,137 @@
+"""Benchmark near-duplicate elimination: shrink, recall and scaling.
+
+Runs the MinHash/LSH deduplicator over the chunks of data/raw, then over
+synthetic corpora where every base chunk has a lightly edited copy (as
+overlapping chunks, mirrored pages and repeated boilerplate produce). For
+the smaller synthetic corpora, LSH is compared with exact all-pairs Jaccard
+to report the near-duplicate pairs it missed.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_dedup.py --sizes 1k,4k,16k
+"""
+
+import argparse
+import itertools
+import random
+import time
+from pathlib import Path
+
+from bench_utils import parse_sizes, write_results
+
+from data.chunking import TextChunker
+from data.dedup import MinHashDeduplicator, jaccard, shingles
+from data.ingestion import DataIngestionPipeline
+from utils.config import settings
+
+RAW_DIR = Path(__file__).parent.parent / "data" / "raw"
+
+# All-pairs verification is quadratic; skip it above this many chunks
+MAX_EXACT_CHUNKS = 2000
+
+
+def raw_chunks() -> list[dict]:
+    pipeline = DataIngestionPipeline.__new__(DataIngestionPipeline)
+    pipeline.chunker = TextChunker()
+    return [
+        chunk
+        for path in sorted(RAW_DIR.glob("**/*.json"))
+        for chunk in pipeline.load_chunks(str(path))
+    ]
+
+
+def synthetic_chunks(count: int, rng: random.Random) -> list[dict]:
+    """Half base chunks of 150 words, half copies with a few words replaced"""
+    vocabulary = [f"w{i}" for i in range(20000)]
+    chunks = []
+    for i in range(count // 2):
+        words = rng.choices(vocabulary, k=150)
+        chunks.append({"text": " ".join(words), "metadata": {"source": "base", "tags": [str(i)]}})
+        for _ in range(2):
+            words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        chunks.append({"text": " ".join(words), "metadata": {"source": "copy", "tags": [str(i)]}})
+    rng.shuffle(chunks)
+    return chunks
+
+
+def exact_pairs(texts: list[str], shingle_words: int, threshold: float) -> list[tuple[int, int]]:
+    sets = [shingles(text, shingle_words) for text in texts]
+    return [
+        (i, j)
+        for i, j in itertools.combinations(range(len(sets)), 2)
+        if jaccard(sets[i], sets[j]) >= threshold
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate elimination benchmark")
+    parser.add_argument("--sizes", default="1k,4k,16k", help="Synthetic corpus sizes in chunks")
+    parser.add_argument("--threshold", type=float, default=settings.dedup_threshold)
+    parser.add_argument("--num-perm", type=int, default=settings.dedup_num_perm)
+    parser.add_argument("--shingle-words", type=int, default=settings.dedup_shingle_words)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    deduplicator = MinHashDeduplicator(args.threshold, args.num_perm, args.shingle_words)
+    print(
+        f"Jaccard >= {args.threshold}: {deduplicator.bands} bands x {deduplicator.rows} rows, "
+        f"{args.shingle_words}-word shingles"
+    )
+
+    _, stats = deduplicator.deduplicate(raw_chunks())
+    corpus = stats.as_dict()
+    print(
+        f"  data/raw        {stats.chunks_in:>6} -> {stats.chunks_out:<6} chunks "
+        f"({stats.shrink:.1%} smaller) in {stats.seconds * 1000:.0f}ms"
+    )
+
+    rng = random.Random(0)
+    runs = []
+    for size in parse_sizes(args.sizes):
+        chunks = synthetic_chunks(size, rng)
+        _, stats = deduplicator.deduplicate(chunks)
+        run = {**stats.as_dict(), "us_per_chunk": round(stats.seconds / size * 1e6, 1)}
+
+        if size <= MAX_EXACT_CHUNKS:
+            texts = [chunk["text"] for chunk in chunks]
+            start = time.perf_counter()
+            pairs = exact_pairs(texts, args.shingle_words, args.threshold)
+            run["exact_seconds"] = round(time.perf_counter() - start, 3)
+            cluster = {
+                position: number
+                for number, group in enumerate(deduplicator.clusters(texts))
+                for position in group
+            }
+            run["exact_pairs"] = len(pairs)
+            run["missed_pairs"] = sum(cluster[i] != cluster[j] for i, j in pairs)
+
+        runs.append(run)
+        exact = (
+            f"  exact all-pairs {run['exact_seconds']:.2f}s, "
+            f"missed {run['missed_pairs']}/{run['exact_pairs']} pairs"
+            if "exact_pairs" in run
+            else ""
+        )
+        print(
+            f"  synthetic {size:>6} -> {stats.chunks_out:<6} chunks "
+            f"in {stats.seconds:.2f}s ({run['us_per_chunk']:.0f}us/chunk){exact}"
+        )
+
+    write_results(
+        "dedup",
+        {
+            "config": {
+                "threshold": args.threshold,
+                "num_perm": args.num_perm,
+                "shingle_words": args.shingle_words,
+                "bands": deduplicator.bands,
+                "rows": deduplicator.rows,
+            },
+            "corpus": corpus,
+            "runs": runs,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
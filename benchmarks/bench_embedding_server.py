@@ -0,0 +1,150 @@
+"""Benchmark query embedding throughput: in-process model vs the shared micro-batching server.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_embedding_server.py --concurrency 1,8,32
+    PYTHONPATH=src python benchmarks/bench_embedding_server.py --modes server \\
+        --address unix:/tmp/adb-embeddings.sock                # an already running server
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from bench_utils import latency_summary, write_results
+from loguru import logger
+from synthetic_corpus import SyntheticCorpus
+
+from retrieval.embeddings import EmbeddingGenerator, RemoteEmbeddingGenerator
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+def start_server(address: str, max_batch_size: int, batch_wait_ms: float) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "retrieval.embedding_server",
+            "--address",
+            address,
+            "--max-batch-size",
+            str(max_batch_size),
+            "--batch-wait-ms",
+            str(batch_wait_ms),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def connect(address: str, timeout: float = 300.0) -> RemoteEmbeddingGenerator:
+    """Wait for the server to load its model and accept connections"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return RemoteEmbeddingGenerator(address)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def run_clients(generator, texts: list[str], concurrency: int, requests: int) -> dict:
+    """``concurrency`` clients each embedding ``requests`` single queries back to back"""
+
+    def client(offset: int) -> list[float]:
+        latencies = []
+        for i in range(requests):
+            start = time.perf_counter()
+            generator.generate_embedding(texts[(offset + i) % len(texts)])
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, range(0, concurrency * requests, requests)))
+    wall = time.perf_counter() - start
+
+    summary = latency_summary([latency for latencies in results for latency in latencies])
+    summary["throughput_qps"] = round(concurrency * requests / wall, 2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding server benchmark")
+    parser.add_argument("--modes", default="in-process,server", help="in-process and/or server")
+    parser.add_argument("--concurrency", default="1,8,32", help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=50, help="Queries per client")
+    parser.add_argument("--address", help="Use a running server instead of starting one")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    logger.remove()  # Keep per-call logging out of the measurements
+
+    modes = [m.strip() for m in args.modes.split(",")]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    texts = SyntheticCorpus().query_texts(500)
+    runs = []
+
+    generators = {}
+    server = None
+    if "in-process" in modes:
+        generators["in-process"] = EmbeddingGenerator()
+    if "server" in modes:
+        address = args.address
+        if not address:
+            address = f"unix:{tempfile.mkdtemp()}/embeddings.sock"
+            server = start_server(address, args.max_batch_size, args.batch_wait_ms)
+        generators["server"] = connect(address)
+
+    try:
+        for mode, generator in generators.items():
+            generator.generate_embedding("warm up")
+            for concurrency in levels:
+                before = generator.server_stats() if mode == "server" else None
+                summary = run_clients(generator, texts, concurrency, args.requests)
+                if before is not None:
+                    after = generator.server_stats()
+                    batches = after["batches"] - before["batches"]
+                    summary["mean_batch_size"] = round(
+                        (after["texts"] - before["texts"]) / max(batches, 1), 2
+                    )
+                runs.append({"mode": mode, "concurrency": concurrency, **summary})
+                batch_info = (
+                    f"  mean batch={summary['mean_batch_size']}"
+                    if "mean_batch_size" in summary
+                    else ""
+                )
+                print(
+                    f"{mode:<10} clients={concurrency:>3}  {summary['throughput_qps']:>8.1f} q/s  "
+                    f"p50={summary['p50_ms']:>8.2f}ms  p95={summary['p95_ms']:>8.2f}ms{batch_info}"
+                )
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    write_results(
+        "embedding-server",
+        {
+            "config": {
+                "requests_per_client": args.requests,
+                "max_batch_size": args.max_batch_size,
+                "batch_wait_ms": args.batch_wait_ms,
+            },
+            "runs": runs,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark the fast paths: hit rate and lookup latency.
+
+Runs the labeled queries from eval_queries.json (mostly questions the fast
+paths should leave to the agent graph), a set of exact command lookups and a
+set of requests for stored code patterns. Each query is tried against the
+command index and then the code pattern index, as the API does.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_fast_path.py
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from bench_utils import latency_summary, write_results
+
+from agents.fast_path import CodePatternIndex, CommandIndex
+from utils.config import settings
+
+EVAL_QUERIES = Path(__file__).parent / "eval_queries.json"
+
+LOOKUP_QUERIES = [
+    "What's the syntax of adb install?",
+    "adb devices",
+    "what does adb install -r do",
+    "adb shell pm list packages -3",
+    "how to use adb logcat",
+    "adb push syntax",
+    "adb pull usage",
+    "explain adb shell am start -W",
+    "adb connect",
+    "adb reboot options",
+]
+
+CODE_QUERIES = [
+    "python code to push a file to the device",
+    "python script to upload ./build/app.apk to /sdcard/Download/app.apk on 192.168.1.42:5555",
+    "python code to pull /sdcard/DCIM/photo.jpg to ./photo.jpg from emulator-5554",
+    "python function to delete /sdcard/tmp/log.txt",
+    "python code to list connected devices",
+    "python script to pair with 192.168.0.7:37123 code 482913",
+    "python code to connect to 10.0.0.5:5555",
+    "python code to check if folder /sdcard/MyApp exists",
+    "python code to trigger a media scan",
+    "python code to get the serial number of the device",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast path benchmark")
+    parser.add_argument("--command-db", default=settings.command_db_path)
+    parser.add_argument("--code-patterns", default=settings.code_patterns_path)
+    parser.add_argument("--min-confidence", type=float, default=settings.fast_path_min_confidence)
+    parser.add_argument("--repeats", type=int, default=1000)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    indexes = [
+        CommandIndex.from_file(args.command_db, args.min_confidence),
+        CodePatternIndex.from_file(args.code_patterns, args.min_confidence),
+    ]
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def lookup(query: str) -> str | None:
+        """Query type of the first index that answers, as run_pipeline tries them"""
+        for index in indexes:
+            if index.lookup(query) is not None:
+                return index.query_type
+        return None
+
+    eval_queries = [q["query"] for q in json.loads(EVAL_QUERIES.read_text())["queries"]]
+    workloads = {
+        "eval_queries": eval_queries,
+        "command_lookups": LOOKUP_QUERIES,
+        "code_patterns": CODE_QUERIES,
+    }
+    print(
+        f"Indexes built in {build_ms:.2f}ms "
+        f"({len(indexes[0].entries)} commands, {len(indexes[1].entries)} code patterns)"
+    )
+
+    results = {}
+    for name, queries in workloads.items():
+        answered = {query: lookup(query) for query in queries}
+        hits = {query: query_type for query, query_type in answered.items() if query_type}
+        latencies = []
+        for _ in range(args.repeats):
+            for query in queries:
+                started = time.perf_counter()
+                lookup(query)
+                latencies.append(time.perf_counter() - started)
+        summary = latency_summary(latencies)
+        results[name] = {
+            "queries": len(queries),
+            "hits": len(hits),
+            "hit_rate": round(len(hits) / len(queries), 3),
+            "answered": hits,
+            "lookup": summary,
+        }
+        print(
+            f"  {name:<16} hit rate {len(hits):>2}/{len(queries):<3} "
+            f"lookup p50={summary['p50_ms'] * 1000:.1f}us p99={summary['p99_ms'] * 1000:.1f}us"
+        )
+
+    write_results(
+        "fast-path",
+        {
+            "config": {"min_confidence": args.min_confidence, "build_ms": round(build_ms, 3)},
+            "workloads": results,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Track module import time so cold start regressions are caught early.
+
+Each module is imported in a fresh interpreter with ``-X importtime``; the
+median cumulative time over several runs is reported together with the
+slowest transitive imports.
+
+Usage (from the repository root):
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --modules main --max-ms 500   # fail above budget
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from bench_utils import write_results
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+DEFAULT_MODULES = "main,utils.config,retrieval.vector_store,retrieval.embeddings,agents.graph"
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Cumulative import time (microseconds) for every module pulled in by ``module``"""
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=SRC_DIR.parent,
+        check=True,
+    )
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        cumulative[name] = int(cumulative_us)
+    return cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Module import time benchmark")
+    parser.add_argument("--modules", default=DEFAULT_MODULES, help="Comma-separated modules")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--max-ms", type=float, help="Exit non-zero if any module exceeds this")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    results = {}
+    over_budget = []
+
+    for module in (m.strip() for m in args.modules.split(",")):
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        totals_ms = [profile[module] / 1000 for profile in profiles]
+        median_ms = statistics.median(totals_ms)
+
+        last = profiles[-1]
+        slowest = sorted(
+            ((name, us / 1000) for name, us in last.items() if name != module and "." not in name),
+            key=lambda item: item[1],
+            reverse=True,
+        )[: args.top]
+
+        results[module] = {
+            "median_ms": round(median_ms, 1),
+            "min_ms": round(min(totals_ms), 1),
+            "max_ms": round(max(totals_ms), 1),
+            "modules_imported": len(last),
+            "slowest_top_level": {name: round(ms, 1) for name, ms in slowest},
+        }
+
+        print(f"\n{module}: median {median_ms:.1f}ms over {args.runs} runs ({len(last)} modules)")
+        for name, ms in slowest:
+            print(f"    {ms:>9.1f}ms  {name}")
+
+        if args.max_ms is not None and median_ms > args.max_ms:
+            over_budget.append(module)
+
+    write_results("import-time", {"runs": args.runs, "modules": results}, args.output)
+
+    if over_budget:
+        print(f"\nOver the {args.max_ms}ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
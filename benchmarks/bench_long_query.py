@@ -0,0 +1,90 @@
+"""Benchmark multi-vector scoring of long queries split into windows.
+
+Compares aggregating all windows in one blocked matrix product (max-sim, or
+reciprocal rank fusion of per-window rankings) with searching each window
+separately. Window encoding is not included; it is one batched encode call.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_long_query.py --sizes 100k,1m --windows 1,4,16,32
+"""
+
+import argparse
+import time
+
+import numpy as np
+from bench_utils import latency_summary, parse_sizes, write_results
+
+from retrieval.scoring import prepare_queries, reciprocal_rank_fusion, top_k_scores
+
+
+def measure(fn, repeats: int) -> dict:
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def per_window(windows: np.ndarray, matrix: np.ndarray, k: int):
+    """Baseline: one search per window, merged by best score"""
+    best: dict[int, float] = {}
+    for window in windows:
+        ((rows, scores),) = top_k_scores(window, matrix, k)
+        for row, score in zip(rows.tolist(), scores.tolist(), strict=True):
+            best[row] = max(best.get(row, -1.0), score)
+    return sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-query multi-vector scoring benchmark")
+    parser.add_argument("--sizes", default="100k,1m", help="Document counts")
+    parser.add_argument("--windows", default="1,4,16,32", help="Windows per query")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    k = args.top_k
+    runs = []
+
+    for size in parse_sizes(args.sizes):
+        matrix = rng.standard_normal((size, args.dimension), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        print(f"\nN={size:,}")
+
+        for count in (int(w) for w in args.windows.split(",")):
+            windows = prepare_queries(rng.standard_normal((count, args.dimension)))
+            max_sim = measure(
+                lambda w=windows, m=matrix: top_k_scores(w, m, k, max_sim=True), args.repeats
+            )
+            rrf = measure(
+                lambda w=windows, m=matrix: reciprocal_rank_fusion(top_k_scores(w, m, k * 4), k),
+                args.repeats,
+            )
+            separate = measure(lambda w=windows, m=matrix: per_window(w, m, k), args.repeats)
+            runs.append(
+                {
+                    "size": size,
+                    "windows": count,
+                    "max_sim": max_sim,
+                    "rrf": rrf,
+                    "per_window": separate,
+                }
+            )
+            print(
+                f"  windows={count:<3} max-sim p50={max_sim['p50_ms']:>8.2f}ms  "
+                f"rrf p50={rrf['p50_ms']:>8.2f}ms  per-window searches p50={separate['p50_ms']:>8.2f}ms"
+            )
+
+    write_results(
+        "long-query",
+        {"config": {"dimension": args.dimension, "top_k": args.top_k}, "runs": runs},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
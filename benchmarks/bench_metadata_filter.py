@@ -0,0 +1,88 @@
+"""Benchmark metadata filter evaluation and filtered top-k scoring on the resident index.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_metadata_filter.py --sizes 100k,1m
+"""
+
+import argparse
+import time
+
+import numpy as np
+from bench_utils import latency_summary, parse_sizes, write_results
+from synthetic_corpus import SyntheticCorpus
+
+from retrieval.metadata_index import MetadataIndex
+from retrieval.scoring import prepare_queries, top_k_scores
+
+FILTERS = {
+    "type": {"type": "command"},
+    "tags_any": {"tags": ["usb", "wireless"]},
+    "tags_all": {"tags": {"$all": ["usb", "shell"]}},
+    "type_severity": {"type": "error_pattern", "severity": {"$in": ["high", "critical"]}},
+    "category_source_tag": {"category": "connectivity", "source": "curated", "tags": "wireless"},
+}
+
+
+def measure(fn, repeats: int) -> dict:
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metadata filter benchmark")
+    parser.add_argument("--sizes", default="100k,1m", help="Document counts")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(dimension=args.dimension)
+    rng = np.random.default_rng(0)
+    query = prepare_queries(rng.standard_normal((1, args.dimension)))
+    runs = []
+
+    for size in parse_sizes(args.sizes):
+        metadatas = [doc["metadata"] for doc in corpus.documents(size, with_embeddings=False)]
+        start = time.perf_counter()
+        index = MetadataIndex.from_metadata(metadatas)
+        build_seconds = time.perf_counter() - start
+        matrix = rng.standard_normal((size, args.dimension), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        print(
+            f"\nN={size:,}: index built in {build_seconds:.2f}s "
+            f"({index.memory_bytes() / 1024 / 1024:.1f} MB)"
+        )
+
+        run = {"size": size, "build_seconds": round(build_seconds, 2), "filters": {}}
+        for name, filters in FILTERS.items():
+            mask = index.mask_for(filters)
+            evaluate = measure(lambda i=index, f=filters: i.mask_for(f), args.repeats)
+            scoring = measure(
+                lambda m=matrix, s=mask: top_k_scores(query, m, args.top_k, mask=s), args.repeats
+            )
+            matches = int(mask.sum())
+            run["filters"][name] = {"matches": matches, "filter": evaluate, "scoring": scoring}
+            print(
+                f"  {name:<20} matches={matches:>9,}  filter p50={evaluate['p50_ms']:>7.3f}ms  "
+                f"filtered top-k p50={scoring['p50_ms']:>8.2f}ms"
+            )
+
+        unfiltered = measure(lambda m=matrix: top_k_scores(query, m, args.top_k), args.repeats)
+        run["unfiltered_scoring"] = unfiltered
+        print(f"  {'(no filter)':<20} top-k p50={unfiltered['p50_ms']:.2f}ms")
+        runs.append(run)
+
+    write_results(
+        "metadata-filter",
+        {"config": {"dimension": args.dimension, "top_k": args.top_k}, "runs": runs},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark the cross-encoder rerank stage at several candidate counts.
+
+Reranks N candidate chunks from data/raw for each labeled query in
+eval_queries.json and reports per-query latency with a cold pair-score
+cache (every pair goes through the model in one batch) and a warm one
+(the same query again, served from the cache).
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_rerank.py --candidates 20,50,100
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from bench_utils import latency_summary, write_results
+from loguru import logger
+
+from data.chunking import TextChunker
+from retrieval.reranker import CrossEncoderReranker
+from utils.config import settings
+
+EVAL_QUERIES = Path(__file__).parent / "eval_queries.json"
+RAW_DIR = Path(__file__).parent.parent / "data" / "raw"
+
+
+def candidate_docs() -> list[dict]:
+    """Chunks of data/raw shaped like retrieval results"""
+    chunker = TextChunker()
+    docs = []
+    for path in sorted(RAW_DIR.glob("**/*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        entries = data if isinstance(data, list) else data.get("knowledge_entries", [])
+        for entry in entries:
+            for chunk in chunker.chunk_json_knowledge(entry):
+                docs.append({"_id": f"doc-{len(docs)}", "content": chunk["text"]})
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-encoder rerank benchmark")
+    parser.add_argument("--candidates", default="20,50,100", help="Candidates per query")
+    parser.add_argument("--model", default=settings.rerank_model)
+    parser.add_argument("--batch-size", type=int, default=settings.rerank_batch_size)
+    parser.add_argument("--max-length", type=int, default=settings.rerank_max_length)
+    parser.add_argument("--queries", type=int, default=10, help="Labeled queries to run")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    logger.remove()  # Keep per-call logging out of the measurements
+
+    start = time.perf_counter()
+    reranker = CrossEncoderReranker(
+        args.model, args.batch_size, cache_size=100_000, max_length=args.max_length
+    )
+    load_ms = (time.perf_counter() - start) * 1000
+
+    docs = candidate_docs()
+    queries = [q["query"] for q in json.loads(EVAL_QUERIES.read_text())["queries"]]
+    queries = queries[: args.queries]
+    reranker.rerank("warm up", docs[:8])
+    print(f"Model loaded in {load_ms:.0f}ms; {len(docs)} candidate chunks, {len(queries)} queries")
+
+    runs = []
+    for count in [int(n) for n in args.candidates.split(",")]:
+        candidates = [docs[i % len(docs)] for i in range(count)]
+        candidates = [{**doc, "_id": f"{doc['_id']}-{i}"} for i, doc in enumerate(candidates)]
+        cold, warm = [], []
+        for query in queries:
+            for latencies in (cold, warm):
+                started = time.perf_counter()
+                reranker.rerank(query, candidates)
+                latencies.append(time.perf_counter() - started)
+        run = {
+            "candidates": count,
+            "cold": latency_summary(cold),
+            "warm": latency_summary(warm),
+            "cold_ms_per_pair": round(sum(cold) / len(cold) / count * 1000, 3),
+        }
+        runs.append(run)
+        print(
+            f"  N={count:<4} cold p50={run['cold']['p50_ms']:>8.1f}ms "
+            f"p95={run['cold']['p95_ms']:>8.1f}ms ({run['cold_ms_per_pair']:.2f}ms/pair)  "
+            f"cached p50={run['warm']['p50_ms']:.2f}ms"
+        )
+
+    write_results(
+        "rerank",
+        {
+            "config": {
+                "model": args.model,
+                "batch_size": args.batch_size,
+                "max_length": args.max_length,
+                "load_ms": round(load_ms, 1),
+                "queries": len(queries),
+            },
+            "runs": runs,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Benchmark retrieval latency, throughput and memory on synthetic corpora.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_retrieval.py                      # mongomock, 1k-100k
+    PYTHONPATH=src python benchmarks/bench_retrieval.py \\
+        --mongodb-uri mongodb://localhost:27017 --sizes 1k,10k,100k,1m     # local mongod
+    PYTHONPATH=src python benchmarks/bench_retrieval.py \\
+        --sqlite-path /tmp/bench.db --compare benchmarks/results/mongo.json  # embedded SQLite
+    PYTHONPATH=src python benchmarks/bench_retrieval.py --compare benchmarks/results/old.json
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from bench_utils import (
+    latency_summary,
+    open_store,
+    parse_sizes,
+    peak_rss_mb,
+    time_calls,
+    write_results,
+)
+from loguru import logger
+from synthetic_corpus import SyntheticCorpus
+
+from retrieval.hybrid_retriever import HybridRetriever
+from retrieval.vector_store import VectorStore
+from utils.config import settings
+
+INSERT_BATCH_SIZE = 5_000
+
+
+class PrecomputedEmbeddings:
+    """Stand-in for EmbeddingGenerator that returns precomputed query vectors"""
+
+    def __init__(self, texts: list[str], vectors: list[list[float]]):
+        self.vectors = dict(zip(texts, vectors, strict=True))
+        self.dimension = len(vectors[0])
+        self.model_name = settings.embedding_model  # The model the corpus is stored under
+
+    def generate_embedding(self, text: str) -> list[float]:
+        return self.vectors[text]
+
+
+def load_corpus(store: VectorStore, corpus: SyntheticCorpus, size: int) -> dict:
+    """Replace the benchmark collection with ``size`` synthetic chunks"""
+    store.clear_collection()
+
+    start = time.perf_counter()
+    batch = []
+    for doc in corpus.documents(size):
+        batch.append(doc)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            store.insert_documents(batch)
+            batch = []
+    if batch:
+        store.insert_documents(batch)
+    store.create_vector_index()
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.load_index()
+    index_elapsed = time.perf_counter() - start
+
+    return {
+        "load_seconds": round(elapsed, 2),
+        "load_docs_per_second": round(size / elapsed, 1),
+        "index_load_seconds": round(index_elapsed, 3),
+    }
+
+
+def run_backend(name: str, fn, args_list: list, warmup: int) -> dict:
+    for args in args_list[:warmup]:
+        fn(*args)
+
+    latencies, wall = time_calls(fn, args_list)
+    summary = latency_summary(latencies)
+    summary["throughput_qps"] = round(len(args_list) / wall, 2)
+    summary["peak_rss_mb"] = peak_rss_mb()
+    print(
+        f"  {name:<8} p50={summary['p50_ms']:>9.2f}ms  p95={summary['p95_ms']:>9.2f}ms  "
+        f"p99={summary['p99_ms']:>9.2f}ms  {summary['throughput_qps']:>8.2f} q/s  "
+        f"rss={summary['peak_rss_mb']}MB"
+    )
+    return summary
+
+
+def compare(current: dict, baseline_path: str):
+    """Print p50/p95 changes against an earlier results file"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    old_runs = {run["size"]: run for run in baseline["runs"]}
+
+    print(f"\nComparison against {baseline_path} (positive = slower):")
+    for run in current["runs"]:
+        old = old_runs.get(run["size"])
+        if not old:
+            continue
+        for backend, stats in run["backends"].items():
+            old_stats = old["backends"].get(backend)
+            if not old_stats:
+                continue
+            deltas = []
+            for key in ("p50_ms", "p95_ms"):
+                change = (stats[key] - old_stats[key]) / old_stats[key] * 100
+                deltas.append(f"{key}={change:+.1f}%")
+            print(f"  size={run['size']:<8} {backend:<8} " + "  ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval scaling benchmark")
+    parser.add_argument("--sizes", help="Corpus sizes (default: 1k,10k,100k; add 1m with mongod)")
+    parser.add_argument("--mongodb-uri", help="Use a real mongod instead of mongomock")
+    parser.add_argument("--sqlite-path", help="Use the embedded SQLite backend at this path")
+    parser.add_argument("--database", default="adb_benchmark", help="Scratch database name")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per backend and size")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--backends", default="vector,keyword,hybrid", help="Comma-separated retrieval backends"
+    )
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    logger.remove()  # Keep per-query INFO logging out of the measurements
+
+    default_sizes = "1k,10k,100k,1m" if args.mongodb_uri else "1k,10k,100k"
+    sizes = parse_sizes(args.sizes or default_sizes)
+    backends = [b.strip() for b in args.backends.split(",")]
+
+    store, store_label = open_store(args.mongodb_uri, args.sqlite_path, args.database)
+    corpus = SyntheticCorpus(seed=args.seed)
+
+    query_texts = corpus.query_texts(args.queries)
+    query_vectors = corpus.query_embeddings(args.queries)
+    retriever = HybridRetriever(
+        embedding_generator=PrecomputedEmbeddings(query_texts, query_vectors), vector_store=store
+    )
+
+    operations = {
+        "vector": (store.vector_search, [(vec, args.top_k) for vec in query_vectors]),
+        "keyword": (store.keyword_search, [(text, args.top_k) for text in query_texts]),
+        "hybrid": (retriever.retrieve, [(text, args.top_k) for text in query_texts]),
+    }
+
+    runs = []
+    for size in sizes:
+        print(f"\nCorpus size: {size:,} chunks ({store_label})")
+        run = {"size": size, **load_corpus(store, corpus, size), "backends": {}}
+        print(
+            f"  loaded in {run['load_seconds']}s ({run['load_docs_per_second']:,} docs/s), "
+            f"index loaded in {run['index_load_seconds']}s"
+        )
+
+        for backend in backends:
+            fn, args_list = operations[backend]
+            run["backends"][backend] = run_backend(backend, fn, args_list, args.warmup)
+        runs.append(run)
+
+    store.clear_collection()
+
+    results = {
+        "config": {
+            "store": store_label,
+            "queries": args.queries,
+            "top_k": args.top_k,
+            "seed": args.seed,
+        },
+        "runs": runs,
+    }
+    write_results("retrieval", results, args.output)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Micro-benchmark of the top-k scoring kernel against the previous full-sort approach.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_scoring.py --sizes 10k,100k,1m --batch 1,16
+"""
+
+import argparse
+import time
+
+import numpy as np
+from bench_utils import latency_summary, parse_sizes, write_results
+
+from retrieval.scoring import prepare_queries, top_k_scores
+
+
+def full_sort(queries: np.ndarray, raw_matrix: np.ndarray, k: int):
+    """Previous approach: re-normalize every document per query, then sort all scores"""
+    norms = np.linalg.norm(raw_matrix, axis=1)
+    results = []
+    for query in queries:
+        similarities = raw_matrix @ query / (norms * np.linalg.norm(query))
+        results.append(np.argsort(similarities)[::-1][:k])
+    return results
+
+
+def measure(fn, repeats: int) -> dict:
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-k scoring kernel benchmark")
+    parser.add_argument("--sizes", default="10k,100k,1m", help="Document counts")
+    parser.add_argument("--batch", default="1,16", help="Queries scored per call")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--block-size", type=int, default=65536)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    runs = []
+
+    for size in parse_sizes(args.sizes):
+        raw = rng.standard_normal((size, args.dimension)).astype(np.float32)
+        matrix = prepare_queries(raw)
+
+        for batch in (int(b) for b in args.batch.split(",")):
+            queries = prepare_queries(rng.standard_normal((batch, args.dimension)))
+
+            baseline = measure(lambda q=queries, m=raw: full_sort(q, m, args.top_k), args.repeats)
+            kernel = measure(
+                lambda q=queries, m=matrix: top_k_scores(
+                    q, m, args.top_k, block_size=args.block_size
+                ),
+                args.repeats,
+            )
+            speedup = baseline["p50_ms"] / kernel["p50_ms"]
+            runs.append(
+                {
+                    "size": size,
+                    "batch": batch,
+                    "full_sort": baseline,
+                    "kernel": kernel,
+                    "speedup_p50": round(speedup, 2),
+                }
+            )
+            print(
+                f"N={size:>9,} Q={batch:>3}  full sort p50={baseline['p50_ms']:>9.2f}ms  "
+                f"kernel p50={kernel['p50_ms']:>9.2f}ms  speedup={speedup:.1f}x"
+            )
+
+    write_results(
+        "scoring",
+        {
+            "config": {
+                "dimension": args.dimension,
+                "top_k": args.top_k,
+                "block_size": args.block_size,
+            },
+            "runs": runs,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
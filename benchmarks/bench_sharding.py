@@ -0,0 +1,95 @@
+"""Benchmark scatter-gather vector search latency against the number of shards.
+
+Each shard count gets its own worker pool scoring row ranges of the same
+shared-memory matrix; shard count 0 is the in-process kernel baseline.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_sharding.py --sizes 1m --shards 0,1,2,4,8
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+from bench_utils import latency_summary, parse_sizes, write_results
+from loguru import logger
+
+from retrieval.scoring import prepare_queries, top_k_scores
+from retrieval.sharding import ShardedScorer
+
+
+def measure(fn, queries: np.ndarray, warmup: int) -> dict:
+    for query in queries[:warmup]:
+        fn(query)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded vector search benchmark")
+    parser.add_argument("--sizes", default="1m", help="Document counts")
+    parser.add_argument("--shards", default="0,1,2,4,8", help="Shard counts (0 = in-process)")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    logger.remove()  # Keep worker start-up logging out of the output
+
+    rng = np.random.default_rng(0)
+    queries = prepare_queries(rng.standard_normal((args.queries, args.dimension)))
+    runs = []
+    print(f"CPUs available: {os.cpu_count()}")
+
+    for size in parse_sizes(args.sizes):
+        matrix = rng.standard_normal((size, args.dimension), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        print(f"\nN={size:,}")
+
+        baseline = None
+        for shards in (int(s) for s in args.shards.split(",")):
+            if shards == 0:
+                summary = measure(
+                    lambda q, m=matrix: top_k_scores(q, m, args.top_k), queries, args.warmup
+                )
+            else:
+                scorer = ShardedScorer(shards)
+                shared = scorer.publish(matrix)
+                summary = measure(
+                    lambda q, s=scorer, m=shared: s.top_k_scores(q, m, args.top_k),
+                    queries,
+                    args.warmup,
+                )
+                scorer.close()
+
+            baseline = baseline or summary["p50_ms"]
+            speedup = baseline / summary["p50_ms"]
+            runs.append(
+                {"size": size, "shards": shards, **summary, "speedup_p50": round(speedup, 2)}
+            )
+            label = "in-process" if shards == 0 else f"{shards} shards"
+            print(
+                f"  {label:<11} p50={summary['p50_ms']:>9.2f}ms  p95={summary['p95_ms']:>9.2f}ms  "
+                f"speedup={speedup:.2f}x"
+            )
+
+    write_results(
+        "sharding",
+        {
+            "config": {"dimension": args.dimension, "top_k": args.top_k, "cpus": os.cpu_count()},
+            "runs": runs,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark error-signature scanning throughput on large synthetic logs.
+
+Signatures come from data/raw (error_indicator and symptoms, as stored at
+ingestion), optionally padded with synthetic ones to show how the
+Aho-Corasick scan scales with the number of patterns compared with
+searching for each pattern separately.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/bench_signatures.py --log-mb 1,10 --patterns 0,1000,10000
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+from bench_utils import write_results
+
+from data.chunking import TextChunker
+from retrieval.signatures import Signature, SignatureMatcher
+
+RAW_DIR = Path(__file__).parent.parent / "data" / "raw"
+
+LOG_LINES = [
+    "I ActivityManager: Start proc {pid}:com.example.app/u0a{uid} for activity {{com.example/.Main}}",
+    "D NetworkMonitor/{uid}: PROBE_DNS www.google.com {pid}ms OK",
+    "W PackageManager: Failed to parse /data/app/~~{uid}/base.apk",
+    "I adbd    : host-{pid}: connection established",
+    "E AndroidRuntime: FATAL EXCEPTION: main Process: com.example.app, PID: {pid}",
+    "V WindowManager: Relayout Window{{{uid} u0 com.example/.Main}}: viewVisibility=0",
+]
+
+
+def load_signatures() -> list[Signature]:
+    """Signatures as the resident index collects them from ingested chunk metadata"""
+    chunker = TextChunker()
+    entries = json.loads((RAW_DIR / "personal_docs" / "personal_docs.json").read_text())[
+        "knowledge_entries"
+    ] + json.loads((RAW_DIR / "troubleshooting" / "troubleshooting_kb.json").read_text())
+    metadatas = [
+        chunk["metadata"] for entry in entries for chunk in chunker.chunk_json_knowledge(entry)
+    ]
+    return SignatureMatcher.from_metadata(list(range(len(metadatas))), metadatas).signatures
+
+
+def synthetic_signatures(count: int, rng: random.Random) -> list[Signature]:
+    words = ["adb", "device", "install", "failed", "error", "denied", "timeout", "socket", "shell"]
+    return [
+        Signature(
+            " ".join(rng.choice(words) for _ in range(3)) + f" {i:05d}", "synthetic", "low", -i
+        )
+        for i in range(count)
+    ]
+
+
+def synthetic_log(size_bytes: int, signatures: list[Signature], rng: random.Random) -> str:
+    """Logcat-like lines with a real signature in roughly one line out of 500"""
+    lines, total = [], 0
+    while total < size_bytes:
+        if rng.random() < 0.002:
+            line = f"E adb     : error: {rng.choice(signatures).pattern}"
+        else:
+            line = rng.choice(LOG_LINES).format(
+                pid=rng.randint(1000, 32000), uid=rng.randint(0, 999)
+            )
+        lines.append(f"10-18 12:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.000 {line}")
+        total += len(lines[-1]) + 1
+    return "\n".join(lines)
+
+
+def throughput(fn, size_mb: float, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return size_mb / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Error signature scan benchmark")
+    parser.add_argument("--log-mb", default="1,10", help="Synthetic log sizes in MB")
+    parser.add_argument("--patterns", default="0,1000,10000", help="Extra synthetic signatures")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    real = load_signatures()
+    runs = []
+
+    for extra in [int(n) for n in args.patterns.split(",")]:
+        signatures = real + synthetic_signatures(extra, rng)
+        start = time.perf_counter()
+        matcher = SignatureMatcher(signatures)
+        build_ms = (time.perf_counter() - start) * 1000
+        strategies = {
+            "scan": matcher,
+            "aho_corasick": SignatureMatcher(signatures, automaton_min_patterns=0),
+            "per_pattern": SignatureMatcher(signatures, automaton_min_patterns=len(signatures) + 1),
+        }
+        print(f"\n{len(matcher)} patterns: automaton built in {build_ms:.1f}ms")
+
+        for size_mb in [float(n) for n in args.log_mb.split(",")]:
+            log = synthetic_log(int(size_mb * 1024 * 1024), signatures, rng)
+            matches = len(matcher.scan(log))
+            run = {
+                "patterns": len(matcher),
+                "log_mb": size_mb,
+                "matches": matches,
+                "build_ms": round(build_ms, 1),
+            }
+            for name, strategy in strategies.items():
+                run[f"{name}_mb_s"] = round(
+                    throughput(lambda s=strategy, lg=log: s.scan(lg), size_mb, args.repeats), 2
+                )
+            runs.append(run)
+            print(
+                f"  {size_mb:>6.1f} MB log: {matches:>5} matched signatures  "
+                f"scan {run['scan_mb_s']:>7.2f} MB/s  (aho-corasick {run['aho_corasick_mb_s']:.2f}, "
+                f"per-pattern {run['per_pattern_mb_s']:.2f})"
+            )
+
+    write_results(
+        "signatures", {"config": {"real_signatures": len(real)}, "runs": runs}, args.output
+    )
+
+
+if __name__ == "__main__":
+    main()
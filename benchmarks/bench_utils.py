@@ -0,0 +1,106 @@
+"""Shared helpers for benchmark scripts"""
+
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    """Summarize latencies (seconds) as milliseconds percentiles"""
+    if not latencies:
+        return {"count": 0}
+
+    values = np.asarray(latencies) * 1000
+    return {
+        "count": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def time_calls(fn, args_list: list) -> tuple[list[float], float]:
+    """Call fn once per argument tuple; return per-call latencies and wall time"""
+    latencies = []
+    wall_start = time.perf_counter()
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies, time.perf_counter() - wall_start
+
+
+def environment_info() -> dict:
+    """Details needed to compare results across machines and commits"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(name: str, results: dict, output: str | None = None) -> Path:
+    """Write benchmark results as JSON and return the path"""
+    path = Path(output) if output else RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"benchmark": name, "environment": environment_info(), **results}
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"\nResults written to {path}")
+    return path
+
+
+def parse_sizes(value: str) -> list[int]:
+    """Parse sizes like '1k,10k,1m' into integers"""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        if part[-1] in multipliers:
+            sizes.append(int(float(part[:-1]) * multipliers[part[-1]]))
+        else:
+            sizes.append(int(part))
+    return sizes
+
+
+def open_store(mongodb_uri: str | None, sqlite_path: str | None, database: str):
+    """Scratch VectorStore in embedded SQLite, a real mongod or mongomock; returns (store, label)"""
+    from retrieval.vector_store import VectorStore
+
+    if sqlite_path:
+        return VectorStore(database=sqlite_path, backend="sqlite"), "sqlite"
+    if mongodb_uri:
+        from pymongo import MongoClient
+
+        return VectorStore(client=MongoClient(mongodb_uri), database=database), "mongod"
+
+    import mongomock
+
+    return VectorStore(client=mongomock.MongoClient(), database=database), "mongomock"
@@ -0,0 +1,223 @@
+"""Offline retrieval quality-vs-latency evaluation over the bundled knowledge base.
+
+Ingests data/raw into a scratch store once per chunking configuration, runs the
+labeled queries in eval_queries.json through HybridRetriever for every
+retrieval configuration and reports recall@k, MRR and latency side by side.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/eval_retrieval.py
+    PYTHONPATH=src python benchmarks/eval_retrieval.py \\
+        --top-k 3,5,10 --hybrid true,false --chunk-size 1000,500 --chunk-overlap 200,100 \\
+        --hierarchical true,false
+"""
+
+import argparse
+import itertools
+import json
+import time
+from pathlib import Path
+
+from bench_utils import latency_summary, open_store, write_results
+from loguru import logger
+
+from data.chunking import TextChunker
+from data.ingestion import DataIngestionPipeline
+from retrieval.embeddings import EmbeddingGenerator
+from retrieval.hybrid_retriever import HybridRetriever
+from retrieval.vector_store import VectorStore
+from utils.config import settings
+
+QUERIES_FILE = Path(__file__).parent / "eval_queries.json"
+RAW_DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
+
+
+class CachedEmbeddings:
+    """Wrap EmbeddingGenerator so re-ingesting identical chunks is free"""
+
+    def __init__(self, generator: EmbeddingGenerator):
+        self.generator = generator
+        self.dimension = generator.dimension
+        self.model_name = generator.model_name
+        self.cache: dict[str, list[float]] = {}
+
+    def generate_embeddings(
+        self, texts: list[str], show_progress_bar: bool = True
+    ) -> list[list[float]]:
+        missing = list(dict.fromkeys(t for t in texts if t not in self.cache))
+        if missing:
+            vectors = self.generator.generate_embeddings(
+                missing, show_progress_bar=show_progress_bar
+            )
+            for text, vector in zip(missing, vectors, strict=True):
+                self.cache[text] = vector
+        return [self.cache[t] for t in texts]
+
+    def generate_embedding(self, text: str) -> list[float]:
+        if text not in self.cache:
+            self.cache[text] = self.generator.generate_embedding(text)
+        return self.cache[text]
+
+
+def matches(doc: dict, label: dict) -> bool:
+    """Whether a retrieved chunk satisfies a relevance label"""
+    metadata = doc.get("metadata", {})
+    for key, value in label.get("metadata", {}).items():
+        if metadata.get(key) != value:
+            return False
+
+    needle = label.get("content_contains")
+    return not (needle and needle not in doc.get("content", ""))
+
+
+def score_query(results: list[dict], relevant: list[dict]) -> tuple[float, float]:
+    """Recall over relevant labels and reciprocal rank of the first relevant chunk"""
+    found = set()
+    first_rank = None
+    for rank, doc in enumerate(results, 1):
+        for i, label in enumerate(relevant):
+            if matches(doc, label):
+                found.add(i)
+                if first_rank is None:
+                    first_rank = rank
+
+    recall = len(found) / len(relevant)
+    reciprocal_rank = 1.0 / first_rank if first_rank else 0.0
+    return recall, reciprocal_rank
+
+
+def ingest(
+    store: VectorStore,
+    embeddings: CachedEmbeddings,
+    chunk_size: int,
+    overlap: int,
+    hierarchical: bool,
+) -> int:
+    store.clear_collection()
+    pipeline = DataIngestionPipeline(
+        chunker=TextChunker(
+            chunk_size=chunk_size, chunk_overlap=overlap, hierarchical=hierarchical
+        ),
+        embedding_generator=embeddings,
+        vector_store=store,
+    )
+    result = pipeline.ingest_directory(str(RAW_DATA_DIR))
+    store.create_vector_index()
+    return result["total_inserted"]
+
+
+def evaluate(retriever: HybridRetriever, queries: list[dict], top_k: int, hybrid: bool) -> dict:
+    recalls, reciprocal_ranks, latencies, misses = [], [], [], []
+
+    for item in queries:
+        start = time.perf_counter()
+        results = retriever.retrieve(item["query"], top_k=top_k, use_hybrid=hybrid)
+        latencies.append(time.perf_counter() - start)
+
+        recall, reciprocal_rank = score_query(results, item["relevant"])
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+        if recall == 0:
+            misses.append(item["query"])
+
+    return {
+        f"recall@{top_k}": round(sum(recalls) / len(recalls), 4),
+        "mrr": round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4),
+        "latency": latency_summary(latencies),
+        "misses": misses,
+    }
+
+
+def parse_list(value: str, cast):
+    return [cast(v.strip()) for v in value.split(",")]
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("true", "1", "yes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality-vs-latency evaluation")
+    parser.add_argument("--top-k", default="3,5,10", help="Comma-separated top_k values")
+    parser.add_argument("--hybrid", default="true,false", help="Hybrid search on/off values")
+    parser.add_argument("--chunk-size", default="1000", help="Comma-separated chunk sizes")
+    parser.add_argument("--chunk-overlap", default="200", help="Comma-separated overlaps")
+    parser.add_argument(
+        "--hierarchical", default="true,false", help="Child-to-parent chunking on/off values"
+    )
+    parser.add_argument("--queries", default=str(QUERIES_FILE), help="Labeled query file")
+    parser.add_argument("--mongodb-uri", help="Use a real mongod instead of mongomock")
+    parser.add_argument("--sqlite-path", help="Use the embedded SQLite backend at this path")
+    parser.add_argument("--database", default="adb_evaluation", help="Scratch database name")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    logger.remove()  # Keep per-query INFO logging out of the measurements
+
+    queries = json.loads(Path(args.queries).read_text(encoding="utf-8"))["queries"]
+
+    store, store_label = open_store(args.mongodb_uri, args.sqlite_path, args.database)
+    embeddings = CachedEmbeddings(EmbeddingGenerator())
+    retriever = HybridRetriever(embedding_generator=embeddings, vector_store=store)
+
+    chunking_grid = [
+        (size, overlap, hierarchical)
+        for size, overlap, hierarchical in itertools.product(
+            parse_list(args.chunk_size, int),
+            parse_list(args.chunk_overlap, int),
+            parse_list(args.hierarchical, parse_bool),
+        )
+        if overlap < size
+    ]
+    retrieval_grid = list(
+        itertools.product(parse_list(args.top_k, int), parse_list(args.hybrid, parse_bool))
+    )
+
+    runs = []
+    print(f"{len(queries)} labeled queries\n")
+    print(
+        f"{'chunk':>6} {'overlap':>7} {'hier':>5} {'docs':>5} {'top_k':>5} {'hybrid':>6} "
+        f"{'recall':>7} {'mrr':>6} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+
+    for chunk_size, overlap, hierarchical in chunking_grid:
+        doc_count = ingest(store, embeddings, chunk_size, overlap, hierarchical)
+        # The retriever over-fetches children and expands parents only when enabled
+        settings.enable_hierarchical_chunks = hierarchical
+        for top_k, hybrid in retrieval_grid:
+            result = evaluate(retriever, queries, top_k, hybrid)
+            runs.append(
+                {
+                    "chunk_size": chunk_size,
+                    "chunk_overlap": overlap,
+                    "hierarchical": hierarchical,
+                    "documents": doc_count,
+                    "top_k": top_k,
+                    "hybrid": hybrid,
+                    **result,
+                }
+            )
+            print(
+                f"{chunk_size:>6} {overlap:>7} {str(hierarchical):>5} {doc_count:>5} "
+                f"{top_k:>5} {str(hybrid):>6} "
+                f"{result[f'recall@{top_k}']:>7.3f} {result['mrr']:>6.3f} "
+                f"{result['latency']['p50_ms']:>8.2f} {result['latency']['p95_ms']:>8.2f}"
+            )
+
+    store.clear_collection()
+
+    write_results(
+        "retrieval-eval",
+        {
+            "config": {
+                "queries_file": args.queries,
+                "query_count": len(queries),
+                "store": store_label,
+            },
+            "runs": runs,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
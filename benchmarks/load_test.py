@@ -0,0 +1,136 @@
+"""Load generator for the /query endpoint.
+
+Start the server with the fake LLM so results reflect the server itself:
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY=lognormal:800,0.4 python src/main.py
+
+Then drive it at a fixed concurrency (closed loop) or a fixed arrival rate (open loop):
+    python benchmarks/load_test.py --concurrency 16 --duration 60
+    python benchmarks/load_test.py --rate 20 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+from bench_utils import latency_summary, write_results
+
+QUERIES_FILE = Path(__file__).parent / "eval_queries.json"
+
+
+class LoadStats:
+    """Latencies and outcomes collected during a run"""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.outcomes: Counter[str] = Counter()
+
+    def record(self, latency: float, outcome: str):
+        self.outcomes[outcome] += 1
+        if outcome == "200":
+            self.latencies.append(latency)
+
+
+async def send_query(client: httpx.AsyncClient, query: str, top_k: int, stats: LoadStats):
+    start = time.perf_counter()
+    try:
+        response = await client.post("/query", json={"query": query, "top_k": top_k})
+        outcome = str(response.status_code)
+    except httpx.TimeoutException:
+        outcome = "timeout"
+    except httpx.HTTPError as e:
+        outcome = type(e).__name__
+    stats.record(time.perf_counter() - start, outcome)
+
+
+async def closed_loop(client, queries, args, stats: LoadStats):
+    """``concurrency`` workers each send the next request as soon as one completes"""
+    deadline = time.perf_counter() + args.duration
+    rng = random.Random(args.seed)
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await send_query(client, rng.choice(queries), args.top_k, stats)
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+async def open_loop(client, queries, args, stats: LoadStats):
+    """Requests arrive at ``rate`` per second (Poisson) regardless of completions"""
+    rng = random.Random(args.seed)
+    deadline = time.perf_counter() + args.duration
+    tasks = []
+
+    while time.perf_counter() < deadline:
+        tasks.append(
+            asyncio.create_task(send_query(client, rng.choice(queries), args.top_k, stats))
+        )
+        await asyncio.sleep(rng.expovariate(args.rate))
+
+    await asyncio.gather(*tasks)
+
+
+async def run(args) -> dict:
+    queries = [q["query"] for q in json.loads(QUERIES_FILE.read_text(encoding="utf-8"))["queries"]]
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=max(args.concurrency, 1000))
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        if args.rate:
+            await open_loop(client, queries, args, stats)
+        else:
+            await closed_loop(client, queries, args, stats)
+        elapsed = time.perf_counter() - start
+
+    total = sum(stats.outcomes.values())
+    errors = total - stats.outcomes.get("200", 0)
+    return {
+        "mode": "open" if args.rate else "closed",
+        "concurrency": None if args.rate else args.concurrency,
+        "target_rate": args.rate,
+        "duration_seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(stats.outcomes.get("200", 0) / elapsed, 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "outcomes": dict(stats.outcomes),
+        "latency": latency_summary(stats.latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the /query endpoint")
+    parser.add_argument("--url", default="http://localhost:8000")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=8, help="Closed-loop workers")
+    mode.add_argument("--rate", type=float, help="Open-loop arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    latency = result["latency"]
+
+    print(
+        f"\nRequests: {result['requests']} in {result['duration_seconds']}s ({result['mode']} loop)"
+    )
+    print(f"Throughput: {result['throughput_rps']} req/s")
+    print(f"Error rate: {result['error_rate']:.2%}  {result['outcomes']}")
+    if latency["count"]:
+        print(
+            f"Latency: p50={latency['p50_ms']}ms  p95={latency['p95_ms']}ms  "
+            f"p99={latency['p99_ms']}ms  max={latency['max_ms']}ms"
+        )
+
+    write_results("load", result, args.output)
+
+
+if __name__ == "__main__":
+    main()
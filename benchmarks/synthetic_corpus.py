@@ -0,0 +1,174 @@
+"""Generate synthetic corpora shaped like the chunks produced from data/raw"""
+
+import json
+import random
+import re
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+RAW_DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
+
+# Share of each entry type, roughly matching the bundled knowledge base
+TYPE_MIX = {
+    "command": 0.25,
+    "troubleshooting": 0.15,
+    "code_pattern": 0.2,
+    "error_pattern": 0.15,
+    "best_practice": 0.1,
+    "documentation": 0.15,
+}
+
+CATEGORIES = [
+    "device_management",
+    "connectivity",
+    "app_management",
+    "file_operations",
+    "debugging",
+    "troubleshooting",
+    "wireless_debugging",
+]
+SOURCES = ["production_code", "official_docs", "curated", "community"]
+TAGS = ["basic", "connectivity", "usb", "wireless", "install", "shell", "logcat", "files"]
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+def load_vocabulary() -> list[str]:
+    """Collect words from the bundled knowledge base"""
+    words = []
+    for path in RAW_DATA_DIR.glob("**/*.json"):
+        text = path.read_text(encoding="utf-8")
+        words.extend(re.findall(r"[A-Za-z][A-Za-z_\-]{2,}", text))
+    # Drop JSON keys and keep a stable order so corpora are reproducible
+    return sorted(set(words))
+
+
+class SyntheticCorpus:
+    """Deterministic generator of chunk documents with embeddings.
+
+    Embeddings are drawn around a fixed set of topic centroids so that
+    nearest-neighbour structure resembles a real corpus instead of pure
+    noise. Every document also carries the topic id it was drawn from.
+    """
+
+    def __init__(self, dimension: int = 384, seed: int = 42, num_topics: int = 64):
+        self.dimension = dimension
+        self.seed = seed
+        self.vocabulary = load_vocabulary()
+        rng = np.random.default_rng(seed)
+        self.topics = rng.standard_normal((num_topics, dimension)).astype(np.float32)
+
+    def _words(self, rng: random.Random, count: int) -> str:
+        return " ".join(rng.choices(self.vocabulary, k=count))
+
+    def _content(self, rng: random.Random, entry_type: str, index: int) -> tuple[str, dict]:
+        extra: dict = {}
+        if entry_type == "command":
+            command = f"adb {rng.choice(self.vocabulary).lower()}"
+            extra["command"] = command
+            text = (
+                f"Command: {command}\n\nDescription: {self._words(rng, 12)}\n\n"
+                f"Syntax: {command} [-{rng.choice('lsdrt')}]\n\n"
+                f"Examples:\n  {command}: {self._words(rng, 10)}\n\n"
+                f"Common Issues:\n  - {self._words(rng, 10)}"
+            )
+        elif entry_type == "troubleshooting":
+            issue = self._words(rng, 5)
+            extra["issue"] = issue
+            steps = "\n".join(f"  Step {i}: {self._words(rng, 8)}" for i in range(1, 5))
+            text = f"Issue: {issue}\n\nSymptoms:\n  - {self._words(rng, 6)}\n\nSolutions:\n{steps}"
+        elif entry_type == "code_pattern":
+            operation = "_".join(rng.choices(self.vocabulary, k=2)).lower()
+            extra["operation"] = operation
+            text = (
+                f"Title: {self._words(rng, 5)}\n\nOperation: {operation}\n\n"
+                f"Description: {self._words(rng, 15)}\n\n"
+                f"Python Example:\ndef {operation}(device_id):\n"
+                f'    subprocess.run(["adb", "-s", device_id, "{operation}"])'
+            )
+        elif entry_type == "error_pattern":
+            extra["error_indicator"] = self._words(rng, 3).lower()
+            extra["severity"] = rng.choice(SEVERITIES)
+            text = (
+                f"Description: {self._words(rng, 12)}\n\nSolution: {self._words(rng, 20)}\n\n"
+                f"Command: adb {rng.choice(self.vocabulary).lower()}"
+            )
+        elif entry_type == "documentation":
+            text = (
+                f"Title: {self._words(rng, 6)}\n\n"
+                f"URL: https://developer.android.com/tools/{index}\n\n"
+                f"Content: {self._words(rng, rng.randint(120, 180))}"
+            )
+        else:
+            text = f"Title: {self._words(rng, 6)}\n\nDescription: {self._words(rng, 40)}"
+        return text, extra
+
+    def documents(self, count: int, with_embeddings: bool = True) -> Iterator[dict]:
+        """Yield ``count`` chunk documents in the ingestion pipeline's shape"""
+        rng = random.Random(self.seed)
+        np_rng = np.random.default_rng(self.seed + 1)
+        types = list(TYPE_MIX)
+        weights = list(TYPE_MIX.values())
+
+        for index in range(count):
+            entry_type = rng.choices(types, weights=weights)[0]
+            content, extra = self._content(rng, entry_type, index)
+            topic = rng.randrange(len(self.topics))
+
+            doc = {
+                "content": content,
+                "metadata": {
+                    "type": entry_type,
+                    "category": rng.choice(CATEGORIES),
+                    "source": rng.choice(SOURCES),
+                    "tags": rng.sample(TAGS, k=rng.randint(1, 3)),
+                    "synthetic_topic": topic,
+                    **extra,
+                },
+            }
+
+            if with_embeddings:
+                vector = self.topics[topic] + 0.6 * np_rng.standard_normal(self.dimension)
+                vector /= np.linalg.norm(vector)
+                doc["embedding"] = vector.astype(np.float32).tolist()
+
+            yield doc
+
+    def query_embeddings(self, count: int) -> list[list[float]]:
+        """Query vectors drawn around the same topics as the documents"""
+        np_rng = np.random.default_rng(self.seed + 2)
+        queries = []
+        for _ in range(count):
+            topic = self.topics[np_rng.integers(len(self.topics))]
+            vector = topic + 0.6 * np_rng.standard_normal(self.dimension)
+            queries.append((vector / np.linalg.norm(vector)).astype(np.float32).tolist())
+        return queries
+
+    def query_texts(self, count: int) -> list[str]:
+        """Short keyword queries drawn from the corpus vocabulary"""
+        rng = random.Random(self.seed + 3)
+        return [self._words(rng, rng.randint(2, 4)) for _ in range(count)]
+
+
+def main():
+    """Dump a synthetic corpus as JSON lines (for loading into mongod with mongoimport)"""
+    import argparse
+
+    from bench_utils import parse_sizes
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--size", default="1k", help="Number of chunks, e.g. 10k or 1m")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", required=True, help="Output .jsonl path")
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(dimension=args.dimension, seed=args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for doc in corpus.documents(parse_sizes(args.size)[0]):
+            f.write(json.dumps(doc) + "\n")
+
+
+if __name__ == "__main__":
+    main()
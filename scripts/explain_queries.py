@@ -0,0 +1,64 @@
+"""Explain the MongoDB queries VectorStore issues and flag collection scans.
+
+Prints the winning plan of each query shape (document fetch, metadata
+filters, the type breakdown in stats, keyword search, the re-embedding
+walk and the index load) against the configured database. A COLLSCAN is
+flagged unless the query reads every document by design (the index load).
+Run it against a local mongod after setup, or after changing MONGO_INDEXES.
+
+Usage (from the repository root):
+    PYTHONPATH=src python scripts/explain_queries.py [--create-indexes] [--output plans.json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from retrieval.embeddings import embedding_version
+from retrieval.vector_store import VectorStore
+from utils.config import check_settings, settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain VectorStore's MongoDB queries")
+    parser.add_argument(
+        "--create-indexes", action="store_true", help="Create missing indexes first"
+    )
+    parser.add_argument("--output", help="Write the plans as JSON")
+    args = parser.parse_args()
+
+    if check_settings():
+        sys.exit(1)
+    if settings.storage_backend != "mongo":
+        print("Query plans are only available with STORAGE_BACKEND=mongo")
+        sys.exit(1)
+
+    vector_store = VectorStore()
+    if args.create_indexes:
+        vector_store.create_vector_index()
+
+    plans = vector_store.documents.query_plans(embedding_version(vector_store.active_model()))
+    if all(plan["plan"] is None for plan in plans):
+        print("The server did not explain any query (mongomock, or no explain privilege)")
+        sys.exit(1)
+
+    unexpected = 0
+    for plan in plans:
+        if plan["collscan"] and not plan["full_scan_expected"]:
+            flag = "COLLSCAN"
+            unexpected += 1
+        else:
+            flag = "ok"
+        stages = " > ".join(plan["plan"] or ["unavailable"])
+        print(f"{flag:<9} {plan['op']:<19} {json.dumps(plan['query'], default=str)}")
+        print(f"{'':<29} {stages}")
+    print(f"\n{unexpected} of {len(plans)} query shapes scan the whole collection unexpectedly")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(plans, indent=2, default=str))
+    sys.exit(1 if unexpected else 0)
+
+
+if __name__ == "__main__":
+    main()
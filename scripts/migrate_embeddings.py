@@ -0,0 +1,159 @@
+"""Migrate the knowledge base to a new embedding model without downtime.
+
+Vectors of the new model are stored beside the active ones while the API
+keeps serving from the active model; the switch happens in one write once
+every document is covered.
+
+Mongo collections stored before vectors were versioned hold one top-level
+``embedding`` per document; ``legacy`` moves it under the version of the
+model that produced it (the active one unless ``--model`` is given), once,
+before any other step. SQLite stores are versioned from the start.
+
+Usage (from the repository root):
+    PYTHONPATH=src python scripts/migrate_embeddings.py status
+    PYTHONPATH=src python scripts/migrate_embeddings.py legacy
+    PYTHONPATH=src python scripts/migrate_embeddings.py run --model BAAI/bge-small-en-v1.5
+    PYTHONPATH=src python scripts/migrate_embeddings.py compare --model BAAI/bge-small-en-v1.5
+    PYTHONPATH=src python scripts/migrate_embeddings.py switch --model BAAI/bge-small-en-v1.5
+    PYTHONPATH=src python scripts/migrate_embeddings.py drop --model sentence-transformers/all-MiniLM-L6-v2
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+from data.reembedding import ReembeddingJob, compare_models
+from retrieval.embeddings import create_embedding_generator, embedding_version
+from retrieval.storage import MongoBackend
+from retrieval.vector_store import VectorStore
+from utils.config import check_settings, settings
+
+EVAL_QUERIES = Path(__file__).parent.parent / "benchmarks" / "eval_queries.json"
+
+
+def status(vector_store: VectorStore, _args):
+    state = vector_store.embedding_state()
+    total = vector_store.documents.count()
+    print(f"Documents: {total}")
+    print(f"Active model: {state['active']}")
+    if state.get("previous"):
+        print(f"Previous model: {state['previous']} (switched {state.get('switched_at')})")
+    if state.get("target"):
+        embedded = vector_store.documents.count_embedded(embedding_version(state["target"]))
+        print(
+            f"Re-embedding into {state['target']}: {embedded}/{total} "
+            f"(started {state.get('started_at')}, updated {state.get('updated_at', '-')})"
+        )
+    if isinstance(vector_store.documents, MongoBackend):
+        legacy = vector_store.documents.count_legacy_embeddings()
+        if legacy:
+            print(
+                f"Unversioned vectors: {legacy} (run `legacy` to move them under the active model)"
+            )
+    if state["active"] != settings.embedding_model:
+        print(f"Note: EMBEDDING_MODEL is {settings.embedding_model}; set it to {state['active']}")
+
+
+def legacy(vector_store: VectorStore, args):
+    if not isinstance(vector_store.documents, MongoBackend):
+        raise ValueError("Only Mongo collections can hold unversioned vectors")
+    model = args.model or vector_store.active_model()
+    adopted = vector_store.documents.adopt_legacy_embeddings(embedding_version(model))
+    vector_store.invalidate_index()
+    print(f"Moved {adopted} unversioned vectors under {model}")
+
+
+def run(vector_store: VectorStore, args):
+    generator = create_embedding_generator(args.model)
+    job = ReembeddingJob(vector_store, generator, args.batch_size)
+    state = job.run(switch=not args.no_switch)
+    if state["active"] == args.model:
+        print(f"Active model is now {args.model}; set EMBEDDING_MODEL={args.model} in .env")
+
+
+def switch(vector_store: VectorStore, args):
+    ReembeddingJob.switch(vector_store, args.model)
+    print(f"Active model is now {args.model}; set EMBEDDING_MODEL={args.model} in .env")
+
+
+def drop(vector_store: VectorStore, args):
+    print(f"Dropped {ReembeddingJob.drop(vector_store, args.model)} vectors of {args.model}")
+
+
+def compare(vector_store: VectorStore, args):
+    old = args.against or vector_store.active_model()
+    generators = {
+        old: create_embedding_generator(old),
+        args.model: create_embedding_generator(args.model),
+    }
+    queries = [q["query"] for q in json.loads(Path(args.queries).read_text())["queries"]]
+    report = compare_models(vector_store, generators, queries, args.top_k)
+
+    print(f"{report['queries']} queries, top {report['top_k']}")
+    print(f"  overlap@{report['top_k']}: {report['overlap_at_k']:.1%}")
+    print(f"  top-1 agreement: {report['top1_agreement']:.1%}")
+    for model, result in report["models"].items():
+        print(
+            f"  {model}: {result['documents']} docs, "
+            f"embed p50={result['embed']['p50_ms']:.1f}ms p95={result['embed']['p95_ms']:.1f}ms, "
+            f"search p50={result['search']['p50_ms']:.1f}ms p95={result['search']['p95_ms']:.1f}ms"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding model migration")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Active model and re-embedding progress")
+
+    legacy_parser = commands.add_parser(
+        "legacy", help="Move unversioned Mongo vectors under the model that produced them"
+    )
+    legacy_parser.add_argument("--model", help="Model of the stored vectors (default: active)")
+
+    run_parser = commands.add_parser("run", help="Re-embed the collection into a new model")
+    run_parser.add_argument("--model", required=True)
+    run_parser.add_argument("--batch-size", type=int, default=settings.reembed_batch_size)
+    run_parser.add_argument(
+        "--no-switch", action="store_true", help="Leave the active model as is when done"
+    )
+
+    switch_parser = commands.add_parser("switch", help="Make a fully embedded model active")
+    switch_parser.add_argument("--model", required=True)
+
+    compare_parser = commands.add_parser("compare", help="Dual-read comparison of two models")
+    compare_parser.add_argument("--model", required=True, help="New model")
+    compare_parser.add_argument("--against", help="Old model (default: the active one)")
+    compare_parser.add_argument("--queries", default=str(EVAL_QUERIES))
+    compare_parser.add_argument("--top-k", type=int, default=settings.top_k_results)
+    compare_parser.add_argument("--output", help="Write the report as JSON")
+
+    drop_parser = commands.add_parser("drop", help="Remove the vectors of an unused model")
+    drop_parser.add_argument("--model", required=True)
+
+    args = parser.parse_args()
+    if check_settings():
+        sys.exit(1)
+
+    handlers = {
+        "status": status,
+        "legacy": legacy,
+        "run": run,
+        "switch": switch,
+        "compare": compare,
+        "drop": drop,
+    }
+    try:
+        handlers[args.command](VectorStore(), args)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,64 @@
-"""Setup the complete RAG system"""
+"""Setup the complete RAG system.
+
+Ingestion is checkpointed: rerunning after a crash resumes after the last
+stored batch. Show the progress of a running or interrupted job with
+``--status``; start over with ``--restart``.
+"""
+
+import argparse
+import sys
 
 from loguru import logger
 
-from data.ingestion import DataIngestionPipeline
+from data.ingestion import DataIngestionPipeline, checkpoint_progress
 from retrieval.vector_store import VectorStore
+from utils.config import check_settings
+
+
+def print_status(vector_store: VectorStore):
+    checkpoint = vector_store.ingestion_checkpoint()
+    if not checkpoint:
+        print("No ingestion job recorded")
+        return
+
+    progress = checkpoint_progress(checkpoint)
+    files = checkpoint["files"]
+    failed = {name: file for name, file in files.items() if file.get("status") == "failed"}
+    print(f"Ingestion of {checkpoint['directory']}: {checkpoint['status']}")
+    print(f"  Files: {len(files) - len(failed)} chunked, {len(failed)} failed")
+    for name, file in failed.items():
+        print(f"    {name}: {file['error']}")
+    print(
+        f"  Chunks: {checkpoint['committed']}/{checkpoint['chunks']} stored "
+        f"({progress['fraction']:.1%}) in {checkpoint['batches']} batches"
+    )
+    if progress["chunks_per_second"]:
+        eta = progress["eta_seconds"]
+        print(
+            f"  Throughput: {progress['chunks_per_second']:.1f} chunks/s"
+            + (f", ETA {eta:.0f}s" if eta else "")
+        )
+    print(f"  Started: {checkpoint['started_at']}, updated: {checkpoint.get('updated_at', '-')}")
+    if checkpoint.get("error"):
+        print(f"  Last error: {checkpoint['error']}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Set up the knowledge base")
+    parser.add_argument("--directory", default="data/raw", help="Knowledge files to ingest")
+    parser.add_argument("--status", action="store_true", help="Show ingestion progress and exit")
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore the checkpoint and ingest from scratch"
+    )
+    args = parser.parse_args()
+
+    if check_settings():
+        sys.exit(1)
+
+    if args.status:
+        print_status(VectorStore())
+        return
+
     logger.info("=" * 60)
     logger.info("ADB KNOWLEDGE ASSISTANT - SETUP")
     logger.info("=" * 60)
@@ -18,14 +70,26 @@ def main():
 
     # Step 2: Ingest knowledge base
     logger.info("\n2. Ingesting knowledge base...")
-    pipeline = DataIngestionPipeline()
+    pipeline = DataIngestionPipeline(vector_store=vector_store)
 
     # Ingest all data sources
-    result = pipeline.ingest_directory("data/raw")
+    try:
+        result = pipeline.ingest_directory(args.directory, restart=args.restart)
+    except Exception:
+        logger.error("Setup interrupted; run it again to resume from the last stored batch")
+        sys.exit(1)
 
     logger.info("\n✓ Setup complete!")
     logger.info(f"  Total documents: {result['total_inserted']}")
     logger.info(f"  Files processed: {result['files_processed']}")
+    if result.get("stale_removed"):
+        logger.info(f"  Stale documents removed: {result['stale_removed']}")
+    if "dedup" in result:
+        dedup = result["dedup"]
+        logger.info(
+            f"  Near-duplicates removed: {dedup['duplicates_removed']} "
+            f"({dedup['shrink']:.1%} of {dedup['chunks_in']} chunks)"
+        )
 
     logger.info("\n" + "=" * 60)
     logger.info("READY TO START!")
@@ -1,7 +1,8 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from loguru import logger
 
-from utils.llm_factory import create_generator_llm
+from utils.llm_calls import invoke_llm
+from utils.llm_factory import create_generator_llm, create_hedge_llm
 
 
 class CodeGeneratorAgent:
@@ -9,6 +10,7 @@ class CodeGeneratorAgent:
 
     def __init__(self):
         self.llm = create_generator_llm()
+        self.hedge_llm = create_hedge_llm()
 
     def process(self, query: str, retrieved_docs: list[dict]) -> str:
         """Process code generation queries"""
@@ -44,7 +46,9 @@ Generate clean Python code that accomplishes this task."""
 
         messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_message)]
 
-        response = self.llm.invoke(messages)
+        response = invoke_llm(
+            self.llm, messages, stage="code_generator_llm", hedge_llm=self.hedge_llm
+        )
         logger.info("CodeGeneratorAgent completed processing")
 
         return response.content
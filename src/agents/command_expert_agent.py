@@ -1,7 +1,8 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from loguru import logger
 
-from utils.llm_factory import create_llm
+from utils.llm_calls import invoke_llm
+from utils.llm_factory import create_hedge_llm, create_llm
 
 
 class CommandExpertAgent:
@@ -9,6 +10,7 @@ class CommandExpertAgent:
 
     def __init__(self):
         self.llm = create_llm()
+        self.hedge_llm = create_hedge_llm()
 
     def process(self, query: str, retrieved_docs: list[dict]) -> str:
         """Process command-related queries"""
@@ -45,7 +47,9 @@ Provide a comprehensive answer about the ADB command(s) relevant to this query."
 
         messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_message)]
 
-        response = self.llm.invoke(messages)
+        response = invoke_llm(
+            self.llm, messages, stage="command_expert_llm", hedge_llm=self.hedge_llm
+        )
         logger.info("CommandExpertAgent completed processing")
 
         return response.content
@@ -0,0 +1,593 @@
+"""Answer exact lookups straight from the structured knowledge base.
+
+"What's the syntax of adb install" does not need the router, retrieval or a
+generator call: everything the answer needs is already in
+``adb_commands.json``. Command names (and their short aliases) are held in a
+token trie; a query is answered here only when it names exactly one command
+and every other word is either a flag or syntax word of that command or a
+generic lookup word.
+
+"Python code to push a file to the device" is answered the same way from the
+stored ``code_pattern`` entries, with values found in the query (device
+serial, IP and port, paths, package) filled into the stored implementation.
+Anything else falls through to the agent graph.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+from utils.config import settings
+from utils.metrics import record_fast_path
+
+_TOKEN_RE = re.compile(r"--?[a-z0-9][a-z0-9-]*|[a-z0-9][a-z0-9_.]*")
+
+# Words that carry no content beyond "tell me about this command"
+LOOKUP_WORDS = frozenset(
+    [
+        "a",
+        "about",
+        "an",
+        "and",
+        "are",
+        "can",
+        "command",
+        "commands",
+        "describe",
+        "do",
+        "does",
+        "example",
+        "examples",
+        "explain",
+        "for",
+        "flag",
+        "flags",
+        "give",
+        "help",
+        "how",
+        "i",
+        "in",
+        "is",
+        "it",
+        "me",
+        "mean",
+        "means",
+        "of",
+        "on",
+        "option",
+        "options",
+        "parameter",
+        "parameters",
+        "s",
+        "show",
+        "syntax",
+        "tell",
+        "the",
+        "this",
+        "to",
+        "usage",
+        "use",
+        "used",
+        "using",
+        "what",
+        "whats",
+        "with",
+        "work",
+        "works",
+        "you",
+    ]
+)
+
+# Words that signal a question the command reference alone cannot answer
+FALLTHROUGH_WORDS = frozenset(
+    [
+        "code",
+        "error",
+        "errors",
+        "fail",
+        "failed",
+        "failing",
+        "fails",
+        "fix",
+        "issue",
+        "not",
+        "problem",
+        "python",
+        "script",
+        "unauthorized",
+        "why",
+        "won",
+    ]
+)
+
+# Queries longer than this are never exact lookups
+MAX_QUERY_TOKENS = 16
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase words, keeping flags such as ``-r`` and ``--user`` whole"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class CommandMatch:
+    """A query resolved to one command DB entry"""
+
+    entry: dict
+    flags: list[str] = field(default_factory=list)
+    confidence: float = 1.0
+
+
+class _TrieNode:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.entry: dict | None = None
+
+
+class CommandIndex:
+    """Token trie over command names and aliases, built from the command DB"""
+
+    query_type = "command_lookup"
+
+    def __init__(self, entries: list[dict], min_confidence: float):
+        self.entries = entries
+        self.min_confidence = min_confidence
+        self._root = _TrieNode()
+        # Per-command words that count as explained: flags and syntax placeholders
+        self._vocabulary: dict[str, frozenset[str]] = {}
+
+        for entry in entries:
+            for alias in self._aliases(tokenize(entry["command"])):
+                self._insert(alias, entry)
+            flags = {flag for parameter in entry.get("parameters", []) for flag in parameter}
+            self._vocabulary[entry["command"]] = frozenset(
+                tokenize(entry.get("syntax", "")) + [flag.lower() for flag in flags]
+            )
+
+    @classmethod
+    def from_file(cls, path: str, min_confidence: float) -> "CommandIndex":
+        entries = json.loads(Path(path).read_text(encoding="utf-8"))
+        index = cls(entries, min_confidence)
+        logger.info(f"Loaded {len(entries)} commands into the fast-path index")
+        return index
+
+    @staticmethod
+    def _aliases(tokens: list[str]) -> list[list[str]]:
+        """``adb shell pm list packages`` is also found as ``shell pm ...`` and ``pm ...``"""
+        aliases = [tokens]
+        if tokens[:1] == ["adb"] and len(tokens) > 1:
+            aliases.append(tokens[1:])
+            if tokens[1] == "shell" and len(tokens) > 2:
+                aliases.append(tokens[2:])
+        return aliases
+
+    def _insert(self, tokens: list[str], entry: dict):
+        node = self._root
+        for token in tokens:
+            node = node.children.setdefault(token, _TrieNode())
+        node.entry = entry
+
+    def _longest_match(self, tokens: list[str], start: int) -> tuple[dict | None, int]:
+        """Longest command starting at ``start``; returns (entry, end position)"""
+        node, matched, end = self._root, None, start
+        for position in range(start, len(tokens)):
+            node = node.children.get(tokens[position])
+            if node is None:
+                break
+            if node.entry is not None:
+                matched, end = node.entry, position + 1
+        return matched, end
+
+    def lookup(self, query: str) -> CommandMatch | None:
+        """Resolve a query to a single command, or None if it needs the full pipeline"""
+        tokens = tokenize(query)
+        if not tokens or len(tokens) > MAX_QUERY_TOKENS:
+            return None
+        if any(token in FALLTHROUGH_WORDS for token in tokens):
+            return None
+
+        matched: dict | None = None
+        residual = []
+        position = 0
+        while position < len(tokens):
+            entry, end = self._longest_match(tokens, position)
+            if entry is None:
+                residual.append(tokens[position])
+                position += 1
+                continue
+            if matched is not None and entry is not matched:
+                return None  # Several commands: a comparison or workflow question
+            matched, position = entry, end
+
+        if matched is None:
+            return None
+
+        vocabulary = self._vocabulary[matched["command"]]
+        flags = [token for token in residual if token.startswith("-") and token in vocabulary]
+        unexplained = [
+            token for token in residual if token not in vocabulary and token not in LOOKUP_WORDS
+        ]
+        confidence = 1 - len(unexplained) / len(tokens)
+        if confidence < self.min_confidence:
+            return None
+        return CommandMatch(entry=matched, flags=flags, confidence=confidence)
+
+    def answer(self, query: str) -> str | None:
+        """Templated answer for an exact command lookup, or None to fall through"""
+        match = self.lookup(query)
+        record_fast_path(self.query_type, hit=match is not None)
+        if match is None:
+            return None
+        logger.info(
+            f"Fast path answered '{match.entry['command']}' (confidence={match.confidence:.2f})"
+        )
+        return self.render(match)
+
+    @staticmethod
+    def render(match: CommandMatch) -> str:
+        """Format a command entry the way CommandExpertAgent structures its answers"""
+        entry = match.entry
+        parameters = {
+            flag: description
+            for parameter in entry.get("parameters", [])
+            for flag, description in parameter.items()
+        }
+        parts = [f"**`{entry['command']}`** - {entry['description']}"]
+
+        # Flags asked about come first (tokens are lowercase, the DB keeps e.g. "-W")
+        for flag, description in parameters.items():
+            if flag.lower() in match.flags:
+                parts.append(f"`{flag}`: {description}")
+
+        parts.append(f"**Syntax:**\n`{entry['syntax']}`")
+
+        if parameters:
+            parts.append(
+                "**Options:**\n"
+                + "\n".join(
+                    f"- `{flag}`: {description}" for flag, description in parameters.items()
+                )
+            )
+
+        if entry.get("examples"):
+            parts.append(
+                "**Examples:**\n"
+                + "\n".join(
+                    f"- `{example['command']}` - {example['explanation']}"
+                    for example in entry["examples"]
+                )
+            )
+
+        if entry.get("common_issues"):
+            parts.append(
+                "**Common issues:**\n" + "\n".join(f"- {issue}" for issue in entry["common_issues"])
+            )
+
+        if entry.get("related_commands"):
+            parts.append(
+                "**Related commands:** "
+                + ", ".join(f"`{command}`" for command in entry["related_commands"])
+            )
+
+        return "\n\n".join(parts)
+
+
+# Words that ask for code rather than a command
+CODE_WORDS = frozenset(
+    [
+        "code",
+        "function",
+        "implement",
+        "implementation",
+        "programmatically",
+        "python",
+        "script",
+        "snippet",
+    ]
+)
+
+# Words that signal a debugging question rather than a request for a known pattern
+CODE_FALLTHROUGH_WORDS = frozenset(
+    ["fail", "failed", "failing", "fails", "fix", "issue", "problem", "why", "won"]
+)
+
+# Operation name words too common across patterns to identify one
+GENERIC_OPERATION_TERMS = frozenset(["device", "file", "get", "number", "trigger"])
+
+# Words of a code request that ask for nothing beyond the operation it names
+CODE_LOOKUP_WORDS = frozenset(["all", "from", "if", "into", "my", "that", "whether", "write"])
+
+# Query words mapped onto the words operation names use
+OPERATION_SYNONYMS = {
+    "attached": "connected",
+    "dir": "directory",
+    "download": "pull",
+    "erase": "delete",
+    "fetch": "get",
+    "folder": "directory",
+    "gallery": "media",
+    "list": "get",
+    "make": "create",
+    "mkdir": "create",
+    "remove": "delete",
+    "rm": "delete",
+    "send": "push",
+    "serialno": "serial",
+    "upload": "push",
+    "verify": "check",
+}
+
+# Code requests may spell out paths and addresses, so allow longer queries
+MAX_CODE_QUERY_TOKENS = 32
+
+# Absolute paths under these roots are on the device; any other path is local
+DEVICE_PATH_PREFIXES = (
+    "/sdcard",
+    "/storage",
+    "/data",
+    "/system",
+    "/mnt",
+    "/vendor",
+    "/product",
+    "/cache",
+    "/proc",
+    "/dev",
+)
+
+_IP_RE = re.compile(r"\b(\d{1,3}(?:\.\d{1,3}){3})(?::(\d{1,5}))?\b")
+_SERIAL_RE = re.compile(
+    r"\bemulator-\d+\b|(?:-s|serial)\s+((?=[A-Za-z]*\d)[A-Za-z0-9]{6,})\b", re.IGNORECASE
+)
+_PAIRING_KEY_RE = re.compile(r"\b(?:code|key)\s*:?\s*(\d{6})\b", re.IGNORECASE)
+_PATH_RE = re.compile(r"(?<![\w:/.])((?:[A-Za-z]:\\|~/|\.\.?/|/)[^\s'\",;]*)")
+_PACKAGE_RE = re.compile(r"\b[a-z][a-z0-9_]*(?:\.[a-z][a-z0-9_]*){2,}\b")
+
+
+def _stem(word: str) -> str:
+    """Plural and third-person forms to the base word (devices, pushes, exists)"""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def operation_terms(text: str) -> set[str]:
+    """Normalized words of a query or an operation name"""
+    words = re.findall(r"[a-z0-9]+", text.lower().replace("_", " "))
+    return {OPERATION_SYNONYMS.get(_stem(word), _stem(word)) for word in words}
+
+
+@dataclass
+class QueryValues:
+    """Concrete values mentioned in a code request"""
+
+    ip: str | None = None
+    port: int | None = None
+    serial: str | None = None
+    pairing_key: str | None = None
+    package: str | None = None
+    device_paths: list[str] = field(default_factory=list)
+    local_paths: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_query(cls, query: str) -> "QueryValues":
+        values = cls()
+        if ip := _IP_RE.search(query):
+            values.ip = ip.group(1)
+            values.port = int(ip.group(2)) if ip.group(2) else None
+        if serial := _SERIAL_RE.search(query):
+            values.serial = serial.group(1) or serial.group(0)
+        if pairing_key := _PAIRING_KEY_RE.search(query):
+            values.pairing_key = pairing_key.group(1)
+        if package := _PACKAGE_RE.search(query):
+            values.package = package.group(0)
+        for path in _PATH_RE.findall(query):
+            path = path.rstrip(".)")
+            if path.startswith(DEVICE_PATH_PREFIXES):
+                values.device_paths.append(path)
+            elif len(path) > 1:
+                values.local_paths.append(path)
+        return values
+
+    @property
+    def device_id(self) -> str | None:
+        if self.serial:
+            return self.serial
+        if self.ip and self.port:
+            return f"{self.ip}:{self.port}"
+        return None
+
+
+@dataclass
+class PatternMatch:
+    """A code request resolved to one stored code pattern"""
+
+    entry: dict
+    code: str
+    filled: dict[str, object] = field(default_factory=dict)
+    confidence: float = 1.0
+
+
+class CodePatternIndex:
+    """Operation index over the ``code_pattern`` entries of the personal docs"""
+
+    query_type = "code_generation"
+
+    def __init__(self, entries: list[dict], min_confidence: float):
+        self.entries = [entry for entry in entries if entry.get("python_code")]
+        self.min_confidence = min_confidence
+        self._terms = {
+            entry["operation"]: operation_terms(entry["operation"]) - GENERIC_OPERATION_TERMS
+            for entry in self.entries
+        }
+        # Query words each pattern accounts for: its name, description, tags and parameter
+        # names, and filler
+        neutral = operation_terms(
+            " ".join(LOOKUP_WORDS | CODE_WORDS | CODE_LOOKUP_WORDS | GENERIC_OPERATION_TERMS)
+        )
+        self._vocabulary = {
+            entry["operation"]: neutral
+            | operation_terms(
+                " ".join(
+                    [entry["operation"], entry.get("description", "")]
+                    + list(entry.get("tags") or [])
+                    + list(entry.get("parameters") or {})
+                )
+            )
+            for entry in self.entries
+        }
+        self._by_operation = {entry["operation"]: entry for entry in self.entries}
+
+    @classmethod
+    def from_file(cls, path: str, min_confidence: float) -> "CodePatternIndex":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        entries = [
+            entry
+            for entry in data.get("knowledge_entries", [])
+            if entry.get("type") == "code_pattern"
+        ]
+        index = cls(entries, min_confidence)
+        logger.info(f"Loaded {len(index.entries)} code patterns into the fast-path index")
+        return index
+
+    def lookup(self, query: str) -> PatternMatch | None:
+        """Resolve a code request to a single stored pattern, or None for the full pipeline"""
+        tokens = tokenize(query)
+        if not tokens or len(tokens) > MAX_CODE_QUERY_TOKENS:
+            return None
+        if not CODE_WORDS.intersection(tokens) or CODE_FALLTHROUGH_WORDS.intersection(tokens):
+            return None
+
+        # Values are filled in, not words to explain (/sdcard/Download is not "download")
+        text = query
+        for pattern in (_PATH_RE, _IP_RE, _SERIAL_RE, _PAIRING_KEY_RE, _PACKAGE_RE):
+            text = pattern.sub(" ", text)
+        words = operation_terms(text)
+        if not words:
+            return None
+
+        confident = []
+        for operation, terms in self._terms.items():
+            if terms:
+                coverage = len(terms & words) / len(terms)
+                if coverage >= self.min_confidence:
+                    confident.append((coverage, operation))
+        if len(confident) != 1:
+            return None  # No known operation, or several: a workflow for the generator
+
+        # Words the pattern does not explain ("take a screenshot and pull it") lower confidence
+        coverage, operation = confident[0]
+        unexplained = words - self._vocabulary[operation]
+        confidence = coverage * (1 - len(unexplained) / len(words))
+        if confidence < self.min_confidence:
+            return None
+
+        entry = self._by_operation[operation]
+        code, filled = self.fill(entry, QueryValues.from_query(query))
+        return PatternMatch(entry=entry, code=code, filled=filled, confidence=confidence)
+
+    @staticmethod
+    def fill(entry: dict, values: QueryValues) -> tuple[str, dict[str, object]]:
+        """Replace the example keyword arguments of the stored code with values from the query"""
+        descriptions = entry.get("parameters") or {}
+        device_paths, local_paths = list(values.device_paths), list(values.local_paths)
+        filled: dict[str, object] = {}
+
+        def value_for(name: str) -> object | None:
+            if name == "device_id":
+                return values.device_id
+            if name in ("ip", "port", "pairing_key"):
+                return getattr(values, name)
+            if "package" in name:
+                return values.package
+            if name in ("source", "destination") or name.endswith("_path"):
+                paths = (
+                    local_paths if "local" in descriptions.get(name, "").lower() else device_paths
+                )
+                return paths.pop(0) if paths else None
+            return None
+
+        def substitute(match: re.Match) -> str:
+            name = match.group(1)
+            value = value_for(name)
+            if value is None:
+                return match.group(0)
+            filled[name] = value
+            return f"{name}={value!r}"
+
+        code = re.sub(r"\b(\w+)=('[^'\n]*'|\"[^\"\n]*\"|\d+)", substitute, entry["python_code"])
+        return code, filled
+
+    def answer(self, query: str) -> str | None:
+        """Stored implementation for a known operation, or None to fall through"""
+        match = self.lookup(query)
+        record_fast_path(self.query_type, hit=match is not None)
+        if match is None:
+            return None
+        logger.info(
+            f"Fast path answered code pattern '{match.entry['operation']}' "
+            f"(confidence={match.confidence:.2f}, filled={sorted(match.filled)})"
+        )
+        return self.render(match)
+
+    @staticmethod
+    def render(match: PatternMatch) -> str:
+        """Format a code pattern the way CodeGeneratorAgent presents code"""
+        entry = match.entry
+        parts = [
+            f"**`{entry['operation']}`** - {entry['description']}",
+            f"```python\n{match.code}\n```",
+        ]
+
+        if match.filled:
+            parts.append(
+                "Filled in from your query: "
+                + ", ".join(f"`{name}={value!r}`" for name, value in match.filled.items())
+                + ". Any other values are examples to replace."
+            )
+        else:
+            parts.append("The argument values are examples to replace with your own.")
+
+        if entry.get("parameters"):
+            parts.append(
+                "**Parameters:**\n"
+                + "\n".join(
+                    f"- `{name}`: {description}"
+                    for name, description in entry["parameters"].items()
+                )
+            )
+
+        for label, key in (
+            ("Returns", "returns"),
+            ("Validation", "validation"),
+            ("Error handling", "error_handling"),
+        ):
+            if entry.get(key):
+                parts.append(f"**{label}:** {entry[key]}")
+
+        if entry.get("command"):
+            parts.append(f"**Underlying command:** `{entry['command']}`")
+
+        return "\n\n".join(parts)
+
+
+def load_fast_paths() -> list:
+    """Fast-path indexes in the order queries are tried; missing sources are skipped"""
+    fast_paths = []
+    for index_class, path in (
+        (CommandIndex, settings.command_db_path),
+        (CodePatternIndex, settings.code_patterns_path),
+    ):
+        try:
+            fast_paths.append(index_class.from_file(path, settings.fast_path_min_confidence))
+        except OSError as e:
+            logger.warning(f"{index_class.__name__} not loaded, its fast path is disabled: {e}")
+    return fast_paths
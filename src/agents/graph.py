@@ -1,3 +1,4 @@
+from contextlib import suppress
 from typing import Annotated, TypedDict
 
 from langchain_core.messages import BaseMessage
@@ -10,6 +11,8 @@ from agents.command_expert_agent import CommandExpertAgent
 from agents.router_agent import RouterAgent
 from agents.synthesizer_agent import SynthesizerAgent
 from agents.troubleshooting_agent import TroubleshootingAgent
+from utils.config import settings
+from utils.deadline import DeadlineExceededError, degrade, remaining_budget
 
 
 class AgentState(TypedDict):
@@ -76,42 +79,51 @@ class ADBAgentGraph:
         return workflow.compile()
 
     def _route_query(self, state: AgentState) -> AgentState:
-        """Router node"""
-        query = state["query"]
-        classification = self.router.classify_query(query)
-        state["query_type"] = classification["query_type"]
-        logger.info(f"Routed to: {classification['query_type']}")
+        """Router node (falls back to the default route when the budget is low)"""
+        query_type = RouterAgent.DEFAULT_QUERY_TYPE
+        if remaining_budget() < settings.router_min_budget_seconds:
+            degrade("router_skipped")
+        else:
+            try:
+                query_type = self.router.classify_query(state["query"])["query_type"]
+            except DeadlineExceededError:
+                degrade("router_skipped")
+        state["query_type"] = query_type
+        logger.info(f"Routed to: {query_type}")
         return state
 
     def _route_to_specialist(self, state: AgentState) -> str:
         """Determine which specialist to use"""
         return state["query_type"]
 
+    def _run_specialist(self, state: AgentState, name: str, process) -> AgentState:
+        """Run a specialist, or answer extractively from the docs when the budget is low"""
+        retrieved_docs = state.get("retrieved_docs", [])
+        response = None
+        if remaining_budget() >= settings.specialist_min_budget_seconds:
+            with suppress(DeadlineExceededError):
+                response = process(state["query"], retrieved_docs)
+        if response is None:
+            degrade("extractive_answer")
+            response = self.synthesizer.extractive_answer(state["query"], retrieved_docs)
+        state["agent_responses"][name] = response
+        return state
+
     def _command_expert_node(self, state: AgentState) -> AgentState:
         """Command expert processing"""
-        response = self.command_expert.process(state["query"], state.get("retrieved_docs", []))
-        state["agent_responses"]["command_expert"] = response
-        return state
+        return self._run_specialist(state, "command_expert", self.command_expert.process)
 
     def _troubleshooting_node(self, state: AgentState) -> AgentState:
         """Troubleshooting processing"""
-        response = self.troubleshooting_agent.process(
-            state["query"], state.get("retrieved_docs", [])
-        )
-        state["agent_responses"]["troubleshooting"] = response
-        return state
+        return self._run_specialist(state, "troubleshooting", self.troubleshooting_agent.process)
 
     def _code_generator_node(self, state: AgentState) -> AgentState:
         """Code generation processing"""
-        response = self.code_generator.process(state["query"], state.get("retrieved_docs", []))
-        state["agent_responses"]["code_generator"] = response
-        return state
+        return self._run_specialist(state, "code_generator", self.code_generator.process)
 
     def _conceptual_node(self, state: AgentState) -> AgentState:
         """Conceptual explanation processing"""
-        response = self.command_expert.process(state["query"], state.get("retrieved_docs", []))
-        state["agent_responses"]["conceptual"] = response
-        return state
+        return self._run_specialist(state, "conceptual", self.command_expert.process)
 
     def _synthesizer_node(self, state: AgentState) -> AgentState:
         """Synthesize final response"""
@@ -124,8 +136,8 @@ class ADBAgentGraph:
         state["final_answer"] = final_answer
         return state
 
-    def query(self, user_query: str, retrieved_docs: list = None) -> str:
-        """Process a user query through the agent graph"""
+    def run(self, user_query: str, retrieved_docs: list = None) -> AgentState:
+        """Process a user query through the agent graph and return the final state"""
 
         initial_state = {
             "query": user_query,
@@ -136,5 +148,8 @@ class ADBAgentGraph:
             "messages": [],
         }
 
-        final_state = self.graph.invoke(initial_state)
-        return final_state["final_answer"]
+        return self.graph.invoke(initial_state)
+
+    def query(self, user_query: str, retrieved_docs: list = None) -> str:
+        """Process a user query through the agent graph"""
+        return self.run(user_query, retrieved_docs)["final_answer"]
@@ -1,6 +1,7 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from loguru import logger
 
+from utils.llm_calls import invoke_llm
 from utils.llm_factory import create_router_llm
 
 
@@ -15,6 +16,9 @@ class RouterAgent:
         "workflow",  # Step-by-step process
     ]
 
+    # Route used when the query cannot be classified (or the router is skipped)
+    DEFAULT_QUERY_TYPE = "conceptual"
+
     def __init__(self):
         self.llm = create_router_llm()
 
@@ -51,13 +55,13 @@ Reason: User wants step-by-step process"""
 
         messages = [SystemMessage(content=system_prompt), HumanMessage(content=f"Query: {query}")]
 
-        response = self.llm.invoke(messages)
+        response = invoke_llm(self.llm, messages, stage="router_llm")
 
         # Parse response
         content = response.content.lower()
 
         # Find which category appears in response
-        detected_type = "conceptual"  # default
+        detected_type = self.DEFAULT_QUERY_TYPE
         for query_type in self.QUERY_TYPES:
             if query_type in content:
                 detected_type = query_type
@@ -1,6 +1,9 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from loguru import logger
 
+from utils.config import settings
+from utils.deadline import DeadlineExceededError, degrade, remaining_budget
+from utils.llm_calls import invoke_llm
 from utils.llm_factory import create_synthesizer_llm
 
 
@@ -33,6 +36,11 @@ class SynthesizerAgent:
             logger.info("Returning specialist agent response")
             return main_response
 
+        # Not enough budget left for another LLM call; answer with what we have
+        if remaining_budget() < settings.synthesis_min_budget_seconds:
+            degrade("synthesis_skipped")
+            return main_response or self.extractive_answer(query, retrieved_docs)
+
         # Otherwise, synthesize from available context
         system_prompt = """You are a synthesis agent that creates comprehensive, accurate answers.
 
@@ -70,7 +78,27 @@ Synthesize a comprehensive answer to the user's query."""
 
         messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_message)]
 
-        response = self.llm.invoke(messages)
+        try:
+            response = invoke_llm(self.llm, messages, stage="synthesizer_llm")
+        except DeadlineExceededError:
+            degrade("synthesis_skipped")
+            return main_response or self.extractive_answer(query, retrieved_docs)
         logger.info("SynthesizerAgent completed synthesis")
 
         return response.content
+
+    def extractive_answer(self, query: str, retrieved_docs: list[dict], max_docs: int = 3) -> str:
+        """Answer straight from the top retrieved documents, without an LLM call"""
+        if not retrieved_docs:
+            return (
+                "I couldn't answer this within the time limit and found no relevant "
+                "documentation. Please try again."
+            )
+
+        parts = [f"Most relevant documentation for: {query}\n"]
+        for i, doc in enumerate(retrieved_docs[:max_docs], 1):
+            metadata = doc.get("metadata", {})
+            title = metadata.get("command") or metadata.get("category") or metadata.get("source")
+            content = doc.get("content", "").strip()[:500]
+            parts.append(f"{i}. {title}\n{content}\n" if title else f"{i}. {content}\n")
+        return "\n".join(parts)
@@ -1,7 +1,8 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from loguru import logger
 
-from utils.llm_factory import create_llm
+from utils.llm_calls import invoke_llm
+from utils.llm_factory import create_hedge_llm, create_llm
 
 
 class TroubleshootingAgent:
@@ -9,6 +10,7 @@ class TroubleshootingAgent:
 
     def __init__(self):
         self.llm = create_llm()
+        self.hedge_llm = create_hedge_llm()
 
     def process(self, query: str, retrieved_docs: list[dict]) -> str:
         """Process troubleshooting queries"""
@@ -45,7 +47,9 @@ Provide a clear diagnosis and step-by-step solution."""
 
         messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_message)]
 
-        response = self.llm.invoke(messages)
+        response = invoke_llm(
+            self.llm, messages, stage="troubleshooting_llm", hedge_llm=self.hedge_llm
+        )
         logger.info("TroubleshootingAgent completed processing")
 
         return response.content
@@ -63,6 +67,13 @@ Provide a clear diagnosis and step-by-step solution."""
 
             context_parts.append(f"[Solution {i}] (Relevance: {score:.2f})")
 
+            # Signatures found verbatim in the user's text are the strongest evidence
+            if doc.get("matched_signatures"):
+                signatures = ", ".join(f'"{s}"' for s in doc["matched_signatures"])
+                context_parts.append(
+                    f"Matched in user's output: {signatures} (Severity: {doc['severity']})"
+                )
+
             # Highlight error patterns
             if metadata.get("type") == "error_pattern":
                 error_indicator = metadata.get("error_indicator", "")
@@ -1,16 +1,50 @@
+import hashlib
+import re
+
 from loguru import logger
 
 from utils.config import settings
 
+# Sentence boundary: end punctuation followed by whitespace
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Sentences of whitespace-normalized text"""
+    text = " ".join(text.split())
+    return [sentence for sentence in _SENTENCE_END_RE.split(text) if sentence]
+
+
+def group_sentences(sentences: list[str], max_chars: int) -> list[str]:
+    """Consecutive sentences packed into pieces of at most ``max_chars`` (longer sentences alone)"""
+    pieces, current = [], ""
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
 
 class TextChunker:
     """Chunk text documents for embedding"""
 
     def __init__(
-        self, chunk_size: int = settings.chunk_size, chunk_overlap: int = settings.chunk_overlap
+        self,
+        chunk_size: int = settings.chunk_size,
+        chunk_overlap: int = settings.chunk_overlap,
+        hierarchical: bool = settings.enable_hierarchical_chunks,
+        parent_chunk_size: int = settings.parent_chunk_size,
+        child_chunk_size: int = settings.child_chunk_size,
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.hierarchical = hierarchical
+        self.parent_chunk_size = parent_chunk_size
+        self.child_chunk_size = child_chunk_size
 
     def chunk_text(self, text: str, metadata: dict = None) -> list[dict]:
         """Split text into overlapping chunks"""
@@ -56,6 +90,44 @@ class TextChunker:
         logger.debug(f"Created {len(chunks)} chunks from text of length {len(text)}")
         return chunks
 
+    def chunk_hierarchical(self, text: str, metadata: dict, heading: str = "") -> list[dict]:
+        """Split text into parent sections and small child chunks that link to them.
+
+        Children are what gets embedded; each chunk dict carries its parent
+        section under ``parent`` (shared by siblings) for the parent store.
+        """
+        entry_key = metadata.get("url") or heading or text[:200]
+        chunks = []
+        sections = group_sentences(split_sentences(text), self.parent_chunk_size)
+        for section_id, section in enumerate(sections):
+            parent_id = hashlib.sha1(f"{entry_key}#{section_id}".encode()).hexdigest()[:24]
+            parent = {
+                "_id": parent_id,
+                "content": f"{heading}\n\n{section}" if heading else section,
+                "metadata": {**metadata, "section_id": section_id, "sections": len(sections)},
+            }
+            children = group_sentences(split_sentences(section), self.child_chunk_size)
+            for child_id, child in enumerate(children):
+                chunk_metadata = {
+                    **metadata,
+                    "parent_id": parent_id,
+                    "section_id": section_id,
+                    "chunk_id": child_id,
+                }
+                chunks.append(
+                    {
+                        "text": f"{heading}\n{child}" if heading else child,
+                        "metadata": chunk_metadata,
+                        "parent": parent,
+                    }
+                )
+
+        logger.debug(
+            f"Created {len(chunks)} child chunks in {len(sections)} sections "
+            f"from text of length {len(text)}"
+        )
+        return chunks
+
     def chunk_json_knowledge(self, knowledge_entry: dict) -> list[dict]:
         """Chunk structured knowledge entries - handles multiple formats"""
         chunks = []
@@ -136,8 +208,10 @@ class TextChunker:
             if "url" in knowledge_entry:
                 text_parts.append(f"URL: {knowledge_entry['url']}")
             if "content" in knowledge_entry:
-                # Limit content length for docs
-                content = knowledge_entry["content"][:5000]  # First 5000 chars
+                content = knowledge_entry["content"]
+                if not self.hierarchical:
+                    # Limit content length for docs
+                    content = content[:5000]  # First 5000 chars
                 text_parts.append(f"Content: {content}")
 
         else:
@@ -182,15 +256,30 @@ class TextChunker:
             metadata["command"] = knowledge_entry.get("command", "")
         elif entry_type == "troubleshooting":
             metadata["issue"] = knowledge_entry.get("issue", "")
+            metadata["symptoms"] = knowledge_entry.get("symptoms", [])
         elif entry_type == "error_pattern":
             metadata["error_indicator"] = knowledge_entry.get("error_indicator", "")
             metadata["severity"] = knowledge_entry.get("severity", "medium")
         elif entry_type == "code_pattern":
             metadata["operation"] = knowledge_entry.get("operation", "")
+        elif entry_type == "documentation":
+            metadata["url"] = knowledge_entry.get("url", "")
 
         # For most knowledge entries, create single chunk
         # Only chunk if text is very long
         if len(full_text) > self.chunk_size * 2:
+            if self.hierarchical:
+                heading = next(
+                    (
+                        knowledge_entry[key]
+                        for key in ("title", "issue", "command", "operation")
+                        if isinstance(knowledge_entry.get(key), str)
+                    ),
+                    "",
+                )
+                # First line only: scraped page titles continue with site boilerplate
+                heading = next((line.strip() for line in heading.splitlines() if line.strip()), "")
+                return self.chunk_hierarchical(full_text, metadata, heading)
             return self.chunk_text(full_text, metadata)
         else:
             return [{"text": full_text, "metadata": metadata}]
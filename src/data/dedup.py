@@ -0,0 +1,195 @@
+"""Near-duplicate chunk elimination with MinHash signatures and LSH banding"""
+
+import re
+import time
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+# Hash values are taken modulo this prime so a * h + b stays within uint64
+_PRIME = (1 << 31) - 1
+
+# Probability that a pair exactly at the threshold becomes an LSH candidate
+LSH_RECALL = 0.99
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int) -> set[str]:
+    """Overlapping word n-grams of the normalized text; short texts give one shingle"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_bands(num_perm: int, threshold: float, recall: float = LSH_RECALL) -> tuple[int, int]:
+    """(bands, rows) with the most rows per band that keep ``recall`` at ``threshold``.
+
+    A pair with Jaccard similarity s shares at least one band bucket with
+    probability 1 - (1 - s^rows)^bands. Candidates are verified exactly, so
+    the banding only has to avoid missing pairs; more rows per band means
+    fewer candidates to verify.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0:
+            bands = num_perm // rows
+            if 1 - (1 - threshold**rows) ** bands >= recall:
+                best = (bands, rows)
+    return best
+
+
+def merge_metadata(canonical: dict, duplicates: list[dict]) -> dict:
+    """Canonical metadata with list fields unioned and every source recorded"""
+    merged = dict(canonical)
+    for metadata in duplicates:
+        for key, value in metadata.items():
+            if isinstance(value, list) and isinstance(merged.get(key, []), list):
+                merged[key] = list(merged.get(key, []))
+                merged[key].extend(v for v in value if v not in merged[key])
+
+    sources = [canonical.get("source")] + [metadata.get("source") for metadata in duplicates]
+    merged["sources"] = list(dict.fromkeys(source for source in sources if source))
+    merged["duplicate_count"] = len(duplicates)
+    return merged
+
+
+@dataclass
+class DedupStats:
+    chunks_in: int
+    chunks_out: int
+    chars_in: int
+    chars_out: int
+    seconds: float
+
+    @property
+    def removed(self) -> int:
+        return self.chunks_in - self.chunks_out
+
+    @property
+    def shrink(self) -> float:
+        """Share of chunks removed"""
+        return self.removed / self.chunks_in if self.chunks_in else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "chunks_in": self.chunks_in,
+            "chunks_out": self.chunks_out,
+            "duplicates_removed": self.removed,
+            "shrink": round(self.shrink, 4),
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        self.parent[self.find(b)] = self.find(a)
+
+
+class MinHashDeduplicator:
+    """Collapses chunks whose word-shingle Jaccard similarity reaches ``threshold``.
+
+    Each chunk gets a MinHash signature of ``num_perm`` values. Signatures are
+    cut into bands and a chunk is only compared with chunks sharing at least
+    one band bucket, so the work grows with the number of chunks rather than
+    the number of pairs. Candidates are confirmed with the exact Jaccard
+    similarity of their shingle sets. Each cluster of near-duplicates is
+    replaced by its longest chunk, carrying the merged metadata of the rest.
+    """
+
+    def __init__(
+        self, threshold: float, num_perm: int = 128, shingle_words: int = 5, seed: int = 1
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, shingle_set: set[str]) -> np.ndarray:
+        """Minimum of each of the ``num_perm`` hash permutations over the shingles"""
+        if not shingle_set:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set),
+            dtype=np.uint64,
+            count=len(shingle_set),
+        )
+        return ((self._a * (hashes % _PRIME) + self._b) % _PRIME).min(axis=1)
+
+    def clusters(self, texts: list[str]) -> list[list[int]]:
+        """Groups of near-duplicate text positions, each in input order"""
+        shingle_sets = [shingles(text, self.shingle_words) for text in texts]
+        union_find = _UnionFind(len(texts))
+        buckets: list[dict[bytes, list[int]]] = [{} for _ in range(self.bands)]
+
+        for position, shingle_set in enumerate(shingle_sets):
+            signature = self.signature(shingle_set)
+            candidates = set()
+            for band, bucket in enumerate(buckets):
+                key = signature[band * self.rows : (band + 1) * self.rows].tobytes()
+                members = bucket.setdefault(key, [])
+                candidates.update(members)
+                members.append(position)
+
+            for candidate in sorted(candidates):
+                if union_find.find(candidate) == union_find.find(position):
+                    continue
+                if jaccard(shingle_sets[candidate], shingle_set) >= self.threshold:
+                    union_find.union(candidate, position)
+
+        groups: dict[int, list[int]] = {}
+        for position in range(len(texts)):
+            groups.setdefault(union_find.find(position), []).append(position)
+        return list(groups.values())
+
+    def deduplicate(self, chunks: list[dict]) -> tuple[list[dict], DedupStats]:
+        """One canonical chunk per cluster, in the order the canonical chunks came in"""
+        start = time.perf_counter()
+        groups = self.clusters([chunk["text"] for chunk in chunks])
+
+        canonical = []
+        for group in groups:
+            keep = max(group, key=lambda position: len(chunks[position]["text"]))
+            duplicates = [chunks[position]["metadata"] for position in group if position != keep]
+            chunk = chunks[keep]
+            if duplicates:
+                chunk = {**chunk, "metadata": merge_metadata(chunk["metadata"], duplicates)}
+            canonical.append((keep, chunk))
+        kept = [chunk for _, chunk in sorted(canonical, key=lambda item: item[0])]
+
+        stats = DedupStats(
+            chunks_in=len(chunks),
+            chunks_out=len(kept),
+            chars_in=sum(len(chunk["text"]) for chunk in chunks),
+            chars_out=sum(len(chunk["text"]) for chunk in kept),
+            seconds=time.perf_counter() - start,
+        )
+        logger.info(
+            f"Dedup: {stats.chunks_in} -> {stats.chunks_out} chunks "
+            f"({stats.removed} near-duplicates removed, {stats.shrink:.1%} smaller) "
+            f"in {stats.seconds * 1000:.0f}ms"
+        )
+        return kept, stats
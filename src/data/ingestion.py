@@ -1,23 +1,65 @@
+import hashlib
 import json
+import time
+import traceback
+from datetime import UTC, datetime
 from pathlib import Path
 
 from loguru import logger
 
 from data.chunking import TextChunker
-from retrieval.embeddings import EmbeddingGenerator
+from data.dedup import MinHashDeduplicator
+from retrieval.embeddings import (
+    EmbeddingGenerator,
+    RemoteEmbeddingGenerator,
+    create_embedding_generator,
+)
 from retrieval.vector_store import VectorStore
+from utils.config import settings
+
+
+def utc_now() -> str:
+    return datetime.now(UTC).isoformat(timespec="seconds")
+
+
+def chunk_id(chunk: dict) -> str:
+    """Deterministic _id of a chunk, so storing it again replaces the earlier copy"""
+    source = chunk["metadata"].get("source", "")
+    return hashlib.sha1(f"{source}\0{chunk['text']}".encode()).hexdigest()[:24]
+
+
+def checkpoint_progress(checkpoint: dict) -> dict:
+    """Stored share, measured throughput and ETA of an ingestion checkpoint"""
+    committed, total = checkpoint["committed"], checkpoint["chunks"]
+    rate = committed / checkpoint["seconds"] if checkpoint["seconds"] else None
+    return {
+        "fraction": committed / total if total else 1.0,
+        "chunks_per_second": rate,
+        "eta_seconds": (total - committed) / rate if rate else None,
+    }
 
 
 class DataIngestionPipeline:
     """Process and ingest documents into vector store"""
 
-    def __init__(self):
-        self.chunker = TextChunker()
-        self.embedding_generator = EmbeddingGenerator()
-        self.vector_store = VectorStore()
+    def __init__(
+        self,
+        chunker: TextChunker | None = None,
+        embedding_generator: EmbeddingGenerator | RemoteEmbeddingGenerator | None = None,
+        vector_store: VectorStore | None = None,
+        deduplicator: MinHashDeduplicator | None = None,
+    ):
+        self.chunker = chunker or TextChunker()
+        self.embedding_generator = embedding_generator or create_embedding_generator()
+        self.vector_store = vector_store or VectorStore()
+        if deduplicator is None and settings.enable_dedup:
+            deduplicator = MinHashDeduplicator(
+                settings.dedup_threshold, settings.dedup_num_perm, settings.dedup_shingle_words
+            )
+        self.deduplicator = deduplicator
 
-    def ingest_json_file(self, file_path: str) -> dict:
-        """Ingest JSON knowledge file"""
+    def load_chunks(self, file_path: str) -> list[dict]:
+        """Chunk every knowledge entry of a JSON file"""
         logger.info(f"Ingesting file: {file_path}")
 
         with open(file_path, encoding="utf-8") as f:
@@ -33,8 +75,7 @@ class DataIngestionPipeline:
             knowledge_entries = data.get("knowledge_entries", [])
             logger.info(f"Found {len(knowledge_entries)} knowledge entries")
         else:
-            logger.error(f"Unknown JSON format in {file_path}")
-            return {"inserted_count": 0, "error": "Unknown format"}
+            raise ValueError(f"Unknown JSON format in {file_path}")
 
         # Process each entry
         all_chunks = []
@@ -42,48 +83,245 @@ class DataIngestionPipeline:
             chunks = self.chunker.chunk_json_knowledge(entry)
             all_chunks.extend(chunks)
 
-        logger.info(f"Created {len(all_chunks)} total chunks")
+        logger.info(f"Created {len(all_chunks)} chunks from {Path(file_path).name}")
+        return all_chunks
+
+    def deduplicate(self, chunks: list[dict]) -> tuple[list[dict], dict | None]:
+        """Chunks with near-duplicates collapsed, and the dedup stats (None when disabled)"""
+        if self.deduplicator is None or not chunks:
+            return chunks, None
+        chunks, stats = self.deduplicator.deduplicate(chunks)
+        return chunks, stats.as_dict()
 
-        # Generate embeddings
-        texts = [chunk["text"] for chunk in all_chunks]
-        embeddings = self.embedding_generator.generate_embeddings(texts)
+    def store_chunks(self, chunks: list[dict], show_progress_bar: bool = True) -> dict:
+        """Embed and store chunks, replacing earlier copies by their deterministic _id"""
+        texts = [chunk["text"] for chunk in chunks]
+        embeddings = (
+            self.embedding_generator.generate_embeddings(texts, show_progress_bar=show_progress_bar)
+            if texts
+            else []
+        )
 
-        # Prepare documents for insertion
-        documents = []
-        for chunk, embedding in zip(all_chunks, embeddings, strict=False):
-            doc = {"content": chunk["text"], "metadata": chunk["metadata"], "embedding": embedding}
-            documents.append(doc)
+        documents = [
+            {
+                "_id": chunk_id(chunk),
+                "content": chunk["text"],
+                "metadata": chunk["metadata"],
+                "embedding": embedding,
+            }
+            for chunk, embedding in zip(chunks, embeddings, strict=True)
+        ]
 
-        # Insert into vector store
-        result = self.vector_store.insert_documents(documents)
+        # Parent sections of hierarchical chunks are stored unembedded, once per section
+        parents = {chunk["parent"]["_id"]: chunk["parent"] for chunk in chunks if "parent" in chunk}
+        self.vector_store.insert_parents(list(parents.values()))
 
+        upserted = self.vector_store.upsert_documents(
+            documents, model=self.embedding_generator.model_name
+        )
+        result = {"inserted_count": upserted}
+        if parents:
+            result["parent_sections"] = len(parents)
+        return result
+
+    def ingest_chunks(self, chunks: list[dict]) -> dict:
+        """Collapse near-duplicates, embed and store chunks"""
+        chunks, dedup = self.deduplicate(chunks)
+        result = self.store_chunks(chunks)
+        if dedup is not None:
+            result["dedup"] = dedup
+        return result
+
+    def ingest_json_file(self, file_path: str) -> dict:
+        """Ingest JSON knowledge file"""
+        try:
+            chunks = self.load_chunks(file_path)
+        except ValueError as e:
+            logger.error(str(e))
+            return {"inserted_count": 0, "error": "Unknown format"}
+
+        result = self.ingest_chunks(chunks)
         logger.success(f"Ingested {result['inserted_count']} documents from {Path(file_path).name}")
         return result
 
-    def ingest_directory(self, directory_path: str) -> dict:
-        """Ingest all JSON files from directory"""
+    def _fingerprint(self, files: dict[str, str]) -> str:
+        """Hash of the input files and every setting that shapes the stored chunks"""
+        deduplicator = self.deduplicator
+        inputs = {
+            "files": files,
+            "chunker": vars(self.chunker),
+            "dedup": deduplicator
+            and [deduplicator.threshold, deduplicator.num_perm, deduplicator.shingle_words],
+            "model": self.embedding_generator.model_name,
+        }
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _store_batch(self, chunks: list[dict], number: int):
+        """Store one batch, retrying with exponential backoff"""
+        for attempt in range(settings.ingest_max_retries + 1):
+            try:
+                self.store_chunks(chunks, show_progress_bar=False)
+                return
+            except Exception as e:
+                if attempt == settings.ingest_max_retries:
+                    raise
+                delay = settings.ingest_retry_backoff_seconds * 2**attempt
+                logger.warning(
+                    f"Batch {number} failed (attempt {attempt + 1}): {e}; retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def _remove_stale(self, chunks: list[dict]) -> int:
+        """Delete documents and parent sections of the chunks' sources not written by this run.
+
+        Chunks whose text changed or that were dropped from a file (or by
+        dedup) keep their old _id, so without this they would stay
+        retrievable next to their replacements. Parent sections go with
+        their children, including every section of a source that is no
+        longer chunked hierarchically.
+        """
+        sources = sorted({chunk["metadata"].get("source", "") for chunk in chunks})
+        written = {chunk_id(chunk) for chunk in chunks}
+        written_parents = {chunk["parent"]["_id"] for chunk in chunks if "parent" in chunk}
+        stale, stale_parents = [], []
+        for source in sources:
+            stale.extend(
+                doc_id
+                for doc_id in self.vector_store.documents.find_ids({"source": source})
+                if str(doc_id) not in written
+            )
+            stale_parents.extend(
+                parent_id
+                for parent_id in self.vector_store.parents.find_ids({"source": source})
+                if str(parent_id) not in written_parents
+            )
+        if not stale and not stale_parents:
+            return 0
+
+        logger.info(
+            f"Removing {len(stale)} stale documents and {len(stale_parents)} stale parent "
+            f"sections of {len(sources)} sources"
+        )
+        removed = self.vector_store.delete_documents(stale) if stale else 0
+        if stale_parents:
+            removed += self.vector_store.delete_parents(stale_parents)
+        return removed
+
+    def ingest_directory(self, directory_path: str, restart: bool = False) -> dict:
+        """Ingest all JSON files from directory as a resumable job.
+
+        Chunks of all files are deduplicated together, so the same content in
+        two sources (e.g. a command in both the command DB and personal docs)
+        is stored once. They are then embedded and stored in batches of
+        INGEST_BATCH_SIZE, each followed by a checkpoint in the storage
+        backend. A rerun over the same files and settings resumes after the
+        last committed batch, or returns at once if the job completed;
+        ``restart`` starts over. Chunk ids derive from their content, so a
+        batch stored twice replaces its first copy. Once the job completes,
+        stored documents and parent sections of the ingested sources that it
+        did not write are deleted, unless a file failed to load.
+        """
         directory = Path(directory_path)
-        json_files = list(directory.glob("**/*.json"))
+        json_files = sorted(directory.glob("**/*.json"))
 
         logger.info(f"Found {len(json_files)} JSON files in {directory_path}")
 
-        total_inserted = 0
-        files_succeeded = 0
-
+        files = {}
+        all_chunks = []
         for json_file in json_files:
+            name = str(json_file.relative_to(directory))
+            files[name] = {"sha1": hashlib.sha1(json_file.read_bytes()).hexdigest()}
             try:
-                result = self.ingest_json_file(str(json_file))
-                if result.get("inserted_count", 0) > 0:
-                    total_inserted += result["inserted_count"]
-                    files_succeeded += 1
+                chunks = self.load_chunks(str(json_file))
             except Exception as e:
                 logger.error(f"Error ingesting {json_file}: {e}")
-                import traceback
-
                 logger.debug(traceback.format_exc())
+                files[name].update(status="failed", error=str(e))
+                continue
+            files[name].update(status="chunked", chunks=len(chunks))
+            all_chunks.extend(chunks)
+
+        chunks, dedup = self.deduplicate(all_chunks)
+        fingerprint = self._fingerprint({name: file["sha1"] for name, file in files.items()})
+
+        checkpoint = self.vector_store.ingestion_checkpoint()
+        if checkpoint and checkpoint.get("fingerprint") == fingerprint and not restart:
+            if checkpoint["status"] == "complete":
+                logger.info(f"{directory_path} is already ingested (pass restart to redo it)")
+            else:
+                logger.info(
+                    f"Resuming ingestion after {checkpoint['committed']}/{checkpoint['chunks']} "
+                    f"chunks ({checkpoint['batches']} batches)"
+                )
+        else:
+            if checkpoint and checkpoint["status"] != "complete" and not restart:
+                logger.warning("Inputs changed since the interrupted ingestion; starting over")
+            parents = {chunk["parent"]["_id"] for chunk in chunks if "parent" in chunk}
+            checkpoint = {
+                "directory": str(directory_path),
+                "fingerprint": fingerprint,
+                "status": "running",
+                "files": files,
+                "chunks": len(chunks),
+                "parent_sections": len(parents),
+                "dedup": dedup,
+                "committed": 0,
+                "batches": 0,
+                "seconds": 0.0,
+                "started_at": utc_now(),
+            }
+
+        while checkpoint["committed"] < len(chunks):
+            start = checkpoint["committed"]
+            batch = chunks[start : start + settings.ingest_batch_size]
+            number = checkpoint["batches"] + 1
+            started = time.perf_counter()
+            try:
+                self._store_batch(batch, number)
+            except Exception as e:
+                checkpoint.update(
+                    status="failed", error=f"Batch {number}: {e}", updated_at=utc_now()
+                )
+                self.vector_store.set_ingestion_checkpoint(checkpoint)
+                logger.error(f"Ingestion stopped at batch {number}; rerun to resume: {e}")
+                raise
+
+            checkpoint["committed"] += len(batch)
+            checkpoint["batches"] = number
+            checkpoint["seconds"] += time.perf_counter() - started
+            checkpoint.update(status="running", updated_at=utc_now())
+            checkpoint.pop("error", None)
+            self.vector_store.set_ingestion_checkpoint(checkpoint)
+
+            progress = checkpoint_progress(checkpoint)
+            logger.info(
+                f"Stored batch {number}: {checkpoint['committed']}/{len(chunks)} chunks "
+                f"({progress['chunks_per_second']:.0f} chunks/s, "
+                f"ETA {progress['eta_seconds']:.0f}s)"
+            )
+
+        if checkpoint["status"] != "complete":
+            failed = [name for name, file in files.items() if file.get("status") == "failed"]
+            if failed:
+                # Their sources may be shared with files that loaded; keep what is stored
+                logger.warning(f"Stale documents kept: {len(failed)} files failed to load")
+                checkpoint["stale_removed"] = 0
+            else:
+                checkpoint["stale_removed"] = self._remove_stale(chunks)
+            checkpoint.update(status="complete", updated_at=utc_now())
+            self.vector_store.set_ingestion_checkpoint(checkpoint)
+            logger.success(f"Ingested {checkpoint['committed']} documents from {directory_path}")
 
-        return {
-            "total_inserted": total_inserted,
+        summary = {
+            "total_inserted": checkpoint["committed"],
             "files_processed": len(json_files),
-            "files_succeeded": files_succeeded,
+            "files_succeeded": sum(file.get("chunks", 0) > 0 for file in files.values()),
+            "batches": checkpoint["batches"],
         }
+        if checkpoint["parent_sections"]:
+            summary["parent_sections"] = checkpoint["parent_sections"]
+        if checkpoint["dedup"] is not None:
+            summary["dedup"] = checkpoint["dedup"]
+        if checkpoint.get("stale_removed"):
+            summary["stale_removed"] = checkpoint["stale_removed"]
+        return summary
@@ -0,0 +1,178 @@
+"""Re-embedding the stored documents into a new embedding model without downtime"""
+
+import time
+
+import numpy as np
+from loguru import logger
+
+from data.ingestion import utc_now
+from retrieval.embeddings import embedding_version
+from retrieval.vector_store import VectorStore
+from utils.config import settings
+
+
+class ReembeddingJob:
+    """Encodes every stored document with a new model, beside the active model's vectors.
+
+    Documents are walked in _id order, ``batch_size`` at a time, and only
+    those still lacking a vector of the target model are encoded, so a
+    stopped job resumes where it left off and documents ingested meanwhile
+    are picked up by a further pass. Progress is kept in the store's
+    embedding state. Reads stay on the active model throughout; once every
+    document has a target vector the state is switched in one write, and each
+    worker moves to the new model at its next index refresh.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        generator,
+        batch_size: int = settings.reembed_batch_size,
+    ):
+        self.vector_store = vector_store
+        self.generator = generator
+        self.batch_size = batch_size
+
+    def run(self, switch: bool = True) -> dict:
+        """Embed all missing documents, then (with ``switch``) make the target model active"""
+        store = self.vector_store
+        target = self.generator.model_name
+        version = embedding_version(target)
+        state = store.embedding_state()
+        if state["active"] == target:
+            logger.info(f"{target} is already the active embedding model")
+            return state
+        if state.get("target") not in (None, target):
+            logger.warning(f"Abandoning re-embedding into {state['target']} for {target}")
+
+        state = {
+            "active": state["active"],
+            "target": target,
+            "total": store.documents.count(),
+            "embedded": store.documents.count_embedded(version),
+            "started_at": utc_now(),
+        }
+        store.set_embedding_state(state)
+        logger.info(
+            f"Re-embedding {state['total'] - state['embedded']} of {state['total']} documents "
+            f"into {target} (reads stay on {state['active']})"
+        )
+
+        start = time.perf_counter()
+        encoded = 0
+        after = None
+        while True:
+            batch = store.documents.missing_embeddings(version, self.batch_size, after)
+            if not batch:
+                if after is None:
+                    break
+                after = None  # Another pass for documents ingested or changed meanwhile
+                continue
+
+            vectors = self.generator.generate_embeddings(
+                [doc["content"] for doc in batch], show_progress_bar=False
+            )
+            stored = store.documents.set_embeddings(
+                version,
+                [
+                    (doc["_id"], doc["content"], vector)
+                    for doc, vector in zip(batch, vectors, strict=True)
+                ],
+            )
+            after = batch[-1]["_id"]
+            encoded += len(batch)
+            state["embedded"] = min(state["embedded"] + stored, state["total"])
+            state["updated_at"] = utc_now()
+            store.set_embedding_state(state)
+
+            rate = encoded / (time.perf_counter() - start)
+            remaining = state["total"] - state["embedded"]
+            logger.info(
+                f"Re-embedded {state['embedded']}/{state['total']} "
+                f"({rate:.0f} docs/s, ETA {remaining / rate:.0f}s)"
+            )
+
+        state["total"] = store.documents.count()
+        state["embedded"] = store.documents.count_embedded(version)
+        logger.info(
+            f"Re-embedding into {target} complete: {encoded} documents encoded "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        if switch:
+            return self.switch(store, target)
+        store.set_embedding_state(state)
+        return state
+
+    @staticmethod
+    def switch(vector_store: VectorStore, model: str) -> dict:
+        """Make ``model`` the active model; refused while any document lacks its vector"""
+        documents = vector_store.documents
+        missing = documents.count() - documents.count_embedded(embedding_version(model))
+        if missing:
+            raise ValueError(f"{missing} documents have no {model} vector yet")
+
+        previous = vector_store.active_model()
+        # One write: readers see either the old state or the new one
+        state = {"active": model, "previous": previous, "switched_at": utc_now()}
+        vector_store.set_embedding_state(state)
+        logger.info(f"Active embedding model switched from {previous} to {model}")
+        return state
+
+    @staticmethod
+    def drop(vector_store: VectorStore, model: str) -> int:
+        """Remove the vectors of a model that is neither active nor being migrated to"""
+        state = vector_store.embedding_state()
+        if model in (state["active"], state.get("target")):
+            raise ValueError(f"{model} is in use and its vectors cannot be dropped")
+        dropped = vector_store.documents.drop_embeddings(embedding_version(model))
+        logger.info(f"Dropped {dropped} {model} vectors")
+        return dropped
+
+
+def _percentiles(seconds: list[float]) -> dict:
+    ms = np.array(seconds) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+    }
+
+
+def compare_models(
+    vector_store: VectorStore, generators: dict, queries: list[str], top_k: int = 5
+) -> dict:
+    """Dual-read: run each query against two models' vectors and compare the rankings.
+
+    ``generators`` maps two model names (old first) to their query encoders.
+    Reports mean overlap@k and top-1 agreement between the two rankings, and
+    per-model embed and search latency.
+    """
+    (old, _), (new, _) = generators.items()
+    results = {}
+    for model, generator in generators.items():
+        index = vector_store.build_index(model)
+        embed, search, rankings = [], [], []
+        for query in queries:
+            started = time.perf_counter()
+            embedding = generator.generate_embedding(query)
+            embedded = time.perf_counter()
+            docs = vector_store.vector_search(embedding, top_k, index=index)
+            search.append(time.perf_counter() - embedded)
+            embed.append(embedded - started)
+            rankings.append([str(doc["_id"]) for doc in docs])
+        results[model] = {
+            "documents": len(index),
+            "embed": _percentiles(embed),
+            "search": _percentiles(search),
+            "rankings": rankings,
+        }
+
+    pairs = list(zip(results[old].pop("rankings"), results[new].pop("rankings"), strict=True))
+    overlap = [len(set(a) & set(b)) / top_k for a, b in pairs]
+    top1 = [bool(a) and bool(b) and a[0] == b[0] for a, b in pairs]
+    return {
+        "queries": len(queries),
+        "top_k": top_k,
+        "overlap_at_k": round(float(np.mean(overlap)), 4),
+        "top1_agreement": round(float(np.mean(top1)), 4),
+        "models": results,
+    }
@@ -1,20 +1,117 @@
-from fastapi import FastAPI, HTTPException
+import json
+import secrets
+import threading
+import uuid
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from agents.graph import ADBAgentGraph
-from retrieval.hybrid_retriever import HybridRetriever
-from utils.config import settings
+from retrieval.signatures import highest_severity
+from utils.admission import OverloadedError, controllers, graph_admission
+from utils.config import check_settings, settings
+from utils.deadline import remaining_budget, start_deadline
 from utils.logger import setup_logger
+from utils.metrics import (
+    INFLIGHT_REQUESTS,
+    begin_request,
+    end_request,
+    render_metrics,
+    stage_timer,
+)
+from utils.profiling import RequestProfiler
+from utils.singleflight import SingleFlight
+from utils.startup import ServiceState, StartupTimer
 
 # Setup logging
 setup_logger()
 
+startup_timer = StartupTimer()
+service = ServiceState()
+profiler = RequestProfiler()
+query_flights = SingleFlight("query")
+
+
+def warm_up():
+    """Load the embedding model, resident vector index and agents.
+
+    Heavy modules (torch, sentence-transformers, LangChain, LangGraph) are
+    imported here rather than at module level so the app starts serving
+    /health immediately and importing main stays cheap for tooling.
+    """
+    try:
+        with startup_timer.phase("import_retrieval"):
+            from retrieval.embeddings import create_embedding_generator
+            from retrieval.hybrid_retriever import HybridRetriever
+            from retrieval.vector_store import VectorStore
+
+        with startup_timer.phase("load_vector_index"):
+            vector_store = VectorStore()
+            vector_store.load_index()
+
+        with startup_timer.phase("load_embedding_model"):
+            # Queries are encoded with the model the stored vectors are read from
+            embedding_generator = create_embedding_generator(vector_store.active_model())
+            embedding_generator.generate_embedding("warm up")
+
+        if settings.enable_fast_path:
+            with startup_timer.phase("load_fast_paths"):
+                from agents.fast_path import load_fast_paths
+
+                service.fast_paths = load_fast_paths()
+
+        with startup_timer.phase("import_agents"):
+            from agents.graph import ADBAgentGraph
+
+        with startup_timer.phase("build_agents"):
+            agent_graph = ADBAgentGraph()
+
+        reranker = None
+        if settings.enable_rerank:
+            with startup_timer.phase("load_reranker"):
+                from retrieval.reranker import CrossEncoderReranker
+
+                reranker = CrossEncoderReranker()
+
+        retriever = HybridRetriever(
+            embedding_generator=embedding_generator, vector_store=vector_store, reranker=reranker
+        )
+        service.mark_ready(retriever, agent_graph)
+        startup_timer.log_summary()
+
+    except Exception as e:
+        service.mark_failed(e)
+        logger.exception(f"Warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if check_settings():
+        raise RuntimeError("Invalid configuration, see errors above")
+
+    # Sync endpoints run in anyio's threadpool; queued /query requests hold a thread
+    # while they wait, so leave room for the admission queue plus other endpoints
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(
+        limiter.total_tokens, settings.graph_concurrency + settings.graph_queue_size + 16
+    )
+
+    if settings.warmup_in_background:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        warm_up()
+
+    yield
+
+
 app = FastAPI(
     title=settings.app_name,
     version="0.1.0",
     description="Multi-agent RAG system for Android/ADB operations",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -26,15 +123,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize components
-retriever = HybridRetriever()
-agent_graph = ADBAgentGraph()
-
 
 class QueryRequest(BaseModel):
     query: str
     top_k: int | None = 5
     filters: dict | None = None
+    budget_seconds: float | None = None  # Overrides QUERY_BUDGET_SECONDS
+    fast_path: bool = True  # False always runs the agent graph (e.g. to adapt a stored pattern)
 
 
 class QueryResponse(BaseModel):
@@ -42,6 +137,32 @@ class QueryResponse(BaseModel):
     answer: str
     retrieved_docs: list[dict]
     query_type: str
+    degradations: list[str] = []
+    severity: str | None = None  # Highest severity among matched error signatures
+
+
+class AdmissionUpdate(BaseModel):
+    pool: str
+    limit: int | None = None
+    queue_size: int | None = None
+
+
+class ProfilingUpdate(BaseModel):
+    enabled: bool | None = None
+    sample_rate: float | None = None
+    slow_threshold_ms: float | None = None
+    interval_ms: float | None = Field(default=None, gt=0)  # 0 would make the sampler spin
+
+
+def is_admin(token: str | None) -> bool:
+    """Whether ADMIN_TOKEN is configured and ``token`` matches it"""
+    return bool(settings.admin_token) and secrets.compare_digest(token or "", settings.admin_token)
+
+
+def require_admin(token: str | None):
+    """Reject admin calls unless ADMIN_TOKEN is configured and matches"""
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin access denied")
 
 
 @app.get("/")
@@ -54,32 +175,179 @@ def health_check():
     return {"status": "healthy"}
 
 
-@app.post("/query", response_model=QueryResponse)
-async def query_knowledge(request: QueryRequest):
-    """Main query endpoint"""
+@app.get("/ready")
+def readiness_check(response: Response):
+    """Ready once the embedding model, vector index and agents are loaded"""
+    if service.is_ready:
+        return {"status": "ready", "startup": startup_timer.summary()}
+
+    response.status_code = 503
+    return {
+        "status": "failed" if service.error else "warming_up",
+        "error": service.error,
+        "startup": startup_timer.summary(),
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics in text exposition format"""
+    if not settings.enable_metrics:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/admin/profiling")
+def get_profiling(x_admin_token: str | None = Header(default=None)):
+    """Current profiler settings"""
+    require_admin(x_admin_token)
+    return profiler.status()
+
+
+@app.post("/admin/profiling")
+def update_profiling(update: ProfilingUpdate, x_admin_token: str | None = Header(default=None)):
+    """Toggle profiling or change sampling at runtime"""
+    require_admin(x_admin_token)
+    if update.sample_rate is not None and not 0.0 <= update.sample_rate <= 1.0:
+        raise HTTPException(status_code=422, detail="sample_rate must be between 0 and 1")
+    return profiler.configure(**update.model_dump())
 
-    try:
-        logger.info(f"Received query: {request.query}")
 
+def coalescing_key(request: QueryRequest) -> tuple:
+    """Requests with the same key can share one pipeline execution"""
+    normalized_query = " ".join(request.query.lower().split())
+    filters = json.dumps(request.filters, sort_keys=True, default=str)
+    return normalized_query, request.top_k, filters, request.budget_seconds, request.fast_path
+
+
+def run_pipeline(request: QueryRequest) -> tuple[list[dict], dict, list[str]]:
+    """Retrieve documents and run the agent graph within the request's budget.
+
+    Returns (retrieved_docs, final_state, degradations taken to meet the budget).
+    """
+    # Exact command lookups and known code patterns are answered without retrieval or LLM calls
+    if request.fast_path and not request.filters:
+        with stage_timer("fast_path"):
+            for fast_path in service.fast_paths:
+                answer = fast_path.answer(request.query)
+                if answer is not None:
+                    return (
+                        [],
+                        {
+                            "query_type": fast_path.query_type,
+                            "final_answer": answer,
+                            "fast_path": True,
+                        },
+                        [],
+                    )
+
+    budget = (
+        settings.query_budget_seconds if request.budget_seconds is None else request.budget_seconds
+    )
+    deadline = start_deadline(budget)
+
+    with graph_admission.admit(timeout=min(settings.admission_timeout_seconds, remaining_budget())):
         # Retrieve relevant documents
-        retrieved_docs = retriever.retrieve(
+        retrieved_docs = service.retriever.retrieve(
             query=request.query, top_k=request.top_k, filters=request.filters
         )
 
         # Process through agent graph
-        answer = agent_graph.query(user_query=request.query, retrieved_docs=retrieved_docs)
+        final_state = service.agent_graph.run(
+            user_query=request.query, retrieved_docs=retrieved_docs
+        )
+    return retrieved_docs, final_state, list(deadline.degradations) if deadline else []
+
+
+@app.get("/admin/admission")
+def get_admission(x_admin_token: str | None = Header(default=None)):
+    """Limits and occupancy of each admission pool"""
+    require_admin(x_admin_token)
+    return [controller.status() for controller in controllers.values()]
+
+
+@app.post("/admin/admission")
+def update_admission(update: AdmissionUpdate, x_admin_token: str | None = Header(default=None)):
+    """Change an admission pool's concurrency limit or queue size at runtime"""
+    require_admin(x_admin_token)
+    controller = controllers.get(update.pool)
+    if controller is None:
+        raise HTTPException(status_code=404, detail=f"Unknown pool: {update.pool}")
+    if update.queue_size is not None and update.queue_size < 0:
+        raise HTTPException(status_code=422, detail="queue_size cannot be negative")
+    return controller.configure(limit=update.limit, queue_size=update.queue_size)
+
+
+@app.post("/query", response_model=QueryResponse)
+def query_knowledge(request: QueryRequest, http_request: Request, response: Response):
+    """Main query endpoint (runs in the threadpool so concurrent requests overlap)"""
+
+    if not service.is_ready:
+        raise HTTPException(
+            status_code=503, detail="Service is warming up", headers={"Retry-After": "5"}
+        )
+
+    request_id = http_request.headers.get("x-request-id") or uuid.uuid4().hex
+    response.headers["X-Request-ID"] = request_id
+
+    request_metrics = begin_request()
+    query_type = ""
+    # Forced profiles cost a sampler thread and disk; only admins may ask for one
+    profile_requested = http_request.headers.get("x-profile", "").lower() in ("1", "true")
+    profile = profiler.start(
+        request_id,
+        requested=profile_requested and is_admin(http_request.headers.get("x-admin-token")),
+    )
+
+    try:
+        with INFLIGHT_REQUESTS.track_inprogress():
+            logger.info(f"Received query: {request.query}")
+
+            # Identical queries already in flight share that execution
+            (retrieved_docs, final_state, degradations), coalesced = query_flights.do(
+                coalescing_key(request), run_pipeline, request
+            )
+            query_type = final_state["query_type"]
+            if coalesced:
+                response.headers["X-Coalesced"] = "true"
+            if final_state.get("fast_path"):
+                response.headers["X-Fast-Path"] = "true"
+
+        end_request(request_metrics, query_type)
+        logger.info(
+            f"Query completed in {request_metrics.elapsed() * 1000:.0f}ms "
+            f"(type={query_type}{', coalesced' if coalesced else ''}"
+            f"{', degraded: ' + ', '.join(degradations) if degradations else ''})"
+        )
 
         return QueryResponse(
             query=request.query,
-            answer=answer,
+            answer=final_state["final_answer"],
             retrieved_docs=retrieved_docs,
-            query_type="determined_by_router",
+            query_type=query_type,
+            degradations=degradations,
+            severity=highest_severity(
+                doc.get("severity") for doc in retrieved_docs if doc.get("matched_signatures")
+            ),
+        )
+
+    except OverloadedError as e:
+        end_request(request_metrics, query_type, status="rejected")
+        logger.warning(f"Query rejected: {e}")
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)}
         )
 
     except Exception as e:
+        end_request(request_metrics, query_type, status="error")
         logger.error(f"Query error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        profiler.finish(profile, request_metrics.elapsed(), request_metrics.stage_totals())
+
 
 if __name__ == "__main__":
     import uvicorn
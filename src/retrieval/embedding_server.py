@@ -0,0 +1,238 @@
+"""Shared embedding service: one model, micro-batched across concurrent clients.
+
+Run one per host and point the API workers at it with EMBEDDING_SERVER_ADDRESS:
+
+    PYTHONPATH=src python -m retrieval.embedding_server --address unix:/tmp/adb-embeddings.sock
+
+Wire format: every request is one JSON line. Every reply is one JSON header
+line; encode replies are followed by ``count * dimension`` little-endian
+float32 values.
+"""
+
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+from utils.config import settings
+
+DEFAULT_ADDRESS = "unix:/tmp/adb-embeddings.sock"
+
+
+def parse_address(address: str) -> tuple[int, str | tuple[str, int]]:
+    """Socket family and address for ``unix:/path`` or ``host:port``"""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:") :]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def send_message(wfile, header: dict, payload: bytes = b""):
+    wfile.write(json.dumps(header).encode("utf-8") + b"\n" + payload)
+    wfile.flush()
+
+
+def read_header(rfile) -> dict:
+    line = rfile.readline()
+    if not line:
+        raise ConnectionError("Connection closed")
+    return json.loads(line)
+
+
+@dataclass
+class _Pending:
+    texts: list[str]
+    future: Future
+
+
+class MicroBatcher:
+    """Gathers concurrent encode requests into batches for a single model.
+
+    The first waiting request opens a batch; requests arriving within
+    ``wait_ms`` join it until ``max_batch_size`` texts are collected. The
+    batch is encoded in one ``model.encode`` call and split back per request.
+    """
+
+    def __init__(self, model, max_batch_size: int, wait_ms: float):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.wait_seconds = wait_ms / 1000
+        self.batches = 0
+        self.texts = 0
+        self._queue: queue.Queue[_Pending] = queue.Queue()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        pending = _Pending(texts, Future())
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _collect(self) -> list[_Pending]:
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.wait_seconds
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            size += len(pending.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for pending in batch for text in pending.texts]
+            try:
+                embeddings = np.asarray(self.model.encode(texts), dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+
+            offset = 0
+            for pending in batch:
+                pending.future.set_result(embeddings[offset : offset + len(pending.texts)])
+                offset += len(pending.texts)
+
+            self.batches += 1
+            self.texts += len(texts)
+            logger.debug(f"Encoded batch: {len(batch)} requests, {len(texts)} texts")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        batcher: MicroBatcher = self.server.batcher
+        while True:
+            try:
+                request = read_header(self.rfile)
+            except (ConnectionError, json.JSONDecodeError):
+                return
+
+            op = request.get("op", "encode")
+            if op == "info":
+                send_message(
+                    self.wfile,
+                    {"dimension": self.server.dimension, "model": self.server.model_name},
+                )
+            elif op == "stats":
+                send_message(self.wfile, batcher.stats())
+            elif op == "encode":
+                try:
+                    embeddings = batcher.encode(request["texts"])
+                except Exception as e:
+                    send_message(self.wfile, {"error": str(e)})
+                    continue
+                send_message(
+                    self.wfile,
+                    {"count": embeddings.shape[0], "dimension": embeddings.shape[1]},
+                    embeddings.astype("<f4").tobytes(),
+                )
+            else:
+                send_message(self.wfile, {"error": f"Unknown op: {op}"})
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class EmbeddingServer:
+    """Serves ``model.encode`` over a Unix socket or loopback TCP"""
+
+    def __init__(
+        self,
+        model,
+        address: str = DEFAULT_ADDRESS,
+        max_batch_size: int | None = None,
+        batch_wait_ms: float | None = None,
+        model_name: str | None = None,
+    ):
+        self.address = address
+        family, bind_address = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(bind_address):
+                os.unlink(bind_address)  # Stale socket from a previous run
+            self._server = _UnixServer(bind_address, _Handler)
+        else:
+            self._server = _TCPServer(bind_address, _Handler)
+
+        self._server.dimension = model.get_sentence_embedding_dimension()
+        self._server.model_name = model_name or settings.embedding_model
+        self._server.batcher = MicroBatcher(
+            model,
+            max_batch_size or settings.embedding_max_batch_size,
+            settings.embedding_batch_wait_ms if batch_wait_ms is None else batch_wait_ms,
+        )
+
+    def serve_forever(self):
+        logger.info(f"Embedding server listening on {self.address}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            family, bind_address = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(bind_address):
+                os.unlink(bind_address)
+
+    def shutdown(self):
+        self._server.shutdown()
+
+
+def main():
+    from retrieval.embeddings import EmbeddingGenerator
+    from utils.logger import setup_logger
+
+    parser = argparse.ArgumentParser(description="Shared micro-batching embedding server")
+    parser.add_argument(
+        "--address",
+        default=settings.embedding_server_address or DEFAULT_ADDRESS,
+        help="unix:/path/to.sock or host:port",
+    )
+    parser.add_argument("--model", default=settings.embedding_model, help="Model to serve")
+    parser.add_argument("--max-batch-size", type=int, default=settings.embedding_max_batch_size)
+    parser.add_argument("--batch-wait-ms", type=float, default=settings.embedding_batch_wait_ms)
+    args = parser.parse_args()
+
+    setup_logger()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # Remove the socket file on stop
+    generator = EmbeddingGenerator(args.model)
+    server = EmbeddingServer(
+        generator.model, args.address, args.max_batch_size, args.batch_wait_ms, args.model
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Embedding server stopped")
+
+
+if __name__ == "__main__":
+    main()
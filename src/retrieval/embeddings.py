@@ -1,25 +1,135 @@
+import re
+import socket
+import threading
+
+import numpy as np
 from loguru import logger
-from sentence_transformers import SentenceTransformer
 
 from utils.config import settings
 
 
+def embedding_version(model_name: str) -> str:
+    """Key the vectors of ``model_name`` are stored under"""
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", model_name).strip("_")
+
+
 class EmbeddingGenerator:
     """Generate embeddings for text"""
 
-    def __init__(self):
-        logger.info(f"Loading embedding model: {settings.embedding_model}")
-        self.model = SentenceTransformer(settings.embedding_model)
+    def __init__(self, model_name: str | None = None):
+        # Importing sentence_transformers pulls in torch; defer it until a model is needed
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name or settings.embedding_model
+        logger.info(f"Loading embedding model: {self.model_name}")
+        self.model = SentenceTransformer(self.model_name)
         self.dimension = self.model.get_sentence_embedding_dimension()
         logger.info(f"Embedding dimension: {self.dimension}")
 
-    def generate_embeddings(self, texts: list[str]) -> list[list[float]]:
+    def generate_embeddings(
+        self, texts: list[str], show_progress_bar: bool = True
+    ) -> list[list[float]]:
         """Generate embeddings for list of texts"""
         logger.info(f"Generating embeddings for {len(texts)} texts")
-        embeddings = self.model.encode(texts, show_progress_bar=True)
+        embeddings = self.model.encode(texts, show_progress_bar=show_progress_bar)
         return embeddings.tolist()
 
     def generate_embedding(self, text: str) -> list[float]:
         """Generate embedding for single text"""
         embedding = self.model.encode([text])[0]
         return embedding.tolist()
+
+
+class RemoteEmbeddingGenerator:
+    """Drop-in EmbeddingGenerator backed by the shared embedding server"""
+
+    def __init__(self, address: str | None = None, timeout: float = 30.0):
+        self.address = address or settings.embedding_server_address
+        self.timeout = timeout
+        self._local = threading.local()  # One connection per calling thread
+
+        info = self._request({"op": "info"})[0]
+        self.dimension = info["dimension"]
+        self.model_name = info.get("model", settings.embedding_model)
+        logger.info(
+            f"Using embedding server at {self.address} "
+            f"({self.model_name}, dimension {self.dimension})"
+        )
+
+    def _connect(self):
+        from retrieval.embedding_server import parse_address
+
+        family, address = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(address)
+        self._local.sock = sock
+        self._local.rfile = sock.makefile("rb")
+        self._local.wfile = sock.makefile("wb")
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _request(self, message: dict) -> tuple[dict, bytes]:
+        from retrieval.embedding_server import read_header, send_message
+
+        # Retry once on a fresh connection in case the server was restarted
+        for attempt in range(2):
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    self._connect()
+                send_message(self._local.wfile, message)
+                header = read_header(self._local.rfile)
+                payload = b""
+                if "count" in header:
+                    payload = self._local.rfile.read(header["count"] * header["dimension"] * 4)
+                break
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+
+        if "error" in header:
+            raise RuntimeError(f"Embedding server error: {header['error']}")
+        return header, payload
+
+    def server_stats(self) -> dict:
+        """Batches and texts encoded by the server since it started"""
+        return self._request({"op": "stats"})[0]
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        header, payload = self._request({"op": "encode", "texts": texts})
+        return np.frombuffer(payload, dtype="<f4").reshape(header["count"], header["dimension"])
+
+    def generate_embeddings(
+        self, texts: list[str], show_progress_bar: bool = True
+    ) -> list[list[float]]:
+        """Generate embeddings for list of texts (progress is shown by the server, if at all)"""
+        logger.info(f"Generating embeddings for {len(texts)} texts")
+        return self._encode(texts).tolist()
+
+    def generate_embedding(self, text: str) -> list[float]:
+        """Generate embedding for single text"""
+        return self._encode([text])[0].tolist()
+
+
+def create_embedding_generator(
+    model_name: str | None = None,
+) -> EmbeddingGenerator | RemoteEmbeddingGenerator:
+    """Client of the shared embedding server if EMBEDDING_SERVER_ADDRESS is set, else a local model.
+
+    ``model_name`` defaults to EMBEDDING_MODEL; if the server runs a different
+    model, that one is loaded in-process instead.
+    """
+    model_name = model_name or settings.embedding_model
+    if settings.embedding_server_address:
+        generator = RemoteEmbeddingGenerator()
+        if generator.model_name == model_name:
+            return generator
+        logger.warning(
+            f"Embedding server runs {generator.model_name}; loading {model_name} in-process"
+        )
+    return EmbeddingGenerator(model_name)
@@ -1,16 +1,72 @@
+import threading
+
 from loguru import logger
 
-from retrieval.embeddings import EmbeddingGenerator
+from retrieval.embeddings import (
+    EmbeddingGenerator,
+    RemoteEmbeddingGenerator,
+    create_embedding_generator,
+)
+from retrieval.reranker import CrossEncoderReranker
 from retrieval.vector_store import VectorStore
 from utils.config import settings
+from utils.deadline import current_deadline
+from utils.metrics import stage_timer
+
+# Child chunks searched per requested result, since siblings collapse into one parent
+CHILDREN_PER_RESULT = 3
+
+
+def query_windows(
+    query: str,
+    window_words: int = settings.long_query_window_words,
+    overlap: int = settings.long_query_window_overlap,
+    max_windows: int = settings.long_query_max_windows,
+) -> list[str]:
+    """Split a long query into overlapping word windows; short queries stay whole.
+
+    Windows keep each part of a long query within the embedding model's
+    input limit instead of it being truncated. Beyond ``max_windows``,
+    evenly spaced windows are kept, always including the first and last.
+    """
+    words = query.split()
+    if window_words <= 0 or len(words) <= window_words:
+        return [query]
+
+    stride = window_words - overlap
+    starts = list(range(0, len(words) - overlap, stride))
+    if len(starts) > max_windows:
+        step = (len(starts) - 1) / max(max_windows - 1, 1)
+        starts = sorted({starts[round(i * step)] for i in range(max_windows)})
+    return [" ".join(words[start : start + window_words]) for start in starts]
 
 
 class HybridRetriever:
     """Hybrid retrieval combining vector and keyword search"""
 
-    def __init__(self):
-        self.embedding_generator = EmbeddingGenerator()
-        self.vector_store = VectorStore()
+    def __init__(
+        self,
+        embedding_generator: EmbeddingGenerator | RemoteEmbeddingGenerator | None = None,
+        vector_store: VectorStore | None = None,
+        reranker: CrossEncoderReranker | None = None,
+    ):
+        self.embedding_generator = embedding_generator or create_embedding_generator()
+        self.vector_store = vector_store or VectorStore()
+        self.reranker = reranker
+        # Query encoders by model; another is loaded when the active embedding model switches
+        self._encoders = {self.embedding_generator.model_name: self.embedding_generator}
+        self._encoders_lock = threading.Lock()
+
+    def _encoder(self, model: str) -> EmbeddingGenerator | RemoteEmbeddingGenerator:
+        """Encoder for queries against vectors of ``model``"""
+        encoder = self._encoders.get(model)
+        if encoder is None:
+            with self._encoders_lock:
+                encoder = self._encoders.get(model)
+                if encoder is None:
+                    logger.info(f"Active embedding model is now {model}; loading it for queries")
+                    encoder = self._encoders[model] = create_embedding_generator(model)
+        return encoder
 
     def retrieve(
         self,
@@ -22,30 +78,156 @@ class HybridRetriever:
         """Retrieve relevant documents"""
 
         logger.info(f"Retrieving for query: {query[:100]}...")
-
-        # Generate query embedding
-        query_embedding = self.embedding_generator.generate_embedding(query)
-
-        # Vector search
-        vector_results = self.vector_store.vector_search(
-            query_embedding=query_embedding, top_k=top_k, filters=filters
+        search_k = top_k * CHILDREN_PER_RESULT if settings.enable_hierarchical_chunks else top_k
+        if self.reranker is not None:
+            # Over-fetch candidates; only the best few reach the agents
+            search_k = max(search_k, settings.rerank_candidates)
+            top_k = min(top_k, settings.rerank_top_n)
+
+        # Exact error signatures (e.g. in pasted logcat) identify their entries directly
+        signature_docs = []
+        if settings.enable_signature_matching and not filters:
+            signature_docs = self.vector_store.match_signatures(query)[:top_k]
+
+        # Embed the query with the model of the index it is scored against
+        index = self.vector_store.get_index()
+        encoder = self._encoder(index.model)
+
+        windows = query_windows(query)
+        if len(windows) > 1:
+            # Long query: embed all windows in one batch and score them together
+            logger.info(f"Long query split into {len(windows)} windows")
+            with stage_timer("embed_query"):
+                window_embeddings = encoder.generate_embeddings(windows, show_progress_bar=False)
+            results = self.vector_store.vector_search_windows(
+                window_embeddings,
+                top_k=search_k,
+                filters=filters,
+                aggregation=settings.long_query_aggregation,
+                index=index,
+            )
+        else:
+            # Generate query embedding
+            with stage_timer("embed_query"):
+                query_embedding = encoder.generate_embedding(query)
+
+            # Vector search
+            results = self.vector_store.vector_search(
+                query_embedding=query_embedding, top_k=search_k, filters=filters, index=index
+            )
+
+        if use_hybrid:
+            keyword_results = self._keyword_search(query, top_k)
+            results = self._merge_results(results, keyword_results)
+
+        if self.reranker is not None:
+            results = self._rerank(query, results)
+
+        # Specific signature matches rank ahead of similarity results; generic
+        # ones take the place their weighted score earns among them
+        if signature_docs:
+            specific = [doc for doc in signature_docs if doc["score"] >= 1.0]
+            generic = [doc for doc in signature_docs if doc["score"] < 1.0]
+            results = self._merge_results(specific, self._insert_by_score(generic, results))
+
+        if settings.enable_hierarchical_chunks:
+            results = self._expand_parents(results, top_k)
+        else:
+            results = results[:top_k]
+        logger.info(f"Retrieved {len(results)} unique documents")
+        return results
+
+    def _expand_parents(self, results: list[dict], top_k: int) -> list[dict]:
+        """Replace child chunks by their parent sections, once per parent, within the budget.
+
+        A parent takes the rank and score of its best child and counts the
+        children that matched. Once PARENT_CONTEXT_BUDGET_CHARS is used up,
+        children stand in for their parents; other documents are kept as is.
+        """
+        parent_ids = list(
+            dict.fromkeys(
+                result["metadata"]["parent_id"]
+                for result in results
+                if result.get("metadata", {}).get("parent_id")
+            )
         )
+        parents = {}
+        if parent_ids:
+            with stage_timer("parent_expand"):
+                parents = self.vector_store.fetch_parents(parent_ids)
+
+        expanded: dict[str, dict] = {}
+        budget = settings.parent_context_budget_chars
+        for result in results:
+            parent_id = result.get("metadata", {}).get("parent_id")
+            key = parent_id or str(result.get("_id"))
+            if key in expanded:
+                expanded[key]["matched_chunks"] = expanded[key].get("matched_chunks", 1) + 1
+                continue
+            if len(expanded) == top_k:
+                break
+
+            doc = result
+            parent = parents.get(parent_id)
+            if parent is not None and len(parent["content"]) <= budget:
+                doc = {**parent, "score": result.get("score"), "matched_chunks": 1}
+                if "rerank_score" in result:
+                    doc["rerank_score"] = result["rerank_score"]
+            budget -= len(doc.get("content", ""))
+            expanded[key] = doc
+
+        return list(expanded.values())
+
+    def _rerank(self, query: str, results: list[dict]) -> list[dict]:
+        """Candidates reordered by the cross-encoder, or as retrieved once the budget is spent"""
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired():
+            deadline.degrade("rerank_skipped")
+            return results
 
-        if not use_hybrid:
-            return vector_results
-
-        # Keyword search
         try:
-            keyword_results = self.vector_store.keyword_search(query, top_k=top_k)
+            with stage_timer("rerank"):
+                return self.reranker.rerank(query, results)
         except Exception as e:
-            logger.warning(f"Keyword search failed: {e}")
-            keyword_results = []
+            logger.warning(f"Rerank failed, keeping retrieval order: {e}")
+            return results
 
-        # Combine and deduplicate results
-        combined_results = self._merge_results(vector_results, keyword_results)
+    def _keyword_search(self, query: str, top_k: int) -> list[dict]:
+        """Keyword search results, or none if it fails"""
+        # Keyword search is an extra Mongo round trip; drop it once the budget is spent
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired():
+            deadline.degrade("keyword_search_skipped")
+            return []
 
-        logger.info(f"Retrieved {len(combined_results)} unique documents")
-        return combined_results[:top_k]
+        try:
+            with stage_timer("keyword_search"):
+                return self.vector_store.keyword_search(query, top_k=top_k)
+        except Exception as e:
+            logger.warning(f"Keyword search failed: {e}")
+            return []
+
+    def _insert_by_score(self, docs: list[dict], results: list[dict]) -> list[dict]:
+        """Results with each of ``docs`` placed ahead of the first result scoring lower.
+
+        A document already among the results only moves up when its score in
+        ``docs`` is the higher one.
+        """
+        merged = list(results)
+        for doc in docs:
+            doc_id = str(doc.get("_id"))
+            existing = next((r for r in merged if str(r.get("_id")) == doc_id), None)
+            if existing is not None:
+                if existing.get("score", 0.0) >= doc["score"]:
+                    continue
+                merged.remove(existing)
+                doc = {**existing, **doc}
+            position = next(
+                (i for i, r in enumerate(merged) if r.get("score", 0.0) < doc["score"]),
+                len(merged),
+            )
+            merged.insert(position, doc)
+        return merged
 
     def _merge_results(self, vector_results: list[dict], keyword_results: list[dict]) -> list[dict]:
         """Merge and deduplicate results"""
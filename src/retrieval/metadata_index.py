@@ -0,0 +1,136 @@
+"""In-memory postings over chunk metadata, aligned with the resident vector index"""
+
+from collections import defaultdict
+
+import numpy as np
+
+# Metadata fields indexed alongside the vectors; filters on other keys go to the storage backend
+INDEXED_FIELDS = ("type", "category", "source", "tags", "severity", "command")
+
+# Supported operators: scalar/{"$eq": v} match one value, a plain list or
+# {"$in": [...]} matches any of the values, {"$all": [...]} requires all of them
+FILTER_OPERATORS = ("$eq", "$in", "$all")
+
+# Values matching at least this share of rows are stored as boolean masks,
+# rarer ones as int32 row-id arrays
+DENSE_FRACTION = 1 / 32
+
+
+def _values(value) -> list:
+    """Hashable values a metadata field contributes to the index"""
+    values = value if isinstance(value, list | tuple) else [value]
+    return [v for v in values if isinstance(v, str | int | float | bool)]
+
+
+class MetadataIndex:
+    """Per-field, per-value postings for the resident vector index.
+
+    Postings refer to rows of ``VectorIndex.matrix``. Common values (type,
+    category, source, most tags) are kept as boolean row masks so filters
+    combine with a few vectorized AND/OR operations; rare values (most
+    commands) are kept as row-id arrays and scattered into a mask on use.
+
+    List-valued fields such as ``tags`` get one posting per element, so a
+    document matches a value when any of its elements equals it (the same as
+    a Mongo equality match).
+    """
+
+    def __init__(self, num_rows: int, postings: dict[str, dict[object, np.ndarray]]):
+        self.num_rows = num_rows
+        self.postings = postings
+
+    @classmethod
+    def from_metadata(cls, metadatas: list[dict]) -> "MetadataIndex":
+        """Build postings from per-row metadata dicts"""
+        lists: dict[str, dict[object, list[int]]] = {
+            field: defaultdict(list) for field in INDEXED_FIELDS
+        }
+        for row, metadata in enumerate(metadatas):
+            for field in INDEXED_FIELDS:
+                value = metadata.get(field)
+                if value is None:
+                    continue
+                for v in set(_values(value)):
+                    lists[field][v].append(row)
+
+        num_rows = len(metadatas)
+        postings = {}
+        for field, values in lists.items():
+            postings[field] = {}
+            for value, rows in values.items():
+                rows = np.asarray(rows, dtype=np.int32)
+                if len(rows) >= num_rows * DENSE_FRACTION:
+                    mask = np.zeros(num_rows, dtype=bool)
+                    mask[rows] = True
+                    postings[field][value] = mask
+                else:
+                    postings[field][value] = rows
+        return cls(num_rows, postings)
+
+    def supports(self, filters: dict) -> bool:
+        """Whether every condition can be answered without querying the storage backend"""
+        for field, condition in filters.items():
+            if field not in self.postings:
+                return False
+            if isinstance(condition, dict):
+                if len(condition) != 1 or next(iter(condition)) not in FILTER_OPERATORS:
+                    return False
+                operator, condition = next(iter(condition.items()))
+            else:
+                operator = "$in" if isinstance(condition, list | tuple) else "$eq"
+            if isinstance(condition, list | tuple):
+                # Equality with a whole list, and lists of documents or nested
+                # lists, are left to the backend's match semantics
+                if operator == "$eq" or len(_values(condition)) != len(condition):
+                    return False
+            elif operator != "$eq" or not _values(condition):
+                return False
+        return True
+
+    def mask_for(self, filters: dict) -> np.ndarray:
+        """Boolean mask of rows matching all filter conditions"""
+        mask = np.ones(self.num_rows, dtype=bool)
+        for field, condition in filters.items():
+            mask &= self._term_mask(field, condition)
+        return mask
+
+    def _term_mask(self, field: str, condition) -> np.ndarray:
+        if isinstance(condition, dict):
+            operator, value = next(iter(condition.items()))
+        elif isinstance(condition, list | tuple):
+            operator, value = "$in", condition
+        else:
+            operator, value = "$eq", condition
+
+        if operator == "$all":
+            # Like Mongo, an empty $all matches nothing
+            mask = np.full(self.num_rows, bool(value), dtype=bool)
+            for v in _values(value):
+                mask &= self._value_mask(field, v)
+            return mask
+
+        mask = np.zeros(self.num_rows, dtype=bool)
+        for v in [value] if operator == "$eq" else _values(value):
+            posting = self.postings[field].get(v)
+            if posting is None:
+                continue
+            if posting.dtype == bool:
+                mask |= posting
+            else:
+                mask[posting] = True
+        return mask
+
+    def _value_mask(self, field: str, value) -> np.ndarray:
+        posting = self.postings[field].get(value)
+        if posting is not None and posting.dtype == bool:
+            return posting
+
+        mask = np.zeros(self.num_rows, dtype=bool)
+        if posting is not None:
+            mask[posting] = True
+        return mask
+
+    def memory_bytes(self) -> int:
+        return sum(
+            posting.nbytes for values in self.postings.values() for posting in values.values()
+        )
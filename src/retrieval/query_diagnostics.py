@@ -0,0 +1,140 @@
+"""Explain plans and slow-query logging for the MongoDB queries behind VectorStore"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+from utils.config import settings
+from utils.metrics import record_collection_scan, record_slow_query
+
+# Lists longer than this are abbreviated when a query is logged
+MAX_LOGGED_VALUES = 3
+
+
+def plan_stages(explain: dict) -> list[str]:
+    """Stages of the winning plan in an explain() result, outermost first.
+
+    Index scans carry the index name, e.g. ``["FETCH", "IXSCAN(metadata_tags)"]``.
+    Works for find and aggregate explains, classic and slot-based engines.
+    """
+    stages = []
+
+    def walk(node, in_plan: bool):
+        if isinstance(node, dict):
+            if in_plan and "stage" in node:
+                index = node.get("indexName")
+                stages.append(f"{node['stage']}({index})" if index else node["stage"])
+            for key, value in node.items():
+                if key != "rejectedPlans":
+                    walk(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain, False)
+    return stages
+
+
+def query_shape(value):
+    """The query with every value replaced by its type, so each shape is explained once"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [query_shape(item) for item in value[:1]]
+    return type(value).__name__
+
+
+def abbreviate(value):
+    """The query with long value lists cut short, for logging"""
+    if isinstance(value, dict):
+        return {key: abbreviate(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        items = [abbreviate(item) for item in value[:MAX_LOGGED_VALUES]]
+        if len(value) > MAX_LOGGED_VALUES:
+            items.append(f"... {len(value)} values")
+        return items
+    return value if isinstance(value, int | float | bool | None) else str(value)
+
+
+class QueryDiagnostics:
+    """Explains and times the queries issued against one collection.
+
+    With ``explain`` on, the first query of each shape is explained at
+    queryPlanner verbosity (the plan is chosen, nothing extra is executed)
+    and a plan that scans the whole collection is logged as a warning,
+    unless the caller reads every document anyway. Independently, any query
+    slower than ``slow_query_ms`` is logged with its winning plan.
+    """
+
+    def __init__(self, collection, explain: bool | None = None, slow_query_ms: float | None = None):
+        self.collection = collection
+        self.explain_enabled = settings.mongo_explain if explain is None else explain
+        self.slow_query_ms = settings.slow_query_ms if slow_query_ms is None else slow_query_ms
+        self._explained: set[str] = set()
+        self._lock = threading.Lock()
+
+    def find_command(
+        self, query: dict, projection: dict | None = None, sort: dict | None = None, limit: int = 0
+    ) -> dict:
+        command = {"find": self.collection.name, "filter": query}
+        if projection:
+            command["projection"] = projection
+        if sort:
+            command["sort"] = sort
+        if limit:
+            command["limit"] = limit
+        return command
+
+    def aggregate_command(self, pipeline: list[dict]) -> dict:
+        return {"aggregate": self.collection.name, "pipeline": pipeline, "cursor": {}}
+
+    def explain(self, command: dict) -> list[str] | None:
+        """Winning plan stages of a find or aggregate command, or None if it cannot be explained"""
+        try:
+            result = self.collection.database.command("explain", command, verbosity="queryPlanner")
+        except Exception as e:  # mongomock, or a user without the explain privilege
+            logger.debug(f"Could not explain {command}: {e}")
+            return None
+        return plan_stages(result)
+
+    def check(self, op: str, command: dict, full_scan: bool = False) -> list[str] | None:
+        """Explain the command and warn if it scans the whole collection unexpectedly"""
+        stages = self.explain(command)
+        if stages and "COLLSCAN" in stages and not full_scan:
+            record_collection_scan(self.collection.name, op)
+            logger.warning(
+                f"COLLSCAN: {op} on {self.collection.name} reads every document "
+                f"for {abbreviate(command)} (plan: {' > '.join(stages)})"
+            )
+        elif stages:
+            logger.debug(f"Plan of {op} on {self.collection.name}: {' > '.join(stages)}")
+        return stages
+
+    @contextmanager
+    def track(self, op: str, command: dict, full_scan: bool = False):
+        """Time the query run inside the block; explain it as configured"""
+        start = time.perf_counter()
+        yield
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        explained, stages = False, None
+        if self.explain_enabled:
+            shape = f"{op}:{json.dumps(query_shape(command), sort_keys=True)}"
+            with self._lock:
+                explained = shape not in self._explained
+                self._explained.add(shape)
+            if explained:
+                stages = self.check(op, command, full_scan)
+
+        if self.slow_query_ms and elapsed_ms > self.slow_query_ms:
+            record_slow_query(self.collection.name, op)
+            if not explained:
+                stages = self.explain(command)
+            logger.warning(
+                f"Slow query: {op} on {self.collection.name} took {elapsed_ms:.0f}ms "
+                f"for {abbreviate(command)} "
+                f"(plan: {' > '.join(stages) if stages else 'unavailable'})"
+            )
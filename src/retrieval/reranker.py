@@ -0,0 +1,78 @@
+"""Cross-encoder rerank stage over retrieved candidates"""
+
+import hashlib
+
+from loguru import logger
+
+from retrieval.vector_index import DocumentCache
+from utils.config import settings
+from utils.metrics import stage_timer
+
+
+def query_key(query: str) -> str:
+    """Hash of the whitespace- and case-normalized query"""
+    return hashlib.sha1(" ".join(query.lower().split()).encode("utf-8")).hexdigest()[:16]
+
+
+def doc_key(doc: dict) -> str:
+    """Document _id, or a content hash for documents without one"""
+    if doc.get("_id") is not None:
+        return str(doc["_id"])
+    return hashlib.sha1(doc.get("content", "").encode("utf-8")).hexdigest()[:16]
+
+
+class CrossEncoderReranker:
+    """Scores (query, document) pairs with a small cross-encoder on CPU.
+
+    All pairs a query still needs are scored in one batched ``predict``,
+    ordered by length so batches carry little padding, with inputs cut at
+    ``max_length`` tokens. Pair scores are kept in an LRU keyed by (query
+    hash, doc id), so a repeated query or a document seen again for the same
+    query costs nothing.
+    """
+
+    def __init__(
+        self,
+        model_name: str = settings.rerank_model,
+        batch_size: int = settings.rerank_batch_size,
+        cache_size: int = settings.rerank_cache_size,
+        max_length: int = settings.rerank_max_length,
+    ):
+        # Importing sentence_transformers pulls in torch; defer it until a model is needed
+        from sentence_transformers import CrossEncoder
+
+        logger.info(f"Loading rerank model: {model_name}")
+        self.model = CrossEncoder(model_name, device="cpu", max_length=max_length)
+        self.batch_size = batch_size
+        self._scores = DocumentCache(cache_size, name="rerank")
+
+    def score(self, query: str, docs: list[dict]) -> list[float]:
+        """Cross-encoder score of each document for the query"""
+        qkey = query_key(query)
+        keys = [(qkey, doc_key(doc)) for doc in docs]
+        scores, missing = self._scores.get_many(keys)
+
+        if missing:
+            contents = {key: doc.get("content", "") for key, doc in zip(keys, docs, strict=True)}
+            # Similar lengths share a batch, so little of each batch is padding
+            missing = sorted(dict.fromkeys(missing), key=lambda key: len(contents[key]))
+            with stage_timer("rerank_model"):
+                predicted = self.model.predict(
+                    [(query, contents[key]) for key in missing],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                )
+            fetched = {key: float(value) for key, value in zip(missing, predicted, strict=True)}
+            self._scores.put_many(fetched)
+            scores.update(fetched)
+
+        return [scores[key] for key in keys]
+
+    def rerank(self, query: str, docs: list[dict]) -> list[dict]:
+        """Documents ordered by cross-encoder score, each annotated with ``rerank_score``"""
+        if not docs:
+            return []
+        scores = self.score(query, docs)
+        reranked = [{**doc, "rerank_score": score} for doc, score in zip(docs, scores, strict=True)]
+        reranked.sort(key=lambda doc: doc["rerank_score"], reverse=True)
+        return reranked
@@ -0,0 +1,125 @@
+"""Blocked top-k similarity scoring over pre-normalized float32 matrices"""
+
+import numpy as np
+
+from retrieval.vector_index import normalize_rows
+from utils.config import settings
+
+# Filtered blocks selecting at most this share of rows gather those rows
+# before scoring; denser blocks are scored whole and the selected scores kept
+GATHER_MAX_FRACTION = 0.2
+
+
+def _top_k_unsorted(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest scores per row, in arbitrary order"""
+    if scores.shape[1] <= k:
+        return np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    return np.argpartition(scores, -k, axis=1)[:, -k:]
+
+
+def top_k_scores(
+    queries: np.ndarray,
+    matrix: np.ndarray,
+    k: int,
+    block_size: int | None = None,
+    min_score: float | None = None,
+    mask: np.ndarray | None = None,
+    max_sim: bool = False,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Find the k most similar rows of ``matrix`` for each query.
+
+    ``queries`` (Q x d) and ``matrix`` (N x d) must be L2-normalized, so the
+    dot product is the cosine similarity. Documents are scored in blocks of
+    ``block_size`` rows, which bounds the temporary score buffer to
+    Q x block_size, and each block's candidates are merged into a running
+    top-k with ``argpartition`` instead of sorting all N scores.
+
+    When a boolean ``mask`` over the rows of ``matrix`` is given only the
+    selected rows are ranked. Sparse blocks are gathered (never more than
+    ``block_size`` rows at a time); dense blocks are scored whole, which is
+    cheaper than copying most of their rows, and only the selected scores
+    are kept.
+
+    With ``max_sim`` the queries are windows of one long query: each row is
+    scored by its best similarity to any window, and a single result is
+    returned for all of them.
+
+    Returns one ``(row_indices, scores)`` pair per query, sorted by
+    descending score and truncated at ``min_score`` when given.
+    """
+    queries = np.atleast_2d(queries)
+    num_queries = 1 if max_sim else queries.shape[0]
+    num_docs = matrix.shape[0]
+    k = min(k, num_docs if mask is None else int(np.count_nonzero(mask)))
+    if k <= 0:
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        return [empty] * num_queries
+
+    block_size = block_size or settings.score_block_size
+    best_idx = np.empty((num_queries, 0), dtype=np.int64)
+    best_scores = np.empty((num_queries, 0), dtype=np.float32)
+
+    for start in range(0, num_docs, block_size):
+        block = matrix[start : start + block_size]
+        if mask is None:
+            block_rows = None
+            block_scores = queries @ block.T
+        else:
+            block_rows = np.flatnonzero(mask[start : start + block_size])
+            if not len(block_rows):
+                continue
+            if len(block_rows) <= len(block) * GATHER_MAX_FRACTION:
+                block_scores = queries @ block[block_rows].T
+            else:
+                block_scores = (queries @ block.T)[:, block_rows]
+        if max_sim:
+            block_scores = block_scores.max(axis=0, keepdims=True)
+
+        local = _top_k_unsorted(block_scores, k)
+        candidate_scores = np.concatenate(
+            [best_scores, np.take_along_axis(block_scores, local, axis=1)], axis=1
+        )
+        offsets = local if block_rows is None else block_rows[local]
+        candidate_idx = np.concatenate([best_idx, offsets + start], axis=1)
+
+        keep = _top_k_unsorted(candidate_scores, k)
+        best_scores = np.take_along_axis(candidate_scores, keep, axis=1)
+        best_idx = np.take_along_axis(candidate_idx, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_idx = np.take_along_axis(best_idx, order, axis=1)
+
+    results = []
+    for idx, scores in zip(best_idx, best_scores, strict=True):
+        if min_score is not None:
+            keep_count = int(np.searchsorted(-scores, -min_score, side="right"))
+            idx, scores = idx[:keep_count], scores[:keep_count]
+        results.append((idx, scores))
+    return results
+
+
+def reciprocal_rank_fusion(
+    ranked: list[tuple[np.ndarray, np.ndarray]], k: int, rrf_k: int = 60
+) -> tuple[np.ndarray, np.ndarray]:
+    """Fuse per-query rankings into one by summing 1 / (rrf_k + rank) per row"""
+    fused: dict[int, float] = {}
+    for rows, _ in ranked:
+        for rank, row in enumerate(rows.tolist(), 1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (rrf_k + rank)
+
+    best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+    return (
+        np.asarray([row for row, _ in best], dtype=np.int64),
+        np.asarray([score for _, score in best], dtype=np.float32),
+    )
+
+
+def prepare_queries(query_embeddings: list[list[float]] | np.ndarray) -> np.ndarray:
+    """Stack query embeddings into a normalized float32 Q x d matrix"""
+    return normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+
+
+def default_min_score() -> float | None:
+    """Minimum similarity applied to vector search, if the threshold is enabled"""
+    return settings.similarity_threshold if settings.apply_similarity_threshold else None
@@ -0,0 +1,189 @@
+"""Scatter-gather top-k scoring over row-range shards held by worker processes"""
+
+import atexit
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+from loguru import logger
+
+from retrieval.scoring import top_k_scores
+
+# A published matrix: (file path, byte offset, shape) of float32 rows in a file
+Source = tuple[str, int, tuple[int, int]]
+
+# Worker-side cache of mapped matrices, keyed by source
+_matrices: dict[Source, np.ndarray] = {}
+
+
+def _attach(source: Source) -> np.ndarray:
+    """Map a published matrix into this worker, dropping older generations"""
+    matrix = _matrices.get(source)
+    if matrix is None:
+        _matrices.clear()
+        path, offset, shape = source
+        matrix = _matrices[source] = np.memmap(
+            path, dtype=np.float32, mode="r", offset=offset, shape=shape
+        )
+    return matrix
+
+
+def _attached() -> list[Source]:
+    """Sources mapped in this worker"""
+    return list(_matrices)
+
+
+def mapped_source(matrix: np.ndarray) -> Source | None:
+    """Source of a float32 matrix that maps a whole file region, e.g. a SQLite vector file"""
+    if (
+        isinstance(matrix, np.memmap)
+        and isinstance(matrix.base, mmap.mmap)  # Not a view into another array
+        and matrix.filename is not None
+        and matrix.dtype == np.float32
+        and matrix.ndim == 2
+        and matrix.flags.c_contiguous
+    ):
+        return str(matrix.filename), int(matrix.offset), (matrix.shape[0], matrix.shape[1])
+    return None
+
+
+def _score_shard(
+    source: Source,
+    start: int,
+    stop: int,
+    queries: np.ndarray,
+    k: int,
+    min_score: float | None,
+    mask: np.ndarray | None,
+    max_sim: bool,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Top-k of one row range, with row indices relative to the full matrix"""
+    shard = _attach(source)[start:stop]
+    results = top_k_scores(queries, shard, k, min_score=min_score, mask=mask, max_sim=max_sim)
+    return [(idx + start, scores) for idx, scores in results]
+
+
+def merge_top_k(
+    shard_results: list[list[tuple[np.ndarray, np.ndarray]]], k: int
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Merge per-shard top-k lists into one descending top-k per query"""
+    merged = []
+    for per_query in zip(*shard_results, strict=True):
+        idx = np.concatenate([shard_idx for shard_idx, _ in per_query])
+        scores = np.concatenate([shard_scores for _, shard_scores in per_query])
+        order = np.argsort(-scores, kind="stable")[:k]
+        merged.append((idx[order], scores[order]))
+    return merged
+
+
+def _shared_memory_dir() -> str | None:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+class ShardedScorer:
+    """Worker processes that score row-range shards of a shared matrix.
+
+    ``publish`` makes the matrix readable by every worker without copying it
+    between processes and returns a read-only memory-mapped view of it, which
+    callers use in place of their private copy. A matrix that already maps a
+    file (the SQLite backend's vector file) is shared as is; any other is
+    written once to a file in shared memory (``/dev/shm`` where available).
+    Each shard has its own single-process pool, so shard ``i`` always runs in
+    worker ``i`` and ``publish`` maps the matrix into every worker before the
+    first query needs it. A query is scattered to every shard and the
+    per-shard top-k lists are merged in the caller.
+    """
+
+    def __init__(self, num_shards: int, directory: str | None = None):
+        self.num_shards = num_shards
+        self._dir = os.path.abspath(
+            tempfile.mkdtemp(prefix="adb-shards-", dir=directory or _shared_memory_dir())
+        )
+        context = get_context("spawn")
+        self._executors = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(num_shards)
+        ]
+        self._published: list[Source] = []
+        self._generation = 0
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def publish(self, matrix: np.ndarray) -> np.ndarray:
+        """Share ``matrix`` with the workers; returns the memory-mapped view to score against"""
+        source = mapped_source(matrix)
+        with self._lock:
+            if source is None:
+                self._generation += 1
+                path = os.path.join(self._dir, f"matrix-{self._generation}.f32")
+                matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+                matrix.tofile(path)
+                matrix = np.memmap(path, dtype=np.float32, mode="r", shape=matrix.shape)
+                source = mapped_source(matrix)
+
+            # Keep the previous generation for queries still in flight against it
+            self._published.append(source)
+            while len(self._published) > 2:
+                path = self._published.pop(0)[0]
+                if os.path.dirname(path) == self._dir:  # Files of the storage backend stay
+                    os.unlink(path)
+
+        # Start the workers and map the new matrix before the first query needs it
+        for future in [executor.submit(_attach, source) for executor in self._executors]:
+            future.result()
+
+        logger.info(f"Published {matrix.shape[0]} rows to {self.num_shards} search shards")
+        return matrix
+
+    def shard_bounds(self, num_rows: int) -> list[tuple[int, int]]:
+        """Contiguous row ranges, one per shard"""
+        edges = np.linspace(0, num_rows, self.num_shards + 1).astype(int)
+        return [
+            (int(start), int(stop))
+            for start, stop in zip(edges, edges[1:], strict=False)
+            if stop > start
+        ]
+
+    def top_k_scores(
+        self,
+        queries: np.ndarray,
+        matrix: np.ndarray,
+        k: int,
+        min_score: float | None = None,
+        mask: np.ndarray | None = None,
+        max_sim: bool = False,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Same contract as ``scoring.top_k_scores`` for a matrix returned by ``publish``"""
+        source = mapped_source(matrix)
+        if source is None or source not in self._published:
+            # Not a published matrix (e.g. an empty index); score in-process
+            return top_k_scores(queries, matrix, k, min_score=min_score, mask=mask, max_sim=max_sim)
+
+        queries = np.atleast_2d(queries)
+        futures = [
+            executor.submit(
+                _score_shard,
+                source,
+                start,
+                stop,
+                queries,
+                k,
+                min_score,
+                None if mask is None else mask[start:stop],
+                max_sim,
+            )
+            for executor, (start, stop) in zip(
+                self._executors, self.shard_bounds(matrix.shape[0]), strict=False
+            )
+        ]
+        return merge_top_k([future.result() for future in futures], k)
+
+    def close(self):
+        """Stop the workers and remove the published matrices"""
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self._dir, ignore_errors=True)
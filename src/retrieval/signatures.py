@@ -0,0 +1,174 @@
+"""Aho-Corasick matching of known error signatures in pasted logs and adb output"""
+
+from collections import deque
+from dataclasses import dataclass
+
+# Metadata fields holding exact signatures: error_indicator on error_pattern
+# chunks, symptoms (a list) on troubleshooting chunks
+SIGNATURE_FIELDS = ("error_indicator", "symptoms")
+
+# Below this many patterns one C-level substring search per pattern beats
+# stepping the automaton through the text in Python
+AUTOMATON_MIN_PATTERNS = 300
+
+# Shorter signatures ("File exists") are too generic to identify an entry and are not matched
+MIN_PATTERN_LENGTH = 12
+
+# Signatures of at least this length identify their entry outright; shorter
+# ones ("permission denied", "device offline") get proportionally less weight
+SPECIFIC_PATTERN_LENGTH = 32
+
+# Severity used for signatures whose entry does not declare one
+DEFAULT_SEVERITY = "medium"
+SEVERITY_ORDER = ("info", "low", "medium", "high", "critical")
+
+
+def specificity(pattern: str) -> float:
+    """Weight in (0, 1] of an exact match on ``pattern``; 1.0 for specific signatures"""
+    return min(1.0, len(pattern.strip()) / SPECIFIC_PATTERN_LENGTH)
+
+
+def severity_rank(severity: str | None) -> int:
+    """Position in SEVERITY_ORDER; unknown levels rank lowest"""
+    return SEVERITY_ORDER.index(severity) if severity in SEVERITY_ORDER else -1
+
+
+def highest_severity(severities) -> str | None:
+    """Most severe of the given levels"""
+    return max((s for s in severities if s), key=severity_rank, default=None)
+
+
+@dataclass(frozen=True)
+class Signature:
+    """One exact signature and the indexed chunk it identifies"""
+
+    pattern: str  # As written in the knowledge base
+    field: str
+    severity: str
+    doc_id: object
+
+
+@dataclass
+class SignatureMatch:
+    signature: Signature
+    count: int
+    first_offset: int
+
+
+class SignatureMatcher:
+    """Aho-Corasick automaton over all signatures of the resident index.
+
+    Patterns are matched case-insensitively as substrings, and any number of
+    patterns is found in a single pass over the text. Goto and failure links
+    are compiled into a full transition table per state, so scanning does one
+    dict lookup per character with no failure-link backtracking. Small pattern
+    sets (fewer than ``automaton_min_patterns``) are searched one pattern at a
+    time instead, which is faster until the pattern count grows.
+
+    Signatures shorter than ``min_pattern_length`` characters are dropped:
+    they occur in too many unrelated outputs to identify an entry.
+    """
+
+    def __init__(
+        self,
+        signatures: list[Signature],
+        automaton_min_patterns: int = AUTOMATON_MIN_PATTERNS,
+        min_pattern_length: int = MIN_PATTERN_LENGTH,
+    ):
+        self.signatures = [
+            s for s in signatures if len(s.pattern.strip()) >= max(min_pattern_length, 1)
+        ]
+        self.automaton_min_patterns = automaton_min_patterns
+        patterns = list(dict.fromkeys(s.pattern.lower() for s in self.signatures))
+        self._by_pattern: dict[str, list[Signature]] = {p: [] for p in patterns}
+        for signature in self.signatures:
+            self._by_pattern[signature.pattern.lower()].append(signature)
+
+        # Trie: goto[state] maps a character to the next state
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[list[str]] = [[]]
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(pattern)
+
+        # Breadth-first: fill in failure transitions and inherit outputs of the failure state
+        transitions: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0)
+                queue.append(child)
+
+        self._transitions = transitions
+        self._outputs = outputs
+
+    @classmethod
+    def from_metadata(cls, ids: list, metadatas: list[dict]) -> "SignatureMatcher":
+        """Collect signatures from chunk metadata aligned with ``ids``"""
+        signatures = []
+        for doc_id, metadata in zip(ids, metadatas, strict=True):
+            severity = metadata.get("severity") or DEFAULT_SEVERITY
+            for field in SIGNATURE_FIELDS:
+                values = metadata.get(field) or []
+                for value in [values] if isinstance(values, str) else values:
+                    if isinstance(value, str) and value.strip():
+                        signatures.append(Signature(value, field, severity, doc_id))
+        return cls(signatures)
+
+    def __len__(self) -> int:
+        return len(self._by_pattern)
+
+    def scan(self, text: str) -> list[SignatureMatch]:
+        """All signatures occurring in ``text``, in order of first occurrence"""
+        if not self._by_pattern:
+            return []
+
+        text = text.lower()
+        if len(self._by_pattern) >= self.automaton_min_patterns:
+            counts, first = self._scan_automaton(text)
+        else:
+            counts, first = self._scan_each(text)
+
+        return [
+            SignatureMatch(signature, counts[pattern], first[pattern])
+            for pattern in sorted(first, key=first.get)
+            for signature in self._by_pattern[pattern]
+        ]
+
+    def _scan_automaton(self, text: str) -> tuple[dict[str, int], dict[str, int]]:
+        transitions, outputs = self._transitions, self._outputs
+        counts: dict[str, int] = {}
+        first: dict[str, int] = {}
+        state = 0
+        for position, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for pattern in outputs[state]:
+                    counts[pattern] = counts.get(pattern, 0) + 1
+                    first.setdefault(pattern, position + 1 - len(pattern))
+        return counts, first
+
+    def _scan_each(self, text: str) -> tuple[dict[str, int], dict[str, int]]:
+        counts: dict[str, int] = {}
+        first: dict[str, int] = {}
+        for pattern in self._by_pattern:
+            offset = text.find(pattern)
+            if offset < 0:
+                continue
+            first[pattern] = offset
+            count = 0
+            while offset >= 0:  # Overlapping occurrences, as the automaton counts them
+                count += 1
+                offset = text.find(pattern, offset + 1)
+            counts[pattern] = count
+        return counts, first
@@ -0,0 +1,835 @@
+"""Storage backends behind VectorStore: MongoDB, or embedded SQLite for single-node use.
+
+Both backends store one collection of documents ({_id, content, metadata,
+embeddings, ...}) and offer the same operations: ``insert``, ``upsert``,
+``delete``, ``fetch``, ``find_ids`` (metadata filters), ``load_index`` (the
+resident vectors for local scoring), ``keyword_search``, ``count`` and
+``stats``. Similarity scoring itself happens in VectorStore against the
+loaded index, whichever backend holds the documents.
+
+Embeddings are kept per model version (``embeddings: {version: vector}``)
+so a collection can hold vectors of two models while it is re-embedded.
+``missing_embeddings``, ``set_embeddings``, ``count_embedded`` and
+``drop_embeddings`` serve the re-embedding job. On Mongo,
+``count_legacy_embeddings`` and ``adopt_legacy_embeddings`` move vectors
+stored before they were versioned under a version, once; SQLite stores
+were versioned from the start. ``get_state`` / ``set_state`` hold small
+named records beside the collection: which version is active, and the
+ingestion job's checkpoint.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+from bson import ObjectId
+from loguru import logger
+from pymongo import ASCENDING, TEXT, IndexModel, ReplaceOne, UpdateOne
+
+from retrieval.metadata_index import INDEXED_FIELDS
+from retrieval.query_diagnostics import QueryDiagnostics
+from retrieval.signatures import SIGNATURE_FIELDS
+from retrieval.vector_index import VectorIndex, normalize_rows
+
+# Metadata fields the resident index needs besides the vectors
+INDEX_FIELDS = INDEXED_FIELDS + SIGNATURE_FIELDS
+
+# Indexes of a Mongo documents collection, created by create_indexes when missing. Metadata
+# filters the resident postings cannot answer are sent to Mongo (find_ids) and use these;
+# (type, category) also serves the $group by type in stats from the index alone
+MONGO_INDEXES = (
+    IndexModel([("content", TEXT)], name="content_text"),
+    IndexModel(
+        [("metadata.type", ASCENDING), ("metadata.category", ASCENDING)],
+        name="metadata_type_category",
+    ),
+    IndexModel([("metadata.category", ASCENDING)], name="metadata_category"),
+    IndexModel([("metadata.tags", ASCENDING)], name="metadata_tags"),  # Multikey
+    IndexModel([("metadata.source", ASCENDING)], name="metadata_source"),
+    IndexModel([("metadata.parent_id", ASCENDING)], name="metadata_parent_id", sparse=True),
+)
+
+# Ids per IN (...) query, well below SQLite's bound parameter limit
+SQLITE_BATCH = 500
+
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_TERM_RE = re.compile(r"\w+")
+
+
+class MongoBackend:
+    """One MongoDB collection, with its state records in ``state`` (if given)"""
+
+    name = "mongo"
+
+    def __init__(self, collection, state=None):
+        self.collection = collection
+        self.state = state
+        self.diagnostics = QueryDiagnostics(collection)
+        # mongomock (the benchmarks' default store) cannot build current pymongo bulk operations
+        self._bulk = not type(collection).__module__.startswith("mongomock")
+
+    def _bulk_write(self, requests: list[ReplaceOne | UpdateOne]) -> int:
+        """Apply the writes unordered in one round trip; returns documents matched or upserted"""
+        if not requests:
+            return 0
+        if self._bulk:
+            result = self.collection.bulk_write(requests, ordered=False)
+            return result.matched_count + result.upserted_count
+
+        matched = 0
+        for request in requests:
+            write = (
+                self.collection.replace_one
+                if isinstance(request, ReplaceOne)
+                else self.collection.update_one
+            )
+            result = write(request._filter, request._doc, upsert=request._upsert)
+            matched += result.matched_count + (result.upserted_id is not None)
+        return matched
+
+    def insert(self, documents: list[dict]) -> int:
+        return len(self.collection.insert_many(documents).inserted_ids)
+
+    def upsert(self, documents: list[dict]) -> int:
+        """Insert or replace documents by _id, in one unordered bulk write"""
+        self._bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in documents])
+        return len(documents)
+
+    def delete(self, ids: list | None = None) -> int:
+        """Delete documents by _id, or all of them"""
+        query = {} if ids is None else {"_id": {"$in": ids}}
+        return self.collection.delete_many(query).deleted_count
+
+    def fetch(self, ids: list) -> dict:
+        """Content and metadata by _id"""
+        query, projection = {"_id": {"$in": ids}}, {"content": 1, "metadata": 1}
+        with self.diagnostics.track("fetch", self.diagnostics.find_command(query, projection)):
+            return {doc["_id"]: doc for doc in self.collection.find(query, projection)}
+
+    def find_ids(self, filters: dict) -> list:
+        """Ids of documents matching metadata filters; a plain list means any-of"""
+        query_filter = {}
+        for key, value in filters.items():
+            query_filter[f"metadata.{key}"] = {"$in": value} if isinstance(value, list) else value
+        command = self.diagnostics.find_command(query_filter, {"_id": 1})
+        with self.diagnostics.track("find_ids", command):
+            return [doc["_id"] for doc in self.collection.find(query_filter, {"_id": 1})]
+
+    def load_index(self, version: str) -> VectorIndex:
+        field = f"embeddings.{version}"
+        query = {field: {"$exists": True}}
+        projection = {field: 1, **{f"metadata.{name}": 1 for name in INDEX_FIELDS}}
+        command = self.diagnostics.find_command(query, projection)
+        with self.diagnostics.track("load_index", command, full_scan=True):
+            docs = list(self.collection.find(query, projection))
+        return VectorIndex.from_documents(
+            [
+                {
+                    "_id": doc["_id"],
+                    "embedding": doc["embeddings"][version],
+                    "metadata": doc.get("metadata"),
+                }
+                for doc in docs
+            ]
+        )
+
+    def missing_embeddings(self, version: str, limit: int, after=None) -> list[dict]:
+        """Up to ``limit`` documents without a ``version`` vector, in _id order after ``after``"""
+        query = {f"embeddings.{version}": {"$exists": False}}
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        command = self.diagnostics.find_command(query, {"content": 1}, {"_id": 1}, limit)
+        with self.diagnostics.track("missing_embeddings", command):
+            return list(self.collection.find(query, {"content": 1}).sort("_id", 1).limit(limit))
+
+    def set_embeddings(self, version: str, items: list[tuple]) -> int:
+        """Store (_id, content, vector) items; documents whose content changed are skipped"""
+        return self._bulk_write(
+            [
+                UpdateOne(
+                    {"_id": doc_id, "content": content},
+                    {"$set": {f"embeddings.{version}": vector}},
+                )
+                for doc_id, content, vector in items
+            ]
+        )
+
+    def count_embedded(self, version: str) -> int:
+        query = {f"embeddings.{version}": {"$exists": True}}
+        command = self.diagnostics.find_command(query, {"_id": 1})
+        with self.diagnostics.track("count_embedded", command, full_scan=True):
+            return self.collection.count_documents(query)
+
+    def drop_embeddings(self, version: str) -> int:
+        field = f"embeddings.{version}"
+        return self.collection.update_many(
+            {field: {"$exists": True}}, {"$unset": {field: ""}}
+        ).modified_count
+
+    def count_legacy_embeddings(self) -> int:
+        """Documents still holding an unversioned top-level ``embedding``"""
+        return self.collection.count_documents({"embedding": {"$exists": True}})
+
+    def adopt_legacy_embeddings(self, version: str, batch_size: int = 1000) -> int:
+        """Move each top-level ``embedding`` to ``embeddings.<version>``; returns vectors moved.
+
+        A document that already has a ``version`` vector keeps it and only
+        loses the legacy field. Batches are independent, so an interrupted
+        run is resumed by running it again.
+        """
+        field = f"embeddings.{version}"
+        query = {"embedding": {"$exists": True}}
+        adopted = 0
+        while batch := list(
+            self.collection.find(query, {"embedding": 1, field: 1}).limit(batch_size)
+        ):
+            requests = []
+            for doc in batch:
+                update = {"$unset": {"embedding": ""}}
+                if version not in (doc.get("embeddings") or {}):
+                    update["$set"] = {field: doc["embedding"]}
+                    adopted += 1
+                requests.append(UpdateOne({"_id": doc["_id"]}, update))
+            self._bulk_write(requests)
+        return adopted
+
+    def get_state(self, key: str = "embedding") -> dict | None:
+        if self.state is None:
+            return None
+        state = self.state.find_one({"_id": f"{self.collection.name}.{key}"})
+        if state is not None:
+            state.pop("_id")
+        return state
+
+    def set_state(self, state: dict | None, key: str = "embedding"):
+        """Replace (or with None, remove) the ``key`` state record in one write"""
+        state_id = f"{self.collection.name}.{key}"
+        if state is None:
+            self.state.delete_one({"_id": state_id})
+            return
+        self.state.replace_one({"_id": state_id}, {**state, "_id": state_id}, upsert=True)
+
+    def create_indexes(self) -> dict[str, str]:
+        """Bring the collection's indexes in line with MONGO_INDEXES.
+
+        Missing indexes are created and ones whose definition changed are
+        rebuilt; indexes already as declared, and any not declared here, are
+        left alone, so this is safe to run on every setup. Returns the action
+        taken per index.
+        """
+        logger.warning("⚠️ Vector search requires MongoDB Atlas")
+        logger.info("✓ Using fallback: Local cosine similarity search")
+
+        existing = self.collection.index_information()
+        actions = {}
+        for model in MONGO_INDEXES:
+            spec = model.document
+            name = spec["name"]
+            current = existing.get(name)
+            keys = list(spec["key"].items())
+            if current is not None:
+                # Text indexes report their keys as _fts/_ftsx; their name pins the fields
+                if TEXT in spec["key"].values() or (
+                    [tuple(key) for key in current["key"]] == keys
+                    and current.get("sparse", False) == spec.get("sparse", False)
+                ):
+                    actions[name] = "exists"
+                    continue
+                self.collection.drop_index(name)
+            try:
+                self.collection.create_indexes([model])
+                actions[name] = "rebuilt" if current is not None else "created"
+            except Exception as e:
+                actions[name] = "failed"
+                logger.warning(f"Could not create index {name}: {e}")
+
+        changed = {name: action for name, action in actions.items() if action != "exists"}
+        logger.info(
+            f"✓ Indexes on {self.collection.name}: {len(actions) - len(changed)} up to date"
+            + "".join(f", {name} {action}" for name, action in changed.items())
+        )
+        return actions
+
+    def query_plans(self, version: str) -> list[dict]:
+        """Explain the query shapes VectorStore issues, for checking the indexes serve them"""
+        diagnostics = self.diagnostics
+        queries = [
+            ("fetch", diagnostics.find_command({"_id": {"$in": ["id"]}}), False),
+            # One filter per declared index, on all of its fields
+            *(
+                (
+                    "find_ids",
+                    diagnostics.find_command(dict.fromkeys(model.document["key"], "v")),
+                    False,
+                )
+                for model in MONGO_INDEXES
+                if TEXT not in model.document["key"].values()
+            ),
+            ("stats", diagnostics.aggregate_command(self._stats_pipeline()), False),
+            ("keyword_search", diagnostics.find_command({"$text": {"$search": "adb"}}), False),
+            (
+                "missing_embeddings",
+                diagnostics.find_command(
+                    {f"embeddings.{version}": {"$exists": False}}, sort={"_id": 1}, limit=1
+                ),
+                False,
+            ),
+            (
+                "load_index",
+                diagnostics.find_command({f"embeddings.{version}": {"$exists": True}}),
+                True,
+            ),
+        ]
+        plans = []
+        for op, command, full_scan in queries:
+            stages = diagnostics.explain(command)
+            plans.append(
+                {
+                    "op": op,
+                    "query": command.get("filter", command.get("pipeline")),
+                    "plan": stages,
+                    "collscan": bool(stages) and "COLLSCAN" in stages,
+                    "full_scan_expected": full_scan,
+                }
+            )
+        return plans
+
+    def keyword_search(self, query: str, top_k: int) -> list[dict]:
+        projection = {"score": {"$meta": "textScore"}, "content": 1, "metadata": 1}
+        text_query = {"$text": {"$search": query}}
+        command = self.diagnostics.find_command(text_query, projection, limit=top_k)
+        try:
+            with self.diagnostics.track("keyword_search", command):
+                results = (
+                    self.collection.find(text_query, projection)
+                    .sort([("score", {"$meta": "textScore"})])
+                    .limit(top_k)
+                )
+                return list(results)
+        except Exception as e:
+            logger.warning(f"Keyword search failed: {e}")
+            # Fallback to regex search
+            regex_query = {"content": {"$regex": query, "$options": "i"}}
+            command = self.diagnostics.find_command(regex_query, limit=top_k)
+            with self.diagnostics.track("keyword_search_regex", command, full_scan=True):
+                results = self.collection.find(regex_query, {"content": 1, "metadata": 1}).limit(
+                    top_k
+                )
+                return list(results)
+
+    def count(self) -> int:
+        with self.diagnostics.track("count", self.diagnostics.find_command({}), full_scan=True):
+            return self.collection.count_documents({})
+
+    @staticmethod
+    def _stats_pipeline() -> list[dict]:
+        # Sorting on the group key first lets mongod walk metadata_type_category
+        # instead of reading every document (vectors included)
+        return [
+            {"$sort": {"metadata.type": 1}},
+            {"$group": {"_id": "$metadata.type", "count": {"$sum": 1}}},
+        ]
+
+    def stats(self) -> dict:
+        pipeline = self._stats_pipeline()
+        with self.diagnostics.track("stats", self.diagnostics.aggregate_command(pipeline)):
+            type_dist = list(self.collection.aggregate(pipeline))
+        return {
+            "total_documents": self.count(),
+            "type_distribution": {item["_id"]: item["count"] for item in type_dist},
+        }
+
+
+class SQLiteBackend:
+    """One table of an SQLite file, with its vectors in memory-mapped files beside it.
+
+    Content, metadata (as JSON) and any other fields live in the table; an
+    FTS5 index kept in sync by triggers serves keyword search. Embeddings of
+    each model version are L2-normalized and appended to
+    ``<path>.<table>.<version>.<generation>.f32``, a flat float32 matrix that
+    ``load_index`` maps read-only, so loading the index reads no vectors
+    through SQLite and processes on the node share one copy in the page
+    cache. The ``<table>_vectors`` table maps (version, id) to a row of the
+    current generation's file. Replaced and deleted documents leave their
+    rows in the file until it is compacted.
+
+    Vector files are written by one process at a time (the ingestion or
+    re-embedding job); any number may read. A file is only ever appended
+    to: compaction writes the live rows to the next generation's file and
+    switches the row mapping and the generation in one transaction. Readers
+    take the mapping and the generation from one read transaction, so they
+    map the file those rows belong to; the previous generation's file is
+    kept for readers that have not mapped it yet.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, table: str, keyword_index: bool = True):
+        if not _NAME_RE.match(table):
+            raise ValueError(f"Invalid SQLite table name: {table!r}")
+        self.path = path
+        self.table = table
+        self.keyword_index = keyword_index
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        t = self.table
+        with self._conn:
+            self._conn.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS {t} (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    content TEXT NOT NULL DEFAULT '',
+                    metadata TEXT NOT NULL DEFAULT '{{}}',
+                    extra TEXT
+                );
+                CREATE TABLE IF NOT EXISTS {t}_vectors (
+                    version TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    vector_row INTEGER NOT NULL,
+                    PRIMARY KEY (version, id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS {t}_vectors_id ON {t}_vectors (id);
+                CREATE TRIGGER IF NOT EXISTS {t}_vectors_delete AFTER DELETE ON {t} BEGIN
+                    DELETE FROM {t}_vectors WHERE id = old.id;
+                END;
+                CREATE TABLE IF NOT EXISTS storage_meta (key TEXT PRIMARY KEY, value);
+                """
+            )
+            if self.keyword_index:
+                self._conn.executescript(
+                    f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {t}_fts USING fts5(
+                        content, content='{t}', content_rowid='row',
+                        tokenize='porter unicode61'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS {t}_fts_insert AFTER INSERT ON {t} BEGIN
+                        INSERT INTO {t}_fts(rowid, content) VALUES (new.row, new.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS {t}_fts_delete AFTER DELETE ON {t} BEGIN
+                        INSERT INTO {t}_fts({t}_fts, rowid, content)
+                        VALUES ('delete', old.row, old.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS {t}_fts_update AFTER UPDATE OF content ON {t} BEGIN
+                        INSERT INTO {t}_fts({t}_fts, rowid, content)
+                        VALUES ('delete', old.row, old.content);
+                        INSERT INTO {t}_fts(rowid, content) VALUES (new.row, new.content);
+                    END;
+                    """
+                )
+
+    def _meta(self, key: str):
+        row = self._conn.execute("SELECT value FROM storage_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _generation(self, version: str) -> int:
+        return self._meta(f"{self.table}.{version}.generation") or 0
+
+    def _vectors_path(self, version: str, generation: int | None = None) -> str:
+        """Vector file of a generation of ``version`` (the current one by default)"""
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", version):
+            raise ValueError(f"Invalid embedding version: {version!r}")
+        if generation is None:
+            generation = self._generation(version)
+        return f"{self.path}.{self.table}.{version}.{generation}.f32"
+
+    def _dimension(self, version: str) -> int | None:
+        return self._meta(f"{self.table}.{version}.dimension")
+
+    def _vector_rows(self, version: str, dimension: int) -> int:
+        """Complete rows in the version's vector file"""
+        path = self._vectors_path(version)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // (dimension * 4)
+
+    def _append_vectors(self, version: str, embeddings: list) -> int:
+        """Append normalized embeddings to the version's vector file; returns the first new row"""
+        matrix = normalize_rows(embeddings)
+        dimension = self._dimension(version)
+        if dimension is None:
+            dimension = matrix.shape[1]
+            self._conn.execute(
+                "INSERT INTO storage_meta (key, value) VALUES (?, ?)",
+                (f"{self.table}.{version}.dimension", dimension),
+            )
+        elif matrix.shape[1] != dimension:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} != stored {dimension}")
+
+        first = self._vector_rows(version, dimension)
+        with open(self._vectors_path(version), "ab") as f:
+            # Drop a partial row left by an interrupted append
+            f.truncate(first * dimension * 4)
+            f.write(matrix.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        return first
+
+    def _write(self, documents: list[dict], replace: bool) -> set[str]:
+        """Insert (or replace) documents and their vectors; returns the versions written"""
+        rows, vectors = [], {}
+        for doc in documents:
+            if "_id" not in doc:
+                doc["_id"] = str(ObjectId())
+            doc_id = str(doc["_id"])
+            extra = {
+                key: value
+                for key, value in doc.items()
+                if key not in ("_id", "content", "metadata", "embeddings")
+            }
+            rows.append(
+                (
+                    doc_id,
+                    doc.get("content", ""),
+                    json.dumps(doc.get("metadata") or {}),
+                    json.dumps(extra, default=str) if extra else None,
+                )
+            )
+            for version, vector in (doc.get("embeddings") or {}).items():
+                vectors.setdefault(version, []).append((doc_id, vector))
+
+        sql = f"INSERT INTO {self.table} (id, content, metadata, extra) VALUES (?, ?, ?, ?)"
+        if replace:
+            sql += (
+                " ON CONFLICT(id) DO UPDATE SET content = excluded.content, "
+                "metadata = excluded.metadata, extra = excluded.extra"
+            )
+        self._conn.executemany(sql, rows)
+
+        if replace:
+            # A replaced document keeps only the vectors it was given
+            self._conn.executemany(
+                f"DELETE FROM {self.table}_vectors WHERE id = ?", [(row[0],) for row in rows]
+            )
+        for version, items in vectors.items():
+            first = self._append_vectors(version, [vector for _, vector in items])
+            self._conn.executemany(
+                f"INSERT INTO {self.table}_vectors (version, id, vector_row) VALUES (?, ?, ?)",
+                [(version, doc_id, first + i) for i, (doc_id, _) in enumerate(items)],
+            )
+        return set(vectors)
+
+    def insert(self, documents: list[dict]) -> int:
+        with self._lock, self._conn:
+            self._write(documents, replace=False)
+        return len(documents)
+
+    def upsert(self, documents: list[dict]) -> int:
+        """Insert or replace documents by _id"""
+        with self._lock, self._conn:
+            self._write(documents, replace=True)
+        self._compact_if_sparse()
+        return len(documents)
+
+    def delete(self, ids: list | None = None) -> int:
+        """Delete documents by _id, or all of them"""
+        with self._lock, self._conn:
+            if ids is None:
+                deleted = self._conn.execute(f"DELETE FROM {self.table}").rowcount
+            else:
+                deleted = 0
+                ids = [str(doc_id) for doc_id in ids]
+                for start in range(0, len(ids), SQLITE_BATCH):
+                    batch = ids[start : start + SQLITE_BATCH]
+                    deleted += self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE id IN ({','.join('?' * len(batch))})",
+                        batch,
+                    ).rowcount
+        self._compact_if_sparse()
+        return deleted
+
+    def _versions(self) -> list[str]:
+        """Versions with a vector file"""
+        prefix = f"{self.table}."
+        return [
+            key[len(prefix) : -len(".dimension")]
+            for (key,) in self._conn.execute(
+                "SELECT key FROM storage_meta WHERE key LIKE ?", (f"{prefix}%.dimension",)
+            )
+        ]
+
+    def _compact_if_sparse(self):
+        """Rewrite vector files once most of their rows belong to no document"""
+        sparse = []
+        with self._lock:
+            for version in self._versions():
+                total = self._vector_rows(version, self._dimension(version))
+                live = self._count_embedded(version)
+                if total and live * 2 < total:
+                    sparse.append(version)
+        for version in sparse:
+            self.compact(version)
+
+    def compact(self, version: str):
+        """Write the version's live rows, in row order, to the next generation's file.
+
+        The new file and its row mapping become current in one transaction;
+        the file before the current one is removed. Indexes still mapping an
+        older file keep reading it undisturbed.
+        """
+        with self._lock:
+            dimension = self._dimension(version)
+            if dimension is None:
+                return
+            generation = self._generation(version)
+            source_path = self._vectors_path(version, generation)
+            path = self._vectors_path(version, generation + 1)
+            rows = self._conn.execute(
+                f"SELECT id, vector_row FROM {self.table}_vectors "
+                "WHERE version = ? ORDER BY vector_row",
+                (version,),
+            ).fetchall()
+
+            with open(path, "wb") as f:
+                if rows:
+                    source = np.memmap(source_path, dtype=np.float32, mode="r")
+                    source = source.reshape(-1, dimension)
+                    for start in range(0, len(rows), SQLITE_BATCH):
+                        batch = [vector_row for _, vector_row in rows[start : start + SQLITE_BATCH]]
+                        f.write(np.ascontiguousarray(source[batch]).tobytes())
+                    del source
+                f.flush()
+                os.fsync(f.fileno())
+
+            with self._conn:
+                self._conn.executemany(
+                    f"UPDATE {self.table}_vectors SET vector_row = ? WHERE version = ? AND id = ?",
+                    [(new_row, version, doc_id) for new_row, (doc_id, _) in enumerate(rows)],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO storage_meta (key, value) VALUES (?, ?)",
+                    (f"{self.table}.{version}.generation", generation + 1),
+                )
+            # Readers may still be about to map the previous generation, not the one before
+            stale = self._vectors_path(version, generation - 1)
+            if os.path.exists(stale):
+                os.unlink(stale)
+        logger.info(f"Compacted {source_path} to {len(rows)} vectors in {path}")
+
+    def fetch(self, ids: list) -> dict:
+        """Content and metadata by _id"""
+        wanted = {str(doc_id): doc_id for doc_id in ids}
+        keys = list(wanted)
+        docs = {}
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_BATCH):
+                batch = keys[start : start + SQLITE_BATCH]
+                for doc_id, content, metadata in self._conn.execute(
+                    f"SELECT id, content, metadata FROM {self.table} "
+                    f"WHERE id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    docs[wanted[doc_id]] = {
+                        "_id": wanted[doc_id],
+                        "content": content,
+                        "metadata": json.loads(metadata),
+                    }
+        return docs
+
+    def find_ids(self, filters: dict) -> list:
+        """Ids of documents matching metadata filters.
+
+        Like a Mongo match, a condition on a list-valued field matches any
+        element. A value matches exactly, a list or ``{"$in": [...]}`` any of
+        its values and ``{"$all": [...]}`` all of them.
+        """
+        clauses, params = [], []
+        for key, condition in filters.items():
+            if not _NAME_RE.match(key):
+                raise ValueError(f"Unsupported metadata filter key: {key!r}")
+            if isinstance(condition, dict):
+                if len(condition) != 1:
+                    raise ValueError(f"Unsupported filter on {key}: {condition}")
+                operator, value = next(iter(condition.items()))
+            elif isinstance(condition, list | tuple):
+                operator, value = "$in", condition
+            else:
+                operator, value = "$eq", condition
+
+            if operator not in ("$eq", "$in", "$all"):
+                raise ValueError(f"Unsupported filter operator on {key}: {operator}")
+            values = [value] if operator == "$eq" else list(value)
+            groups = [[v] for v in values] if operator == "$all" else [values]
+            if not values:
+                # An empty $in or $all matches nothing, as in Mongo
+                clauses.append("0")
+            for group in groups:
+                clauses.append(
+                    f"EXISTS (SELECT 1 FROM json_each(metadata, '$.{key}') "
+                    f"WHERE value IN ({','.join('?' * len(group))}))"
+                )
+                params.extend(group)
+
+        where = " AND ".join(clauses) or "1"
+        with self._lock:
+            return [
+                doc_id
+                for (doc_id,) in self._conn.execute(
+                    f"SELECT id FROM {self.table} WHERE {where}", params
+                )
+            ]
+
+    def load_index(self, version: str) -> VectorIndex:
+        for attempt in range(3):
+            try:
+                return self._load_index(version)
+            except FileNotFoundError:
+                # Compacted twice since the rows were read: read them again
+                if attempt == 2:
+                    raise
+        raise AssertionError("unreachable")
+
+    def _load_index(self, version: str) -> VectorIndex:
+        t = self.table
+        with self._lock:
+            # One read transaction: the rows and the file they index are read together
+            self._conn.execute("BEGIN")
+            try:
+                dimension = self._dimension(version)
+                path = self._vectors_path(version)
+                rows = self._conn.execute(
+                    f"SELECT v.id, v.vector_row, d.metadata FROM {t}_vectors v "
+                    f"JOIN {t} d ON d.id = v.id WHERE v.version = ? ORDER BY v.vector_row",
+                    (version,),
+                ).fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+        if not rows or dimension is None:
+            return VectorIndex.from_matrix([], np.empty((0, 0), dtype=np.float32), [])
+
+        ids = [doc_id for doc_id, _, _ in rows]
+        vector_rows = np.fromiter((vector_row for _, vector_row, _ in rows), dtype=np.int64)
+        metadatas = []
+        for _, _, metadata in rows:
+            metadata = json.loads(metadata)
+            metadatas.append({key: metadata[key] for key in INDEX_FIELDS if key in metadata})
+
+        matrix = np.memmap(
+            path,
+            dtype=np.float32,
+            mode="r",
+            shape=(int(vector_rows[-1]) + 1, dimension),
+        )
+        if len(vector_rows) != len(matrix):
+            # Rows of replaced or deleted documents in between; gather the live ones
+            matrix = np.ascontiguousarray(matrix[vector_rows])
+        return VectorIndex.from_matrix(ids, matrix, metadatas)
+
+    def missing_embeddings(self, version: str, limit: int, after=None) -> list[dict]:
+        """Up to ``limit`` documents without a ``version`` vector, in _id order after ``after``"""
+        t = self.table
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, content FROM {t} WHERE id > ? AND NOT EXISTS "
+                f"(SELECT 1 FROM {t}_vectors v WHERE v.version = ? AND v.id = {t}.id) "
+                "ORDER BY id LIMIT ?",
+                ("" if after is None else str(after), version, limit),
+            ).fetchall()
+        return [{"_id": doc_id, "content": content} for doc_id, content in rows]
+
+    def set_embeddings(self, version: str, items: list[tuple]) -> int:
+        """Store (_id, content, vector) items; documents whose content changed are skipped"""
+        if not items:
+            return 0
+        with self._lock, self._conn:
+            first = self._append_vectors(version, [vector for _, _, vector in items])
+            cursor = self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table}_vectors (version, id, vector_row) "
+                f"SELECT ?, id, ? FROM {self.table} WHERE id = ? AND content = ?",
+                [
+                    (version, first + i, str(doc_id), content)
+                    for i, (doc_id, content, _) in enumerate(items)
+                ],
+            )
+        return cursor.rowcount
+
+    def _count_embedded(self, version: str) -> int:
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM {self.table}_vectors WHERE version = ?", (version,)
+        ).fetchone()[0]
+
+    def count_embedded(self, version: str) -> int:
+        with self._lock:
+            return self._count_embedded(version)
+
+    def drop_embeddings(self, version: str) -> int:
+        with self._lock, self._conn:
+            generation = self._generation(version)
+            dropped = self._conn.execute(
+                f"DELETE FROM {self.table}_vectors WHERE version = ?", (version,)
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM storage_meta WHERE key IN (?, ?)",
+                (f"{self.table}.{version}.dimension", f"{self.table}.{version}.generation"),
+            )
+            # Indexes still mapping the files keep their pages until they are dropped
+            for previous in (generation - 1, generation):
+                path = self._vectors_path(version, previous)
+                if os.path.exists(path):
+                    os.unlink(path)
+        return dropped
+
+    def get_state(self, key: str = "embedding") -> dict | None:
+        with self._lock:
+            state = self._meta(f"{self.table}.{key}_state")
+        return json.loads(state) if state else None
+
+    def set_state(self, state: dict | None, key: str = "embedding"):
+        """Replace (or with None, remove) the ``key`` state record in one write"""
+        key = f"{self.table}.{key}_state"
+        with self._lock, self._conn:
+            if state is None:
+                self._conn.execute("DELETE FROM storage_meta WHERE key = ?", (key,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO storage_meta (key, value) VALUES (?, ?)",
+                    (key, json.dumps(state)),
+                )
+
+    def create_indexes(self):
+        """Nothing to do: the keyword index is maintained by triggers"""
+        logger.info(f"✓ Using embedded SQLite storage: {self.path}")
+
+    def keyword_search(self, query: str, top_k: int) -> list[dict]:
+        """BM25-ranked FTS5 matches of any query term (stemmed)"""
+        terms = list(dict.fromkeys(_TERM_RE.findall(query.lower())))
+        if not terms or not self.keyword_index:
+            return []
+
+        t = self.table
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {t}.id, {t}.content, {t}.metadata, -bm25({t}_fts) "
+                f"FROM {t}_fts JOIN {t} ON {t}.row = {t}_fts.rowid "
+                f"WHERE {t}_fts MATCH ? ORDER BY bm25({t}_fts) LIMIT ?",
+                (" OR ".join(f'"{term}"' for term in terms), top_k),
+            ).fetchall()
+        return [
+            {"_id": doc_id, "content": content, "metadata": json.loads(metadata), "score": score}
+            for doc_id, content, metadata, score in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            type_dist = self._conn.execute(
+                f"SELECT json_extract(metadata, '$.type'), COUNT(*) FROM {self.table} GROUP BY 1"
+            ).fetchall()
+        return {
+            "total_documents": sum(count for _, count in type_dist),
+            "type_distribution": dict(type_dist),
+        }
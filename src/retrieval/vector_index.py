@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+
+from retrieval.metadata_index import MetadataIndex
+from retrieval.signatures import SignatureMatcher
+from utils.metrics import record_cache_lookup
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so cosine similarity becomes a dot product"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+@dataclass
+class VectorIndex:
+    """Resident id -> vector index used for the local scoring phase.
+
+    Only ids, embeddings, the filterable metadata postings and the error
+    signature automaton are held in memory; content and metadata for the
+    top-ranked rows are fetched from the storage backend afterwards.
+    """
+
+    ids: list
+    matrix: np.ndarray  # (N, d) float32, L2-normalized rows aligned with ids
+    metadata: MetadataIndex
+    signatures: SignatureMatcher
+    model: str | None = None  # Embedding model the vectors come from
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_documents(cls, docs: list[dict]) -> "VectorIndex":
+        """Build an index from stored documents, skipping those without embeddings"""
+        ids, vectors, metadatas = [], [], []
+        for doc in docs:
+            embedding = doc.get("embedding")
+            if not embedding:
+                continue
+            ids.append(doc["_id"])
+            vectors.append(embedding)
+            metadatas.append(doc.get("metadata") or {})
+
+        matrix = normalize_rows(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+        return cls.from_matrix(ids, matrix, metadatas)
+
+    @classmethod
+    def from_matrix(cls, ids: list, matrix: np.ndarray, metadatas: list[dict]) -> "VectorIndex":
+        """Build an index around an already normalized matrix (e.g. a memory-mapped file)"""
+        return cls(
+            ids=ids,
+            matrix=matrix,
+            metadata=MetadataIndex.from_metadata(metadatas),
+            signatures=SignatureMatcher.from_metadata(ids, metadatas),
+        )
+
+    @cached_property
+    def row_of(self) -> dict:
+        """Row number of each document id"""
+        return {doc_id: row for row, doc_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+    def memory_bytes(self) -> int:
+        return self.matrix.nbytes + self.metadata.memory_bytes()
+
+
+class DocumentCache:
+    """Thread-safe LRU of fetched documents keyed by _id"""
+
+    def __init__(self, capacity: int, name: str = "documents"):
+        self.capacity = capacity
+        self.name = name  # Cache label in metrics
+        self._docs: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, ids: list) -> tuple[dict, list]:
+        """Return (cached docs by id, ids that still need fetching)"""
+        found, missing = {}, []
+        with self._lock:
+            for doc_id in ids:
+                doc = self._docs.get(doc_id)
+                if doc is None:
+                    missing.append(doc_id)
+                else:
+                    self._docs.move_to_end(doc_id)
+                    found[doc_id] = doc
+
+        record_cache_lookup(self.name, hit=True, count=len(found))
+        record_cache_lookup(self.name, hit=False, count=len(missing))
+        return found, missing
+
+    def put_many(self, docs: dict):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            for doc_id, doc in docs.items():
+                self._docs[doc_id] = doc
+                self._docs.move_to_end(doc_id)
+            while len(self._docs) > self.capacity:
+                self._docs.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
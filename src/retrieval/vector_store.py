@@ -1,140 +1,457 @@
+import threading
+
 import numpy as np
 from loguru import logger
 from pymongo import MongoClient
-from sklearn.metrics.pairwise import cosine_similarity
 
+from retrieval.embeddings import embedding_version
+from retrieval.scoring import (
+    default_min_score,
+    prepare_queries,
+    reciprocal_rank_fusion,
+    top_k_scores,
+)
+from retrieval.sharding import ShardedScorer
+from retrieval.signatures import severity_rank, specificity
+from retrieval.storage import MongoBackend, SQLiteBackend
+from retrieval.vector_index import DocumentCache, VectorIndex
 from utils.config import settings
+from utils.metrics import stage_timer
+
+# Each window contributes this many candidates per requested result to rank fusion
+RRF_CANDIDATES_PER_RESULT = 4
 
 
 class VectorStore:
-    """MongoDB vector store operations with fallback to local similarity search"""
+    """Document store with local similarity search over a resident vector index.
+
+    Documents live in a storage backend: MongoDB, or an embedded SQLite file
+    with ``STORAGE_BACKEND=sqlite``. For SQLite, ``database`` is the file
+    path (default ``SQLITE_PATH``); for Mongo it is the database name.
 
-    def __init__(self):
-        self.client = MongoClient(settings.mongodb_uri)
-        self.db = self.client[settings.mongodb_database]
-        self.collection = self.db[settings.documents_collection]
+    Vectors are stored per embedding model. The backend's state record names
+    the active model, whose vectors the resident index is built from, and
+    the target of a re-embedding job while one is running; switching the
+    active model is a single write, picked up by each process at its next
+    index load.
+    """
+
+    def __init__(
+        self,
+        client: MongoClient | None = None,
+        database: str | None = None,
+        backend: str | None = None,
+    ):
+        backend = backend or ("mongo" if client is not None else settings.storage_backend)
+        if backend == "sqlite":
+            path = database or settings.sqlite_path
+            self.documents = SQLiteBackend(path, settings.documents_collection)
+            # Sections that child chunks expand to
+            self.parents = SQLiteBackend(path, settings.parents_collection, keyword_index=False)
+            logger.info(f"Opened SQLite storage: {path}")
+        else:
+            db = (client or MongoClient(settings.mongodb_uri))[
+                database or settings.mongodb_database
+            ]
+            self.documents = MongoBackend(
+                db[settings.documents_collection], state=db[settings.embeddings_collection]
+            )
+            # Sections that child chunks expand to
+            self.parents = MongoBackend(db[settings.parents_collection])
+            logger.info(f"Connected to MongoDB: {db.name}")
         self.use_atlas_search = False  # Flag to track if Atlas is available
-        logger.info(f"Connected to MongoDB: {settings.mongodb_database}")
+        self._index: VectorIndex | None = None
+        self._index_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+        self._doc_cache = DocumentCache(settings.document_cache_size)
+        self._parent_cache = DocumentCache(settings.document_cache_size, name="parents")
+        self._scorer = ShardedScorer(settings.search_shards) if settings.search_shards > 1 else None
+
+    def embedding_state(self) -> dict:
+        """Active embedding model and the re-embedding in progress, if any"""
+        return self.documents.get_state() or {"active": settings.embedding_model}
+
+    def set_embedding_state(self, state: dict | None):
+        self.documents.set_state(state)
+
+    def ingestion_checkpoint(self) -> dict | None:
+        """Progress of the last ingestion job, if any"""
+        return self.documents.get_state("ingestion")
+
+    def set_ingestion_checkpoint(self, checkpoint: dict | None):
+        self.documents.set_state(checkpoint, "ingestion")
+
+    def active_model(self) -> str:
+        return self.embedding_state()["active"]
+
+    def build_index(self, model: str) -> VectorIndex:
+        """Index over the vectors of ``model``, without making it resident"""
+        index = self.documents.load_index(embedding_version(model))
+        index.model = model
+        return index
+
+    def load_index(self) -> VectorIndex:
+        """Load the active model's embeddings into a resident, pre-normalized matrix"""
+        with self._index_lock:
+            return self._load_index()
+
+    def _load_index(self) -> VectorIndex:
+        # Caller holds _index_lock
+        with stage_timer("index_load"):
+            index = self.build_index(self.active_model())
+        if self._scorer and len(index):
+            index.matrix = self._scorer.publish(index.matrix)
+        self._index = index
+
+        logger.info(
+            f"Loaded vector index: {len(index)} documents ({index.model}), "
+            f"{index.memory_bytes() / 1024 / 1024:.1f} MB"
+        )
+        return index
+
+    def get_index(self) -> VectorIndex:
+        """Resident index, loaded when missing.
+
+        Once it is older than INDEX_REFRESH_SECONDS it keeps being served
+        while a single background thread loads its replacement.
+        """
+        index = self._index
+        if index is None:
+            with self._index_lock:
+                # Another caller may have loaded it while this one waited
+                index = self._index if self._index is not None else self._load_index()
+        elif index.age() > settings.index_refresh_seconds:
+            self._refresh_in_background()
+        return index
+
+    def _refresh_in_background(self):
+        with self._refresh_lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_index, name="index-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _refresh_index(self):
+        try:
+            with self._index_lock:
+                index = self._index
+                if index is None or index.age() > settings.index_refresh_seconds:
+                    self._load_index()
+        except Exception as e:
+            logger.error(f"Index refresh failed, still serving the previous index: {e}")
+
+    def invalidate_index(self):
+        """Drop the resident index and document cache so the next search reloads them"""
+        # Waits for a load in flight, which may predate the write being invalidated
+        with self._index_lock:
+            self._index = None
+        self._doc_cache.clear()
+        self._parent_cache.clear()
 
     def create_vector_index(self):
         """Create vector search index (only works with Atlas)"""
         logger.info("Attempting to create vector search index...")
-        logger.warning("⚠️ Vector search requires MongoDB Atlas")
-        logger.info("✓ Using fallback: Local cosine similarity search")
+        self.documents.create_indexes()
 
-        # Create regular text index for keyword search
-        try:
-            self.collection.create_index([("content", "text")])
-            logger.info("✓ Created text index for keyword search")
-        except Exception as e:
-            logger.debug(f"Text index note: {e}")
+    def _versioned(self, documents: list[dict], model: str | None) -> list[dict]:
+        """Documents with their ``embedding`` stored under the version of ``model``"""
+        model = model or settings.embedding_model
+        state = self.documents.get_state()
+        if state is None:
+            # The first model to write vectors becomes the active one
+            state = {"active": model}
+            self.set_embedding_state(state)
+        elif model not in (state["active"], state.get("target")):
+            logger.warning(
+                f"Storing {model} vectors, but {state['active']} is active; "
+                "these documents stay out of the index until they are re-embedded"
+            )
 
-    def insert_documents(self, documents: list[dict]) -> dict:
-        """Insert documents into collection"""
+        version = embedding_version(model)
+        versioned = []
+        for doc in documents:
+            if "embedding" in doc:
+                embedding = doc["embedding"]
+                doc = {key: value for key, value in doc.items() if key != "embedding"}
+                doc["embeddings"] = {version: embedding}
+            versioned.append(doc)
+        return versioned
+
+    def insert_documents(self, documents: list[dict], model: str | None = None) -> dict:
+        """Insert documents into collection; ``embedding`` vectors are from ``model``"""
         if not documents:
             return {"inserted_count": 0}
 
-        result = self.collection.insert_many(documents)
-        logger.info(f"Inserted {len(result.inserted_ids)} documents")
+        inserted = self.documents.insert(self._versioned(documents, model))
+        self.invalidate_index()
+        logger.info(f"Inserted {inserted} documents")
+
+        return {"inserted_count": inserted}
+
+    def upsert_documents(self, documents: list[dict], model: str | None = None) -> int:
+        """Insert or replace documents by _id; ``embedding`` vectors are from ``model``"""
+        if not documents:
+            return 0
+
+        upserted = self.documents.upsert(self._versioned(documents, model))
+        self.invalidate_index()
+        logger.info(f"Upserted {upserted} documents")
+        return upserted
+
+    def delete_documents(self, ids: list) -> int:
+        """Delete documents by _id"""
+        deleted = self.documents.delete(ids)
+        self.invalidate_index()
+        logger.info(f"Deleted {deleted} documents")
+        return deleted
+
+    def insert_parents(self, parents: list[dict]) -> int:
+        """Store parent sections by their deterministic _id, replacing earlier versions"""
+        if not parents:
+            return 0
+
+        self.parents.upsert(parents)
+        self._parent_cache.clear()
+        logger.info(f"Stored {len(parents)} parent sections")
+        return len(parents)
+
+    def delete_parents(self, ids: list) -> int:
+        """Delete parent sections by _id"""
+        deleted = self.parents.delete(ids)
+        self._parent_cache.clear()
+        logger.info(f"Deleted {deleted} parent sections")
+        return deleted
+
+    def fetch_parents(self, ids: list) -> dict:
+        """Fetch parent sections by _id, serving hot sections from the LRU cache"""
+        parents, missing = self._parent_cache.get_many(ids)
+
+        if missing:
+            with stage_timer(f"{self.parents.name}_fetch_parents"):
+                fetched = self.parents.fetch(missing)
+            self._parent_cache.put_many(fetched)
+            parents.update(fetched)
 
-        return {"inserted_count": len(result.inserted_ids)}
+        return parents
 
     def vector_search(
         self,
         query_embedding: list[float],
         top_k: int = settings.top_k_results,
         filters: dict | None = None,
+        min_score: float | None = None,
+        index: VectorIndex | None = None,
     ) -> list[dict]:
-        """Perform vector similarity search using local computation"""
+        """Perform vector similarity search using local computation.
 
-        logger.info(f"Performing local vector similarity search (top_k={top_k})")
+        ``index`` pins the search to an index obtained earlier (e.g. the one
+        whose model embedded the query); by default the resident index is used.
+        """
+        return self.vector_search_many([query_embedding], top_k, filters, min_score, index)[0]
 
-        # Build query filter
-        query_filter = {}
-        if filters:
-            for key, value in filters.items():
-                query_filter[f"metadata.{key}"] = value
+    def vector_search_many(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int = settings.top_k_results,
+        filters: dict | None = None,
+        min_score: float | None = None,
+        index: VectorIndex | None = None,
+    ) -> list[list[dict]]:
+        """Score several query embeddings in one pass; returns one result list per query"""
+        return self._search(query_embeddings, top_k, filters, min_score, index=index)
+
+    def vector_search_windows(
+        self,
+        window_embeddings: list[list[float]],
+        top_k: int = settings.top_k_results,
+        filters: dict | None = None,
+        min_score: float | None = None,
+        aggregation: str = "max",
+        index: VectorIndex | None = None,
+    ) -> list[dict]:
+        """Search with the windows of one long query, aggregated into a single result list.
+
+        ``aggregation`` is "max" (each document scores its best similarity to
+        any window) or "rrf" (reciprocal rank fusion of the per-window
+        rankings; scores are then fused ranks, not similarities).
+        """
+        return self._search(window_embeddings, top_k, filters, min_score, aggregation, index)[0]
 
-        # Retrieve all documents (with filter if provided)
-        all_docs = list(
-            self.collection.find(query_filter, {"content": 1, "metadata": 1, "embedding": 1})
+    def _search(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int,
+        filters: dict | None,
+        min_score: float | None,
+        aggregation: str | None = None,
+        index: VectorIndex | None = None,
+    ) -> list[list[dict]]:
+        logger.info(
+            f"Performing local vector similarity search "
+            f"(queries={len(query_embeddings)}, top_k={top_k}"
+            f"{f', aggregation={aggregation}' if aggregation else ''})"
         )
 
-        if not all_docs:
-            logger.warning("No documents found in collection")
-            return []
+        num_results = 1 if aggregation else len(query_embeddings)
+        index = self.get_index() if index is None else index
+        if not len(index):
+            logger.warning("No documents with embeddings found")
+            return [[] for _ in range(num_results)]
 
-        logger.info(f"Computing similarity for {len(all_docs)} documents")
+        mask = None
+        if filters:
+            if index.metadata.supports(filters):
+                with stage_timer("metadata_filter"):
+                    mask = index.metadata.mask_for(filters)
+            else:
+                mask = self._filtered_mask(index, filters)
+            if not mask.any():
+                logger.warning("No documents match the filters")
+                return [[] for _ in range(num_results)]
 
-        # Extract embeddings
-        doc_embeddings = []
-        valid_docs = []
+        if min_score is None:
+            min_score = default_min_score()
 
-        for doc in all_docs:
-            if "embedding" in doc and doc["embedding"]:
-                doc_embeddings.append(doc["embedding"])
-                valid_docs.append(doc)
+        # Phase one: score locally against the resident vectors
+        ranked = self._rank(query_embeddings, index, mask, top_k, min_score, aggregation)
 
-        if not doc_embeddings:
-            logger.warning("No documents with embeddings found")
-            return []
+        # Phase two: fetch content and metadata for the winners only
+        wanted = list(dict.fromkeys(index.ids[row] for hits in ranked for row, _ in hits))
+        docs = self.fetch_documents(wanted)
+
+        all_results = []
+        for hits in ranked:
+            results = []
+            for row, score in hits:
+                doc = docs.get(index.ids[row])
+                if doc is None:  # Deleted since the index was loaded
+                    continue
+                doc = dict(doc)
+                doc["score"] = score
+                results.append(doc)
+            all_results.append(results)
+
+        logger.info(f"Found {sum(len(r) for r in all_results)} similar documents")
+        return all_results
+
+    def _filtered_mask(self, index: VectorIndex, filters: dict) -> np.ndarray:
+        """Row mask for filters on fields the metadata index does not cover"""
+        with stage_timer(f"{self.documents.name}_filter"):
+            matching_ids = self.documents.find_ids(filters)
 
-        # Convert to numpy arrays
-        query_vec = np.array(query_embedding).reshape(1, -1)
-        doc_vecs = np.array(doc_embeddings)
+        row_of = index.row_of
+        mask = np.zeros(len(index), dtype=bool)
+        mask[[row_of[doc_id] for doc_id in matching_ids if doc_id in row_of]] = True
+        return mask
 
-        # Compute cosine similarity
-        similarities = cosine_similarity(query_vec, doc_vecs)[0]
+    def _rank(
+        self,
+        query_embeddings: list[list[float]],
+        index: VectorIndex,
+        mask: np.ndarray | None,
+        top_k: int,
+        min_score: float | None,
+        aggregation: str | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        """Score the queries against the index (optionally masked) and keep the top-k.
+
+        With an ``aggregation`` the queries are windows of one query and a
+        single ranking is returned; either way all queries are scored in one
+        blocked matrix product.
+        """
+
+        logger.info(f"Computing similarity for {len(index)} documents")
+
+        score = self._scorer.top_k_scores if self._scorer else top_k_scores
+        with stage_timer("similarity_topk"):
+            ranked = score(
+                prepare_queries(query_embeddings),
+                index.matrix,
+                top_k * RRF_CANDIDATES_PER_RESULT if aggregation == "rrf" else top_k,
+                min_score=min_score,
+                mask=mask,
+                max_sim=aggregation == "max",
+            )
+            if aggregation == "rrf":
+                ranked = [reciprocal_rank_fusion(ranked, top_k)]
 
-        # Get top-k indices
-        top_k_indices = np.argsort(similarities)[::-1][:top_k]
+        return [
+            [(int(row), float(score)) for row, score in zip(hit_rows, scores, strict=True)]
+            for hit_rows, scores in ranked
+        ]
+
+    def match_signatures(self, text: str) -> list[dict]:
+        """Documents whose exact error signatures occur in ``text``.
+
+        Each document's ``score`` is the specificity of its best matched
+        signature: 1.0 for signatures long enough to identify the entry, less
+        for short, generic ones. Ordered by score, then most severe first.
+        """
+        index = self.get_index()
+        with stage_timer("signature_scan"):
+            matches = index.signatures.scan(text)
+        if not matches:
+            return []
+
+        matched: dict[object, list] = {}
+        for match in matches:
+            matched.setdefault(match.signature.doc_id, []).append(match)
+        docs = self.fetch_documents(list(matched))
 
-        # Build results with scores
         results = []
-        for idx in top_k_indices:
-            doc = valid_docs[idx]
-            doc["score"] = float(similarities[idx])
+        for doc_id, doc_matches in matched.items():
+            doc = docs.get(doc_id)
+            if doc is None:  # Deleted since the index was loaded
+                continue
+            doc = dict(doc)
+            doc["score"] = max(specificity(m.signature.pattern) for m in doc_matches)
+            doc["matched_signatures"] = [m.signature.pattern for m in doc_matches]
+            doc["severity"] = doc_matches[0].signature.severity
             results.append(doc)
 
-        logger.info(f"Found {len(results)} similar documents")
+        # Stable sort keeps order of first occurrence within a score and severity
+        results.sort(key=lambda doc: (doc["score"], severity_rank(doc["severity"])), reverse=True)
+        logger.info(f"Matched {len(matches)} error signatures in {len(results)} documents")
         return results
 
-    def keyword_search(self, query: str, top_k: int = 5) -> list[dict]:
-        """Perform text search"""
-        try:
-            results = (
-                self.collection.find(
-                    {"$text": {"$search": query}},
-                    {"score": {"$meta": "textScore"}, "content": 1, "metadata": 1},
-                )
-                .sort([("score", {"$meta": "textScore"})])
-                .limit(top_k)
-            )
+    def fetch_documents(self, ids: list) -> dict:
+        """Fetch content and metadata by _id, serving hot documents from the LRU cache"""
+        docs, missing = self._doc_cache.get_many(ids)
 
-            return list(results)
-        except Exception as e:
-            logger.warning(f"Keyword search failed: {e}")
-            # Fallback to regex search
-            results = self.collection.find(
-                {"content": {"$regex": query, "$options": "i"}}, {"content": 1, "metadata": 1}
-            ).limit(top_k)
+        if missing:
+            with stage_timer(f"{self.documents.name}_fetch"):
+                fetched = self.documents.fetch(missing)
+            self._doc_cache.put_many(fetched)
+            docs.update(fetched)
 
-            return list(results)
+        return docs
+
+    def keyword_search(self, query: str, top_k: int = 5) -> list[dict]:
+        """Perform text search"""
+        return self.documents.keyword_search(query, top_k)
 
     def clear_collection(self):
         """Clear all documents"""
-        result = self.collection.delete_many({})
-        logger.info(f"Deleted {result.deleted_count} documents")
+        deleted = self.documents.delete()
+        self.parents.delete()
+        self.set_embedding_state(None)  # The next model to store vectors becomes active
+        self.set_ingestion_checkpoint(None)
+        self.invalidate_index()
+        logger.info(f"Deleted {deleted} documents")
 
     def get_stats(self) -> dict:
         """Get collection statistics"""
-        count = self.collection.count_documents({})
-
-        # Get type distribution
-        pipeline = [{"$group": {"_id": "$metadata.type", "count": {"$sum": 1}}}]
-        type_dist = list(self.collection.aggregate(pipeline))
-
-        return {
-            "total_documents": count,
-            "type_distribution": {item["_id"]: item["count"] for item in type_dist},
+        state = self.embedding_state()
+        stats = {
+            **self.documents.stats(),
+            "parent_sections": self.parents.count(),
+            "embedding_model": state["active"],
         }
+        if state.get("target"):
+            stats["reembedding"] = {
+                key: state[key] for key in ("target", "embedded", "total") if key in state
+            }
+        return stats
@@ -1,5 +1,12 @@
-from utils.config import settings
+from utils.config import check_settings, settings
 from utils.llm_factory import create_generator_llm, create_llm, create_router_llm
 from utils.logger import setup_logger
 
-__all__ = ["settings", "setup_logger", "create_llm", "create_router_llm", "create_generator_llm"]
+__all__ = [
+    "settings",
+    "check_settings",
+    "setup_logger",
+    "create_llm",
+    "create_router_llm",
+    "create_generator_llm",
+]
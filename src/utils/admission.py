@@ -0,0 +1,140 @@
+"""Admission control: concurrency limits with bounded, deadline-aware wait queues"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from utils.config import settings
+from utils.metrics import record_admission_state, record_admission_wait, record_rejection
+
+
+class OverloadedError(Exception):
+    """Raised when a request cannot be admitted before its deadline"""
+
+    def __init__(self, pool: str, reason: str, retry_after: int):
+        super().__init__(f"{pool} is overloaded ({reason})")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Cap concurrent executions of one pool, queueing excess callers in FIFO order.
+
+    A caller is admitted immediately while fewer than ``limit`` executions are
+    running; otherwise it waits in a queue of at most ``queue_size`` callers
+    (``None`` for unbounded) until a slot frees up or its deadline passes.
+    Callers that find the queue full are rejected at once. ``limit <= 0``
+    disables the controller.
+    """
+
+    def __init__(self, pool: str, limit: int, queue_size: int | None, timeout: float):
+        self.pool = pool
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._active = 0
+        self._waiters: deque[object] = deque()
+        self._cond = threading.Condition()
+        self._hold_seconds = 1.0  # Moving average of execution time, for Retry-After
+        self._publish()
+
+    def configure(self, limit: int | None = None, queue_size: int | None = None) -> dict:
+        """Change limits at runtime; waiting callers are re-evaluated immediately"""
+        with self._cond:
+            if limit is not None:
+                self.limit = limit
+            if queue_size is not None:
+                self.queue_size = queue_size
+            self._cond.notify_all()
+            self._publish()
+        return self.status()
+
+    def status(self) -> dict:
+        return {
+            "pool": self.pool,
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "timeout_seconds": self.timeout,
+            "active": self._active,
+            "queued": len(self._waiters),
+        }
+
+    def retry_after(self) -> int:
+        """Seconds until a rejected caller is likely to be admitted"""
+        if self.limit <= 0:
+            return 1
+        backlog = (len(self._waiters) + 1) / self.limit
+        return max(1, min(60, math.ceil(self._hold_seconds * backlog)))
+
+    @contextmanager
+    def admit(self, timeout: float | None = None):
+        """Hold one execution slot for the duration of the block"""
+        if self.limit <= 0:
+            yield
+            return
+
+        started = time.monotonic()
+        self._acquire(started + (self.timeout if timeout is None else timeout))
+        record_admission_wait(self.pool, time.monotonic() - started)
+
+        admitted = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - admitted
+            with self._cond:
+                self._active -= 1
+                self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+                self._cond.notify_all()
+                self._publish()
+
+    def _acquire(self, deadline: float):
+        with self._cond:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                self._publish()
+                return
+
+            if self.queue_size is not None and len(self._waiters) >= self.queue_size:
+                self._reject("queue_full")
+
+            ticket = object()
+            self._waiters.append(ticket)
+            self._publish()
+            try:
+                while not (self._waiters[0] is ticket and self._active < self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject("timeout")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()  # The next waiter may now be at the head
+
+            self._active += 1
+            self._publish()
+
+    def _reject(self, reason: str):
+        record_rejection(self.pool, reason)
+        raise OverloadedError(self.pool, reason, self.retry_after())
+
+    def _publish(self):
+        record_admission_state(self.pool, self.limit, self._active, len(self._waiters))
+
+
+graph_admission = AdmissionController(
+    "graph",
+    settings.graph_concurrency,
+    settings.graph_queue_size,
+    settings.admission_timeout_seconds,
+)
+router_admission = AdmissionController(
+    "router_llm", settings.router_llm_concurrency, None, settings.admission_timeout_seconds
+)
+generator_admission = AdmissionController(
+    "generator_llm", settings.generator_llm_concurrency, None, settings.admission_timeout_seconds
+)
+controllers = {c.pool: c for c in (graph_admission, router_admission, generator_admission)}
@@ -1,5 +1,4 @@
 import os
-import sys
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
@@ -19,12 +18,17 @@ class Settings:
     # API Keys
     openrouter_api_key: str = os.getenv("OPENROUTER_API_KEY", "")
 
+    # Storage backend: "mongo", or "sqlite" for an embedded single-node store at SQLITE_PATH
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "mongo").lower()
+    sqlite_path: str = os.getenv("SQLITE_PATH", "data/adb_knowledge.db")
+
     # MongoDB Configuration
     mongodb_uri: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     mongodb_database: str = os.getenv("MONGODB_DATABASE", "adb_knowledge_db")
 
     # Collection Names
     documents_collection: str = os.getenv("DOCUMENTS_COLLECTION", "documents")
+    parents_collection: str = os.getenv("PARENTS_COLLECTION", "parent_sections")
     embeddings_collection: str = os.getenv("EMBEDDINGS_COLLECTION", "embeddings")
     conversations_collection: str = os.getenv("CONVERSATIONS_COLLECTION", "conversations")
 
@@ -35,36 +39,148 @@ class Settings:
     # Retrieval Settings
     top_k_results: int = int(os.getenv("TOP_K_RESULTS", "5"))
     similarity_threshold: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+    apply_similarity_threshold: bool = (
+        os.getenv("APPLY_SIMILARITY_THRESHOLD", "false").lower() == "true"
+    )
+    score_block_size: int = int(os.getenv("SCORE_BLOCK_SIZE", "65536"))
     enable_hybrid_search: bool = os.getenv("ENABLE_HYBRID_SEARCH", "true").lower() == "true"
+    # Queries longer than LONG_QUERY_WINDOW_WORDS words (0 = never) are embedded as
+    # overlapping windows and searched together, aggregated with "max" or "rrf"
+    long_query_window_words: int = int(os.getenv("LONG_QUERY_WINDOW_WORDS", "128"))
+    long_query_window_overlap: int = int(os.getenv("LONG_QUERY_WINDOW_OVERLAP", "32"))
+    long_query_max_windows: int = int(os.getenv("LONG_QUERY_MAX_WINDOWS", "32"))
+    long_query_aggregation: str = os.getenv("LONG_QUERY_AGGREGATION", "max").lower()
+    # Put documents whose exact error signatures occur in the query ahead of similarity results
+    enable_signature_matching: bool = (
+        os.getenv("ENABLE_SIGNATURE_MATCHING", "true").lower() == "true"
+    )
 
     # Agent Settings
     max_agent_iterations: int = int(os.getenv("MAX_AGENT_ITERATIONS", "5"))
     enable_code_generation: bool = os.getenv("ENABLE_CODE_GENERATION", "true").lower() == "true"
+    # Answer exact command lookups and known code patterns without the agent graph
+    enable_fast_path: bool = os.getenv("ENABLE_FAST_PATH", "true").lower() == "true"
+    command_db_path: str = os.getenv("COMMAND_DB_PATH", "data/raw/command_db/adb_commands.json")
+    code_patterns_path: str = os.getenv(
+        "CODE_PATTERNS_PATH", "data/raw/personal_docs/personal_docs.json"
+    )
+    fast_path_min_confidence: float = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.85"))
+
+    # LLM Provider: "openrouter" or "fake" (local deterministic model for load testing)
+    llm_provider: str = os.getenv("LLM_PROVIDER", "openrouter").lower()
+    fake_llm_latency: str = os.getenv("FAKE_LLM_LATENCY", "lognormal:800,0.4")
+    fake_llm_router_latency: str = os.getenv("FAKE_LLM_ROUTER_LATENCY", "lognormal:250,0.3")
+    fake_llm_error_rate: float = float(os.getenv("FAKE_LLM_ERROR_RATE", "0.0"))
+    fake_llm_responses_file: str = os.getenv("FAKE_LLM_RESPONSES_FILE", "")
+    fake_llm_seed: int = int(os.getenv("FAKE_LLM_SEED", "42"))
+
+    # Shared embedding server ("unix:/path.sock" or "host:port"); empty loads the model in-process
+    embedding_server_address: str = os.getenv("EMBEDDING_SERVER_ADDRESS", "")
+    embedding_batch_wait_ms: float = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+    embedding_max_batch_size: int = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
 
     # Model Settings - OpenRouter models
     llm_model: str = os.getenv("LLM_MODEL", "anthropic/claude-3.5-sonnet")
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    # Documents encoded per batch when re-embedding the collection into a new model
+    reembed_batch_size: int = int(os.getenv("REEMBED_BATCH_SIZE", "256"))
     temperature: float = float(os.getenv("TEMPERATURE", "0.1"))
     max_tokens: int = int(os.getenv("MAX_TOKENS", "4000"))
 
     # Chunking Settings
     chunk_size: int = int(os.getenv("CHUNK_SIZE", "1000"))
     chunk_overlap: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+    # Small-to-big: long entries are embedded as small child chunks and
+    # expanded at retrieval to their parent sections, within a context budget.
+    # Off by default: it lowered recall@5 on the labeled queries (0.742 -> 0.621)
+    enable_hierarchical_chunks: bool = (
+        os.getenv("ENABLE_HIERARCHICAL_CHUNKS", "false").lower() == "true"
+    )
+    parent_chunk_size: int = int(os.getenv("PARENT_CHUNK_SIZE", "1500"))
+    child_chunk_size: int = int(os.getenv("CHILD_CHUNK_SIZE", "300"))
+    parent_context_budget_chars: int = int(os.getenv("PARENT_CONTEXT_BUDGET_CHARS", "6000"))
+    # Collapse near-duplicate chunks at ingestion (MinHash/LSH over word shingles)
+    enable_dedup: bool = os.getenv("ENABLE_DEDUP", "true").lower() == "true"
+    dedup_threshold: float = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+    dedup_num_perm: int = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    dedup_shingle_words: int = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+    # Ingestion embeds and stores chunks in checkpointed batches; failed batches are
+    # retried with exponential backoff before the job stops (a rerun resumes it)
+    ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+    ingest_max_retries: int = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+    ingest_retry_backoff_seconds: float = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "2"))
 
     # Vector Search Settings
     vector_index_name: str = os.getenv("VECTOR_INDEX_NAME", "vector_index")
     vector_dimensions: int = int(os.getenv("VECTOR_DIMENSIONS", "384"))
+    index_refresh_seconds: float = float(os.getenv("INDEX_REFRESH_SECONDS", "300"))
+    document_cache_size: int = int(os.getenv("DOCUMENT_CACHE_SIZE", "1024"))
+    # Worker processes scoring row-range shards of the index; 0 or 1 scores in-process
+    search_shards: int = int(os.getenv("SEARCH_SHARDS", "0"))
+    # Cross-encoder rerank: score the top RERANK_CANDIDATES and keep the best RERANK_TOP_N
+    enable_rerank: bool = os.getenv("ENABLE_RERANK", "false").lower() == "true"
+    rerank_model: str = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_candidates: int = int(os.getenv("RERANK_CANDIDATES", "20"))
+    rerank_top_n: int = int(os.getenv("RERANK_TOP_N", "3"))
+    rerank_batch_size: int = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+    rerank_max_length: int = int(os.getenv("RERANK_MAX_LENGTH", "256"))
+    rerank_cache_size: int = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+
+    # Startup Settings
+    warmup_in_background: bool = os.getenv("WARMUP_IN_BACKGROUND", "true").lower() == "true"
+
+    # Concurrency Settings
+    # Share one execution between concurrent identical /query requests and LLM prompts
+    coalesce_requests: bool = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+    # Admission control: concurrent executions per pool (0 = unlimited), bounded wait queue
+    graph_concurrency: int = int(os.getenv("GRAPH_CONCURRENCY", "8"))
+    graph_queue_size: int = int(os.getenv("GRAPH_QUEUE_SIZE", "32"))
+    router_llm_concurrency: int = int(os.getenv("ROUTER_LLM_CONCURRENCY", "16"))
+    generator_llm_concurrency: int = int(os.getenv("GENERATOR_LLM_CONCURRENCY", "8"))
+    admission_timeout_seconds: float = float(os.getenv("ADMISSION_TIMEOUT_SECONDS", "10"))
+
+    # Latency budget per /query (0 = unbounded) and the degradations used to meet it
+    query_budget_seconds: float = float(os.getenv("QUERY_BUDGET_SECONDS", "30"))
+    router_min_budget_seconds: float = float(os.getenv("ROUTER_MIN_BUDGET_SECONDS", "10"))
+    specialist_min_budget_seconds: float = float(os.getenv("SPECIALIST_MIN_BUDGET_SECONDS", "5"))
+    synthesis_min_budget_seconds: float = float(os.getenv("SYNTHESIS_MIN_BUDGET_SECONDS", "5"))
+    hedge_delay_seconds: float = float(os.getenv("HEDGE_DELAY_SECONDS", "8"))
+    hedge_model: str = os.getenv("HEDGE_MODEL", "anthropic/claude-3-haiku")
+
+    # Observability Settings
+    enable_metrics: bool = os.getenv("ENABLE_METRICS", "true").lower() == "true"
+    enable_profiling: bool = os.getenv("ENABLE_PROFILING", "true").lower() == "true"
+    profile_sample_rate: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0.0"))
+    profile_slow_threshold_ms: float = float(os.getenv("PROFILE_SLOW_THRESHOLD_MS", "5000"))
+    profile_interval_ms: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    profile_dir: str = os.getenv("PROFILE_DIR", "logs/profiles")
+    # MongoDB query diagnostics: explain() each query shape once and warn on COLLSCANs;
+    # queries slower than SLOW_QUERY_MS are logged with their plan (0 disables)
+    mongo_explain: bool = os.getenv("MONGO_EXPLAIN", "false").lower() == "true"
+    slow_query_ms: float = float(os.getenv("SLOW_QUERY_MS", "250"))
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")
 
     def validate(self):
         """Validate critical settings"""
         errors = []
 
-        # Check OpenRouter API key
-        if not self.openrouter_api_key:
+        # Check LLM provider and OpenRouter API key
+        if self.llm_provider not in ("openrouter", "fake"):
+            errors.append(f"LLM_PROVIDER must be 'openrouter' or 'fake': {self.llm_provider}")
+
+        if self.llm_provider == "openrouter" and not self.openrouter_api_key:
             errors.append("OPENROUTER_API_KEY is not set")
 
+        if not (0.0 <= self.fake_llm_error_rate <= 1.0):
+            errors.append(
+                f"FAKE_LLM_ERROR_RATE must be between 0 and 1: {self.fake_llm_error_rate}"
+            )
+
+        if self.storage_backend not in ("mongo", "sqlite"):
+            errors.append(f"STORAGE_BACKEND must be mongo or sqlite: {self.storage_backend}")
+
         # Check MongoDB URI
-        if not self.mongodb_uri:
+        if self.storage_backend == "mongo" and not self.mongodb_uri:
             errors.append("MONGODB_URI is not set")
 
         # Validate port range
@@ -75,6 +191,57 @@ class Settings:
         if self.top_k_results <= 0:
             errors.append(f"TOP_K_RESULTS must be positive: {self.top_k_results}")
 
+        if self.score_block_size <= 0:
+            errors.append(f"SCORE_BLOCK_SIZE must be positive: {self.score_block_size}")
+
+        if self.search_shards < 0:
+            errors.append(f"SEARCH_SHARDS cannot be negative: {self.search_shards}")
+
+        if self.embedding_batch_wait_ms < 0:
+            errors.append(
+                f"EMBEDDING_BATCH_WAIT_MS cannot be negative: {self.embedding_batch_wait_ms}"
+            )
+
+        if self.embedding_max_batch_size <= 0:
+            errors.append(
+                f"EMBEDDING_MAX_BATCH_SIZE must be positive: {self.embedding_max_batch_size}"
+            )
+
+        if self.reembed_batch_size <= 0:
+            errors.append(f"REEMBED_BATCH_SIZE must be positive: {self.reembed_batch_size}")
+
+        if self.graph_queue_size < 0:
+            errors.append(f"GRAPH_QUEUE_SIZE cannot be negative: {self.graph_queue_size}")
+
+        if self.admission_timeout_seconds <= 0:
+            errors.append(
+                f"ADMISSION_TIMEOUT_SECONDS must be positive: {self.admission_timeout_seconds}"
+            )
+
+        if self.long_query_aggregation not in ("max", "rrf"):
+            errors.append(
+                f"LONG_QUERY_AGGREGATION must be 'max' or 'rrf': {self.long_query_aggregation}"
+            )
+
+        if self.long_query_window_words > 0 and not (
+            0 <= self.long_query_window_overlap < self.long_query_window_words
+        ):
+            errors.append(
+                f"LONG_QUERY_WINDOW_OVERLAP must be between 0 and LONG_QUERY_WINDOW_WORDS - 1: "
+                f"{self.long_query_window_overlap}"
+            )
+
+        if self.long_query_max_windows < 1:
+            errors.append(f"LONG_QUERY_MAX_WINDOWS must be positive: {self.long_query_max_windows}")
+
+        if not (0.0 <= self.fast_path_min_confidence <= 1.0):
+            errors.append(
+                f"FAST_PATH_MIN_CONFIDENCE must be between 0 and 1: {self.fast_path_min_confidence}"
+            )
+
+        if self.query_budget_seconds < 0:
+            errors.append(f"QUERY_BUDGET_SECONDS cannot be negative: {self.query_budget_seconds}")
+
         if self.chunk_size <= 0:
             errors.append(f"CHUNK_SIZE must be positive: {self.chunk_size}")
 
@@ -86,6 +253,61 @@ class Settings:
                 f"CHUNK_OVERLAP ({self.chunk_overlap}) must be less than CHUNK_SIZE ({self.chunk_size})"
             )
 
+        if self.child_chunk_size <= 0 or self.parent_chunk_size < self.child_chunk_size:
+            errors.append(
+                f"Need 0 < CHILD_CHUNK_SIZE ({self.child_chunk_size}) "
+                f"<= PARENT_CHUNK_SIZE ({self.parent_chunk_size})"
+            )
+
+        if self.parent_context_budget_chars <= 0:
+            errors.append(
+                f"PARENT_CONTEXT_BUDGET_CHARS must be positive: {self.parent_context_budget_chars}"
+            )
+
+        if self.enable_rerank and not (0 < self.rerank_top_n <= self.rerank_candidates):
+            errors.append(
+                f"Need 0 < RERANK_TOP_N ({self.rerank_top_n}) "
+                f"<= RERANK_CANDIDATES ({self.rerank_candidates})"
+            )
+
+        if self.rerank_batch_size <= 0:
+            errors.append(f"RERANK_BATCH_SIZE must be positive: {self.rerank_batch_size}")
+
+        if self.rerank_max_length <= 0:
+            errors.append(f"RERANK_MAX_LENGTH must be positive: {self.rerank_max_length}")
+
+        if not (0.0 < self.dedup_threshold <= 1.0):
+            errors.append(f"DEDUP_THRESHOLD must be in (0, 1]: {self.dedup_threshold}")
+
+        if self.dedup_num_perm <= 0:
+            errors.append(f"DEDUP_NUM_PERM must be positive: {self.dedup_num_perm}")
+
+        if self.dedup_shingle_words <= 0:
+            errors.append(f"DEDUP_SHINGLE_WORDS must be positive: {self.dedup_shingle_words}")
+
+        if self.ingest_batch_size <= 0:
+            errors.append(f"INGEST_BATCH_SIZE must be positive: {self.ingest_batch_size}")
+
+        if self.ingest_max_retries < 0:
+            errors.append(f"INGEST_MAX_RETRIES cannot be negative: {self.ingest_max_retries}")
+
+        if self.ingest_retry_backoff_seconds < 0:
+            errors.append(
+                "INGEST_RETRY_BACKOFF_SECONDS cannot be negative: "
+                f"{self.ingest_retry_backoff_seconds}"
+            )
+
+        if not (0.0 <= self.profile_sample_rate <= 1.0):
+            errors.append(
+                f"PROFILE_SAMPLE_RATE must be between 0 and 1: {self.profile_sample_rate}"
+            )
+
+        if self.slow_query_ms < 0:
+            errors.append(f"SLOW_QUERY_MS cannot be negative: {self.slow_query_ms}")
+
+        if self.profile_interval_ms <= 0:
+            errors.append(f"PROFILE_INTERVAL_MS must be positive: {self.profile_interval_ms}")
+
         # Validate vector dimensions
         if self.vector_dimensions not in [384, 768, 1536]:
             errors.append(
@@ -103,23 +325,81 @@ class Settings:
         print(f"Environment: {self.env}")
         print(f"Debug Mode: {self.debug_mode}")
         print(f"Host: {self.host}:{self.port}")
-        print("\nMongoDB:")
-        print(f"  URI: {self.mongodb_uri}")
-        print(f"  Database: {self.mongodb_database}")
+        print("\nStorage:")
+        print(f"  Backend: {self.storage_backend}")
+        if self.storage_backend == "sqlite":
+            print(f"  Path: {self.sqlite_path}")
+        else:
+            print(f"  URI: {self.mongodb_uri}")
+            print(f"  Database: {self.mongodb_database}")
         print("\nLLM:")
+        print(f"  Provider: {self.llm_provider}")
         print(f"  Model: {self.llm_model}")
         print(f"  Temperature: {self.temperature}")
         print(f"  Max Tokens: {self.max_tokens}")
         print("\nEmbeddings:")
         print(f"  Model: {self.embedding_model}")
+        print(f"  Server: {self.embedding_server_address or 'in-process'}")
         print(f"  Dimensions: {self.vector_dimensions}")
+        print(f"  Re-embed Batch Size: {self.reembed_batch_size}")
         print("\nRetrieval:")
         print(f"  Top K: {self.top_k_results}")
         print(f"  Hybrid Search: {self.enable_hybrid_search}")
-        print(f"  Similarity Threshold: {self.similarity_threshold}")
+        print(f"  Signature Matching: {self.enable_signature_matching}")
+        print(
+            f"  Rerank: {self.enable_rerank} ({self.rerank_model}, "
+            f"top {self.rerank_top_n} of {self.rerank_candidates})"
+        )
+        print(
+            f"  Long Queries: windows of {self.long_query_window_words or 'off'} words, "
+            f"{self.long_query_aggregation} aggregation"
+        )
+        print(
+            f"  Similarity Threshold: {self.similarity_threshold} "
+            f"({'applied' if self.apply_similarity_threshold else 'not applied'})"
+        )
+        print(
+            f"  Fast Path: {self.enable_fast_path} "
+            f"(min confidence {self.fast_path_min_confidence}, "
+            f"{self.command_db_path}, {self.code_patterns_path})"
+        )
         print("\nChunking:")
         print(f"  Chunk Size: {self.chunk_size}")
         print(f"  Chunk Overlap: {self.chunk_overlap}")
+        print(
+            f"  Hierarchical: {self.enable_hierarchical_chunks} "
+            f"(children {self.child_chunk_size}, parents {self.parent_chunk_size} chars, "
+            f"context budget {self.parent_context_budget_chars} chars)"
+        )
+        print(
+            f"  Dedup: {self.enable_dedup} (Jaccard >= {self.dedup_threshold}, "
+            f"{self.dedup_num_perm} permutations, {self.dedup_shingle_words}-word shingles)"
+        )
+        print(
+            f"  Ingest Batches: {self.ingest_batch_size} chunks "
+            f"({self.ingest_max_retries} retries, backoff {self.ingest_retry_backoff_seconds}s)"
+        )
+        print("\nConcurrency:")
+        print(f"  Coalesce Requests: {self.coalesce_requests}")
+        print(
+            f"  Graph Concurrency: {self.graph_concurrency} "
+            f"(queue {self.graph_queue_size}, timeout {self.admission_timeout_seconds}s)"
+        )
+        print(
+            f"  LLM Concurrency: router {self.router_llm_concurrency}, "
+            f"generator {self.generator_llm_concurrency}"
+        )
+        print(
+            f"  Query Budget: {self.query_budget_seconds or 'unbounded'}s "
+            f"(hedge with {self.hedge_model} when short, not before {self.hedge_delay_seconds}s)"
+        )
+        print("\nObservability:")
+        print(f"  Metrics: {self.enable_metrics}")
+        print(f"  Profiling: {self.enable_profiling}")
+        print(f"  Profile Sample Rate: {self.profile_sample_rate}")
+        print(f"  Slow Threshold: {self.profile_slow_threshold_ms}ms")
+        print(f"  Mongo Explain: {self.mongo_explain}")
+        print(f"  Slow Query Threshold: {self.slow_query_ms}ms")
         print("\nLogging:")
         print(f"  Level: {self.log_level}")
         print(f"  File: {self.log_file}")
@@ -129,13 +409,19 @@ class Settings:
 # Global settings instance
 settings = Settings()
 
-# Validate on import
-validation_errors = settings.validate()
-if validation_errors:
-    print("\n❌ Configuration Errors:")
-    for error in validation_errors:
-        print(f"  - {error}")
-    print("\nPlease check your .env file and fix the errors above.")
-    if not settings.openrouter_api_key:
-        print("\n⚠️  Critical: OPENROUTER_API_KEY is missing!")
-    sys.exit(1)
+
+def check_settings() -> list[str]:
+    """Validate settings and print any errors.
+
+    Entry points call this explicitly instead of validating at import time,
+    so tooling and tests can import modules without a complete environment.
+    """
+    validation_errors = settings.validate()
+    if validation_errors:
+        print("\n❌ Configuration Errors:")
+        for error in validation_errors:
+            print(f"  - {error}")
+        print("\nPlease check your .env file and fix the errors above.")
+        if settings.llm_provider == "openrouter" and not settings.openrouter_api_key:
+            print("\n⚠️  Critical: OPENROUTER_API_KEY is missing!")
+    return validation_errors
@@ -0,0 +1,62 @@
+"""Per-request latency budgets and the degradations taken to stay within them"""
+
+import time
+from contextvars import ContextVar
+
+from loguru import logger
+
+from utils.metrics import record_degradation
+
+# Budget of the request running in the current context (None when unbounded)
+_current_deadline: ContextVar["Deadline | None"] = ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a pipeline step cannot finish within the request's budget"""
+
+
+class Deadline:
+    """End-to-end latency budget of one request"""
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+        self.degradations: list[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def degrade(self, kind: str):
+        """Record a shortcut taken to stay within the budget"""
+        if kind not in self.degradations:
+            self.degradations.append(kind)
+        record_degradation(kind)
+        logger.warning(f"Degraded ({kind}) with {self.remaining():.2f}s of budget left")
+
+
+def start_deadline(budget_seconds: float | None) -> Deadline | None:
+    """Start the budget for the current request; a budget of 0 or None means unbounded"""
+    deadline = Deadline(budget_seconds) if budget_seconds else None
+    _current_deadline.set(deadline)
+    return deadline
+
+
+def current_deadline() -> Deadline | None:
+    """Budget of the request in the current context, if any"""
+    return _current_deadline.get()
+
+
+def remaining_budget() -> float:
+    """Seconds left for the current request (infinite when unbounded)"""
+    deadline = _current_deadline.get()
+    return float("inf") if deadline is None else deadline.remaining()
+
+
+def degrade(kind: str):
+    """Record a degradation against the current request's budget, if it has one"""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.degrade(kind)
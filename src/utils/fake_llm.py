@@ -0,0 +1,167 @@
+"""Deterministic fake chat model for offline load testing.
+
+Selected with ``LLM_PROVIDER=fake``. Responses are canned (from an optional
+JSON file) or templated from the prompt, so the same query always produces
+the same answer and route. Latency is drawn from a configurable distribution
+and errors can be injected at a fixed rate to exercise failure handling.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+# Keyword heuristics so the fake router spreads queries across specialists
+ROUTING_RULES = [
+    ("code_generation", re.compile(r"\b(code|python|script|function|snippet)\b")),
+    ("troubleshooting", re.compile(r"\b(error|fail\w*|unauthorized|refused|offline|not)\b")),
+    ("workflow", re.compile(r"\b(set ?up|steps?|workflow|end-to-end)\b")),
+    ("command_lookup", re.compile(r"\b(command|syntax|how do i|list|install|push|pull)\b")),
+]
+
+
+class FakeLLMError(RuntimeError):
+    """Injected upstream failure"""
+
+
+def parse_latency_spec(spec: str) -> Callable[[random.Random], float]:
+    """Parse a latency distribution spec into a sampler returning seconds.
+
+    Supported forms (milliseconds):
+        ``fixed:200``          always 200ms
+        ``uniform:100-400``    uniform between 100ms and 400ms
+        ``lognormal:300,0.5``  log-normal with median 300ms and sigma 0.5
+    """
+    kind, _, params = spec.partition(":")
+    kind = kind.strip().lower()
+
+    if kind == "fixed":
+        value = float(params) / 1000
+        return lambda rng: value
+    if kind == "uniform":
+        low, high = (float(v) / 1000 for v in params.split("-"))
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = (float(v) for v in params.split(","))
+        return lambda rng: rng.lognormvariate(0.0, sigma) * median / 1000
+
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+def load_canned_responses(path: str) -> list[tuple[str, str]]:
+    """Load ``[{"match": "...", "response": "..."}]`` pairs from a JSON file"""
+    if not path:
+        return []
+    entries = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [(entry["match"].lower(), entry["response"]) for entry in entries]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers locally with controllable latency and failures"""
+
+    role: str = "generator"  # "router" returns a classification, anything else an answer
+    model_name: str = "fake-llm"
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    response_words: int = 120
+    stream_chunk_words: int = 5
+    canned_responses: list[tuple[str, str]] = []
+    seed: int = 42
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _sample_latency: Callable[[random.Random], float] = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+        self._sample_latency = parse_latency_spec(self.latency)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _draw(self) -> tuple[float, bool]:
+        """Sample latency and whether this call fails"""
+        with self._rng_lock:
+            return self._sample_latency(self._rng), self._rng.random() < self.error_rate
+
+    def _respond(self, messages: list[BaseMessage]) -> str:
+        prompt = str(messages[-1].content) if messages else ""
+        first_line = prompt.strip().splitlines()[0] if prompt.strip() else ""
+        lowered = prompt.lower()
+
+        for match, response in self.canned_responses:
+            if match in lowered:
+                return response
+
+        if self.role == "router":
+            query_type = next(
+                (name for name, pattern in ROUTING_RULES if pattern.search(lowered)), "conceptual"
+            )
+            return f"Classification: {query_type}\nReason: fake router heuristic"
+
+        filler = " ".join(["lorem"] * max(self.response_words - len(first_line.split()), 0))
+        return f"[{self.model_name}] {first_line}\n\n{filler}"
+
+    def _message(self, content: str, messages: list[BaseMessage]) -> AIMessage:
+        input_tokens = sum(len(str(m.content).split()) for m in messages)
+        output_tokens = len(content.split())
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, fail = self._draw()
+        time.sleep(delay)
+        if fail:
+            raise FakeLLMError(f"Injected failure from {self.model_name}")
+
+        content = self._respond(messages)
+        return ChatResult(generations=[ChatGeneration(message=self._message(content, messages))])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        delay, fail = self._draw()
+        words = self._respond(messages).split(" ")
+        pieces = [
+            " ".join(words[i : i + self.stream_chunk_words])
+            for i in range(0, len(words), self.stream_chunk_words)
+        ]
+        per_chunk = delay / max(len(pieces), 1)
+
+        for i, piece in enumerate(pieces):
+            time.sleep(per_chunk)
+            if fail and i == len(pieces) // 2:
+                raise FakeLLMError(f"Injected mid-stream failure from {self.model_name}")
+
+            text = piece if i == 0 else " " + piece
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
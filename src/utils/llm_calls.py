@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+
+import numpy as np
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+
+from utils.admission import generator_admission, router_admission
+from utils.config import settings
+from utils.deadline import Deadline, DeadlineExceededError, current_deadline, remaining_budget
+from utils.metrics import record_llm_usage, stage_timer
+from utils.singleflight import SingleFlight
+
+_llm_calls = SingleFlight("llm")
+
+# Runs LLM calls that are raced against a deadline or a hedge; a call that
+# loses keeps its thread until the provider answers, so this is sized generously
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-call")
+
+# Latencies of recent successful calls per (stage, model), for deciding when to hedge
+LATENCY_WINDOW = 100
+MIN_LATENCY_SAMPLES = 10
+_latencies: defaultdict[tuple[str, str], deque[float]] = defaultdict(
+    lambda: deque(maxlen=LATENCY_WINDOW)
+)
+_latencies_lock = threading.Lock()
+
+
+def model_name(llm: BaseChatModel) -> str:
+    """Best-effort model identifier for labelling metrics"""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def expected_latency(stage: str, llm: BaseChatModel) -> float:
+    """p95 of the recent latencies of ``llm`` at ``stage``; HEDGE_DELAY_SECONDS until enough"""
+    with _latencies_lock:
+        samples = list(_latencies.get((stage, model_name(llm)), ()))
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return settings.hedge_delay_seconds
+    return float(np.percentile(samples, 95))
+
+
+def _invoke(llm: BaseChatModel, messages: list[BaseMessage], stage: str):
+    admission = router_admission if stage == "router_llm" else generator_admission
+    started = time.monotonic()
+    # A queued call gives up with the request budget, not only after the admission timeout
+    with admission.admit(timeout=min(settings.admission_timeout_seconds, remaining_budget())):
+        response = llm.invoke(messages)
+    with _latencies_lock:
+        _latencies[(stage, model_name(llm))].append(time.monotonic() - started)
+    record_llm_usage(stage, model_name(llm), response)
+    return response
+
+
+def _invoke_within(
+    deadline: Deadline,
+    llm: BaseChatModel,
+    messages: list[BaseMessage],
+    stage: str,
+    hedge_llm: BaseChatModel | None,
+):
+    """Wait for the call until the deadline, racing ``hedge_llm`` if the budget runs short.
+
+    The hedge is sent once HEDGE_DELAY_SECONDS have passed and the budget
+    left is less than the call's expected latency; a call that is merely
+    slow but still fits the budget is waited for.
+    """
+    hedge_at = 0.0
+    if hedge_llm is not None:
+        hedge_at = max(
+            time.monotonic() + settings.hedge_delay_seconds,
+            deadline.expires_at - expected_latency(stage, llm),
+        )
+    pending: dict[Future, BaseChatModel] = {
+        _executor.submit(copy_context().run, _invoke, llm, messages, stage): llm
+    }
+    error = None
+
+    while pending:
+        timeout = deadline.remaining()
+        if hedge_at > 0:
+            timeout = min(timeout, max(0.0, hedge_at - time.monotonic()))
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            caller = pending.pop(future)
+            try:
+                response = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if caller is hedge_llm:
+                deadline.degrade("hedge_used")
+            return response
+
+        if hedge_at > 0 and time.monotonic() >= hedge_at and pending:
+            hedge_at = 0
+            deadline.degrade("hedged")
+            future = _executor.submit(
+                copy_context().run, _invoke, hedge_llm, messages, f"{stage}_hedge"
+            )
+            pending[future] = hedge_llm
+        elif deadline.expired():
+            raise DeadlineExceededError(f"{stage} did not answer within the request budget")
+
+    raise error
+
+
+def invoke_llm(
+    llm: BaseChatModel,
+    messages: list[BaseMessage],
+    stage: str,
+    hedge_llm: BaseChatModel | None = None,
+):
+    """Invoke a chat model as a timed pipeline stage and record token usage.
+
+    Identical prompts to the same model that are already in flight are not
+    sent again; the callers share the pending response. Calls beyond the
+    router/generator concurrency limits wait for a slot.
+
+    Within a request budget the call raises ``DeadlineExceededError`` once the
+    budget runs out. If ``hedge_llm`` is given and no answer has arrived once
+    the budget left drops below the call's expected (p95) latency, but not
+    before HEDGE_DELAY_SECONDS, the same prompt is also sent to it; whichever
+    answers first wins.
+    """
+    key = (stage, model_name(llm), tuple((m.type, str(m.content)) for m in messages))
+    deadline = current_deadline()
+    with stage_timer(stage):
+        if deadline is None:
+            response, _ = _llm_calls.do(key, _invoke, llm, messages, stage)
+        else:
+            response, _ = _llm_calls.do(
+                key, _invoke_within, deadline, llm, messages, stage, hedge_llm
+            )
+    return response
@@ -1,17 +1,47 @@
-from langchain_core.language_models import BaseChatModel
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING
+
 from loguru import logger
 
 from utils.config import settings
 
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+# langchain_openai takes over a second to import, so it is only loaded when a
+# model is actually created rather than whenever utils is imported.
+
+
+def create_fake_llm(role: str, model: str) -> "BaseChatModel":
+    """Create the local deterministic fake model used for offline load testing"""
+    from utils.fake_llm import FakeChatModel, load_canned_responses
+
+    return FakeChatModel(
+        role=role,
+        model_name=f"fake/{model}",
+        latency=(
+            settings.fake_llm_router_latency
+            if role in ("router", "hedge")
+            else settings.fake_llm_latency
+        ),
+        error_rate=settings.fake_llm_error_rate,
+        canned_responses=load_canned_responses(settings.fake_llm_responses_file),
+        seed=settings.fake_llm_seed,
+    )
+
 
-def create_llm(temperature: float = None, max_tokens: int = None) -> BaseChatModel | None:
+def create_llm(temperature: float = None, max_tokens: int = None) -> "BaseChatModel | None":
     """Create the appropriate LLM based on configuration"""
 
     temp = temperature if temperature is not None else settings.temperature
     tokens = max_tokens if max_tokens is not None else settings.max_tokens
 
+    if settings.llm_provider == "fake":
+        logger.info(f"🧪 Using fake LLM in place of: {settings.llm_model}")
+        return create_fake_llm("generator", settings.llm_model)
+
     if settings.openrouter_api_key:
+        from langchain_openai import ChatOpenAI
+
         logger.info(f"🌐 Using OpenRouter with model: {settings.llm_model}")
         return ChatOpenAI(
             api_key=settings.openrouter_api_key,
@@ -29,8 +59,13 @@ def create_llm(temperature: float = None, max_tokens: int = None) -> BaseChatMod
         return None
 
 
-def create_router_llm() -> BaseChatModel:
+def create_router_llm() -> "BaseChatModel":
     """Create LLM optimized for routing (fast, cheap model)"""
+    if settings.llm_provider == "fake":
+        return create_fake_llm("router", "anthropic/claude-3-haiku")
+
+    from langchain_openai import ChatOpenAI
+
     # Use faster model for routing
     return ChatOpenAI(
         api_key=settings.openrouter_api_key,
@@ -45,11 +80,37 @@ def create_router_llm() -> BaseChatModel:
     )
 
 
-def create_generator_llm() -> BaseChatModel:
+def create_hedge_llm() -> "BaseChatModel | None":
+    """Create the faster model that slow specialist calls are hedged with"""
+    if settings.hedge_delay_seconds <= 0:
+        return None
+
+    if settings.llm_provider == "fake":
+        return create_fake_llm("hedge", settings.hedge_model)
+
+    if not settings.openrouter_api_key:
+        return None
+
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        api_key=settings.openrouter_api_key,
+        base_url="https://openrouter.ai/api/v1",
+        model=settings.hedge_model,
+        temperature=0.1,
+        max_tokens=settings.max_tokens,
+        default_headers={
+            "HTTP-Referer": "https://github.com/RahimTS/adb-knowledge-assistant",
+            "X-Title": "ADB Knowledge Assistant - Hedge",
+        },
+    )
+
+
+def create_generator_llm() -> "BaseChatModel":
     """Create LLM optimized for generation (higher creativity)"""
     return create_llm(temperature=0.3, max_tokens=settings.max_tokens)
 
 
-def create_synthesizer_llm() -> BaseChatModel:
+def create_synthesizer_llm() -> "BaseChatModel":
     """Create LLM optimized for synthesis"""
     return create_llm(temperature=0.1, max_tokens=settings.max_tokens)
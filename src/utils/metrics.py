@@ -0,0 +1,265 @@
+"""Prometheus metrics and per-request stage timing"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from utils.config import settings
+
+# Buckets tuned for the range between an in-memory scan (~1ms) and an LLM completion (~60s)
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+STAGE_DURATION = Histogram(
+    "adb_stage_duration_seconds",
+    "Duration of a single pipeline stage",
+    ["stage", "query_type"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_DURATION = Histogram(
+    "adb_query_duration_seconds",
+    "End-to-end duration of a /query request",
+    ["query_type"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERIES_TOTAL = Counter(
+    "adb_queries_total",
+    "Number of /query requests by outcome",
+    ["query_type", "status"],
+)
+INFLIGHT_REQUESTS = Gauge(
+    "adb_inflight_requests",
+    "Number of /query requests currently being processed",
+)
+LLM_TOKENS = Counter(
+    "adb_llm_tokens_total",
+    "LLM tokens consumed",
+    ["stage", "model", "kind"],
+)
+LLM_CALLS = Counter(
+    "adb_llm_calls_total",
+    "LLM calls issued",
+    ["stage", "model"],
+)
+STARTUP_PHASE_SECONDS = Gauge(
+    "adb_startup_phase_seconds",
+    "Duration of each startup phase",
+    ["phase"],
+)
+CACHE_LOOKUPS = Counter(
+    "adb_cache_lookups_total",
+    "Cache lookups by cache name and result",
+    ["cache", "result"],
+)
+COALESCED_CALLS = Counter(
+    "adb_coalesced_calls_total",
+    "Calls served by an identical in-flight call instead of running upstream",
+    ["scope"],
+)
+ADMISSION_LIMIT = Gauge(
+    "adb_admission_limit",
+    "Configured concurrency limit per admission pool (0 = unlimited)",
+    ["pool"],
+)
+ADMISSION_ACTIVE = Gauge(
+    "adb_admission_active",
+    "Executions currently holding a slot in each admission pool",
+    ["pool"],
+)
+ADMISSION_QUEUED = Gauge(
+    "adb_admission_queued",
+    "Callers waiting for a slot in each admission pool",
+    ["pool"],
+)
+ADMISSION_WAIT = Histogram(
+    "adb_admission_wait_seconds",
+    "Time spent queued before admission",
+    ["pool"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "adb_admission_rejected_total",
+    "Callers rejected by admission control",
+    ["pool", "reason"],
+)
+FAST_PATH_LOOKUPS = Counter(
+    "adb_fast_path_lookups_total",
+    "Queries checked against a fast-path index, by whether it answered them",
+    ["path", "result"],
+)
+DEGRADATIONS = Counter(
+    "adb_degradations_total",
+    "Shortcuts taken to keep a request within its latency budget",
+    ["kind"],
+)
+SLOW_QUERIES = Counter(
+    "adb_slow_queries_total",
+    "MongoDB queries slower than SLOW_QUERY_MS",
+    ["collection", "op"],
+)
+COLLECTION_SCANS = Counter(
+    "adb_collection_scans_total",
+    "Explained MongoDB query shapes whose plan scans the whole collection (COLLSCAN)",
+    ["collection", "op"],
+)
+
+# Stage timings of the request running in the current context (None outside a request)
+_current_request: ContextVar["RequestMetrics | None"] = ContextVar("current_request", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    """Stage timings collected while a single request is processed"""
+
+    started_at: float = field(default_factory=time.perf_counter)
+    stages: list[tuple[str, float]] = field(default_factory=list)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def stage_totals(self) -> dict[str, float]:
+        """Sum stage durations by stage name (in seconds)"""
+        totals: dict[str, float] = {}
+        for stage, duration in self.stages:
+            totals[stage] = totals.get(stage, 0.0) + duration
+        return totals
+
+
+def begin_request() -> RequestMetrics:
+    """Start collecting stage timings for the current request"""
+    request_metrics = RequestMetrics()
+    _current_request.set(request_metrics)
+    return request_metrics
+
+
+def current_request() -> RequestMetrics | None:
+    """Stage timings of the request in the current context, if any"""
+    return _current_request.get()
+
+
+def end_request(request_metrics: RequestMetrics, query_type: str, status: str = "ok"):
+    """Publish the collected stage timings under the resolved query type"""
+    _current_request.set(None)
+
+    if not settings.enable_metrics:
+        return
+
+    query_type = query_type or "unknown"
+    for stage, duration in request_metrics.stages:
+        STAGE_DURATION.labels(stage=stage, query_type=query_type).observe(duration)
+    QUERY_DURATION.labels(query_type=query_type).observe(request_metrics.elapsed())
+    QUERIES_TOTAL.labels(query_type=query_type, status=status).inc()
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a pipeline stage.
+
+    Inside a request the duration is buffered until the query type is known;
+    outside a request (setup scripts, benchmarks) it is observed immediately.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        request_metrics = _current_request.get()
+        if request_metrics is not None:
+            request_metrics.stages.append((stage, duration))
+        elif settings.enable_metrics:
+            STAGE_DURATION.labels(stage=stage, query_type="none").observe(duration)
+
+
+def record_llm_usage(stage: str, model: str, response) -> None:
+    """Record call and token counts from a LangChain chat model response"""
+    if not settings.enable_metrics:
+        return
+
+    LLM_CALLS.labels(stage=stage, model=model).inc()
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    if not usage:
+        # Older langchain-openai versions only populate response_metadata
+        token_usage = getattr(response, "response_metadata", {}).get("token_usage") or {}
+        usage = {
+            "input_tokens": token_usage.get("prompt_tokens", 0),
+            "output_tokens": token_usage.get("completion_tokens", 0),
+        }
+
+    LLM_TOKENS.labels(stage=stage, model=model, kind="prompt").inc(usage.get("input_tokens", 0))
+    LLM_TOKENS.labels(stage=stage, model=model, kind="completion").inc(
+        usage.get("output_tokens", 0)
+    )
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    """Count cache hits or misses"""
+    if settings.enable_metrics and count:
+        CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+
+def record_coalesced(scope: str) -> None:
+    """Count a call that shared another caller's in-flight execution"""
+    if settings.enable_metrics:
+        COALESCED_CALLS.labels(scope=scope).inc()
+
+
+def record_admission_state(pool: str, limit: int, active: int, queued: int) -> None:
+    """Publish an admission pool's limit and current occupancy"""
+    if settings.enable_metrics:
+        ADMISSION_LIMIT.labels(pool=pool).set(max(limit, 0))
+        ADMISSION_ACTIVE.labels(pool=pool).set(active)
+        ADMISSION_QUEUED.labels(pool=pool).set(queued)
+
+
+def record_admission_wait(pool: str, seconds: float) -> None:
+    if settings.enable_metrics:
+        ADMISSION_WAIT.labels(pool=pool).observe(seconds)
+
+
+def record_rejection(pool: str, reason: str) -> None:
+    if settings.enable_metrics:
+        ADMISSION_REJECTED.labels(pool=pool, reason=reason).inc()
+
+
+def record_fast_path(path: str, hit: bool) -> None:
+    if settings.enable_metrics:
+        FAST_PATH_LOOKUPS.labels(path=path, result="hit" if hit else "miss").inc()
+
+
+def record_degradation(kind: str) -> None:
+    if settings.enable_metrics:
+        DEGRADATIONS.labels(kind=kind).inc()
+
+
+def record_slow_query(collection: str, op: str) -> None:
+    if settings.enable_metrics:
+        SLOW_QUERIES.labels(collection=collection, op=op).inc()
+
+
+def record_collection_scan(collection: str, op: str) -> None:
+    if settings.enable_metrics:
+        COLLECTION_SCANS.labels(collection=collection, op=op).inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in Prometheus text exposition format"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,168 @@
+"""Per-request sampling profiler that writes flamegraph-compatible folded stacks"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+from utils.config import settings
+
+# Characters a request id may contribute to a profile file name
+_UNSAFE_ID_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def file_safe_id(request_id: str) -> str:
+    """Request id reduced to [A-Za-z0-9_-] (a fresh uuid if nothing is left), for file names"""
+    return _UNSAFE_ID_RE.sub("", request_id)[:64] or uuid.uuid4().hex
+
+
+class StackSampler:
+    """Sample the Python stack of one thread at a fixed interval.
+
+    Stacks are aggregated in Brendan Gregg's folded format
+    (``frame;frame;frame count``), which flamegraph.pl, speedscope and
+    inferno all read directly.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+
+            self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Aggregated stacks in folded format"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+@dataclass
+class ProfileSession:
+    """A request that is being profiled"""
+
+    request_id: str
+    trigger: str  # "header" (always kept) or "sampled" (kept only when slow)
+    sampler: StackSampler
+
+
+class RequestProfiler:
+    """Decide which requests to profile and persist the resulting profiles.
+
+    A request is profiled when an admin asks for it explicitly (the
+    ``X-Profile`` header with a valid ``X-Admin-Token``) or when it is
+    picked by ``sample_rate``. Sampled
+    profiles are only written when the request turns out to be slower than
+    ``slow_threshold_ms``, so the fast majority costs nothing on disk.
+    """
+
+    def __init__(self):
+        self.enabled = settings.enable_profiling
+        self.sample_rate = settings.profile_sample_rate
+        self.slow_threshold_ms = settings.profile_slow_threshold_ms
+        self.interval_ms = settings.profile_interval_ms
+        self.output_dir = Path(settings.profile_dir)
+
+    def configure(self, **changes) -> dict:
+        """Update profiler settings at runtime (admin toggle)"""
+        for key, value in changes.items():
+            if value is not None and hasattr(self, key):
+                setattr(self, key, value)
+        logger.info(f"Profiler settings updated: {self.status()}")
+        return self.status()
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "interval_ms": self.interval_ms,
+            "output_dir": str(self.output_dir),
+        }
+
+    def start(self, request_id: str, requested: bool = False) -> ProfileSession | None:
+        """Start sampling the current thread if this request should be profiled"""
+        if not self.enabled:
+            return None
+
+        if requested:
+            trigger = "header"
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            trigger = "sampled"
+        else:
+            return None
+
+        sampler = StackSampler(threading.get_ident(), self.interval_ms / 1000)
+        sampler.start()
+        return ProfileSession(request_id=request_id, trigger=trigger, sampler=sampler)
+
+    def finish(
+        self, session: ProfileSession | None, duration: float, stage_timings: dict[str, float]
+    ) -> Path | None:
+        """Stop sampling and write the profile if it should be kept"""
+        if session is None:
+            return None
+
+        session.sampler.stop()
+
+        duration_ms = duration * 1000
+        if session.trigger == "sampled" and duration_ms < self.slow_threshold_ms:
+            return None
+
+        try:
+            return self._write(session, duration_ms, stage_timings)
+        except Exception as e:
+            # Profiling is diagnostics; it must never change the response
+            logger.error(f"Could not save profile for request {session.request_id}: {e}")
+            return None
+
+    def _write(
+        self, session: ProfileSession, duration_ms: float, stage_timings: dict[str, float]
+    ) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}_{file_safe_id(session.request_id)}"
+        folded_path = self.output_dir / f"{stem}.folded"
+        folded_path.write_text(session.sampler.folded(), encoding="utf-8")
+
+        meta = {
+            "request_id": session.request_id,
+            "trigger": session.trigger,
+            "duration_ms": round(duration_ms, 2),
+            "samples": sum(session.sampler.samples.values()),
+            "interval_ms": self.interval_ms,
+            "stage_timings_ms": {
+                stage: round(seconds * 1000, 2) for stage, seconds in stage_timings.items()
+            },
+        }
+        (self.output_dir / f"{stem}.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+        logger.info(f"Saved profile for request {session.request_id}: {folded_path}")
+        return folded_path
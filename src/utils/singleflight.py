@@ -0,0 +1,58 @@
+"""Collapse concurrent identical calls into a single execution"""
+
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from utils.config import settings
+from utils.metrics import record_coalesced
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its outcome.
+
+    The first caller for a key (the leader) executes the function; callers
+    arriving while it runs wait for it and receive the same result or
+    exception. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True if another caller did the work"""
+        if not settings.coalesce_requests:
+            return fn(*args, **kwargs), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            record_coalesced(self.scope)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,60 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from loguru import logger
+
+from utils.metrics import STARTUP_PHASE_SECONDS
+
+
+class StartupTimer:
+    """Record how long each startup phase takes"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.phases[name] = duration
+            STARTUP_PHASE_SECONDS.labels(phase=name).set(duration)
+            logger.info(f"Startup phase '{name}' took {duration * 1000:.0f}ms")
+
+    def summary(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 1),
+            "phases_ms": {name: round(d * 1000, 1) for name, d in self.phases.items()},
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        breakdown = ", ".join(f"{name}={ms:.0f}ms" for name, ms in summary["phases_ms"].items())
+        logger.success(f"Startup complete in {summary['total_ms']:.0f}ms ({breakdown})")
+
+
+class ServiceState:
+    """Heavy components that become available once warm-up has finished"""
+
+    def __init__(self):
+        self.retriever = None
+        self.agent_graph = None
+        self.fast_paths: list = []
+        self.error: str | None = None
+        self._ready = threading.Event()
+
+    def mark_ready(self, retriever, agent_graph):
+        self.retriever = retriever
+        self.agent_graph = agent_graph
+        self._ready.set()
+
+    def mark_failed(self, error: Exception):
+        self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
@@ -0,0 +1,41 @@
+"""Admin endpoints reject settings that would break the running service"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils.config import settings
+
+HEADERS = {"x-admin-token": "secret"}
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    for key, value in main.profiler.status().items():
+        if key != "output_dir":
+            monkeypatch.setattr(main.profiler, key, value)
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize(
+    "update", [{"interval_ms": 0}, {"interval_ms": -5}, {"sample_rate": 1.5}, {"sample_rate": -0.1}]
+)
+def test_out_of_range_profiling_update_is_rejected(client, update):
+    before = main.profiler.status()
+    response = client.post("/admin/profiling", json=update, headers=HEADERS)
+    assert response.status_code == 422
+    assert main.profiler.status() == before
+
+
+def test_profiling_update_is_applied(client):
+    response = client.post(
+        "/admin/profiling", json={"interval_ms": 2, "sample_rate": 0.5}, headers=HEADERS
+    )
+    assert response.status_code == 200
+    assert (response.json()["interval_ms"], response.json()["sample_rate"]) == (2, 0.5)
+
+
+def test_profiling_update_requires_admin_token(client):
+    response = client.post("/admin/profiling", json={"interval_ms": 2}, headers={})
+    assert response.status_code == 403
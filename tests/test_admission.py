@@ -0,0 +1,147 @@
+"""Admission control: FIFO queueing, rejections and Retry-After"""
+
+import threading
+import time
+
+import pytest
+
+from utils.admission import AdmissionController, OverloadedError
+
+
+def wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+class Holder:
+    """Holds one slot of ``controller`` on a thread until released"""
+
+    def __init__(self, controller: AdmissionController, timeout: float | None = None):
+        self.controller = controller
+        self.release = threading.Event()
+        self.admitted = threading.Event()
+        self.error: OverloadedError | None = None
+        self.thread = threading.Thread(target=self._run, args=(timeout,), daemon=True)
+        self.thread.start()
+
+    def _run(self, timeout):
+        try:
+            with self.controller.admit(timeout):
+                self.admitted.set()
+                self.release.wait(5)
+        except OverloadedError as e:
+            self.error = e
+
+    def finish(self):
+        self.release.set()
+        self.thread.join(5)
+
+
+def queued(controller: AdmissionController) -> int:
+    return controller.status()["queued"]
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    controller = AdmissionController("test", limit=1, queue_size=None, timeout=5)
+    holder = Holder(controller)
+    holder.admitted.wait(2)
+
+    order = []
+
+    def call(number: int):
+        with controller.admit():
+            order.append(number)
+
+    threads = []
+    for number in range(5):
+        threads.append(threading.Thread(target=call, args=(number,)))
+        threads[-1].start()
+        wait_until(lambda n=number: queued(controller) == n + 1)
+
+    holder.finish()
+    for thread in threads:
+        thread.join(5)
+    assert order == [0, 1, 2, 3, 4]
+    assert controller.status()["active"] == 0 and queued(controller) == 0
+
+
+def test_full_queue_rejects_at_once():
+    controller = AdmissionController("test", limit=1, queue_size=1, timeout=5)
+    holder = Holder(controller)
+    holder.admitted.wait(2)
+    waiter = Holder(controller)
+    wait_until(lambda: queued(controller) == 1)
+
+    started = time.monotonic()
+    with pytest.raises(OverloadedError) as rejected, controller.admit():
+        pass
+    assert time.monotonic() - started < 0.5
+    assert (rejected.value.pool, rejected.value.reason) == ("test", "queue_full")
+    assert rejected.value.retry_after >= 1
+
+    holder.finish()
+    waiter.finish()
+    assert waiter.admitted.is_set() and waiter.error is None
+
+
+def test_waiter_times_out_and_leaves_the_queue():
+    controller = AdmissionController("test", limit=1, queue_size=None, timeout=5)
+    holder = Holder(controller)
+    holder.admitted.wait(2)
+
+    started = time.monotonic()
+    with pytest.raises(OverloadedError) as rejected, controller.admit(timeout=0.1):
+        pass
+    assert time.monotonic() - started >= 0.1
+    assert rejected.value.reason == "timeout"
+    assert queued(controller) == 0
+
+    # A waiter that timed out does not hold up the one behind it
+    expiring = Holder(controller, timeout=0.1)
+    patient = Holder(controller)
+    wait_until(lambda: queued(controller) == 2)
+    expiring.thread.join(2)
+    assert expiring.error is not None and expiring.error.reason == "timeout"
+    holder.finish()
+    assert patient.admitted.wait(2)
+    patient.finish()
+
+
+def test_retry_after_grows_with_backlog_and_hold_time():
+    controller = AdmissionController("test", limit=2, queue_size=None, timeout=5)
+    assert controller.retry_after() == 1
+
+    holders = [Holder(controller) for _ in range(2)]
+    for holder in holders:
+        holder.admitted.wait(2)
+    waiters = [Holder(controller) for _ in range(5)]
+    wait_until(lambda: queued(controller) == 5)
+    # (5 queued + 1) / 2 slots, at the initial 1s hold estimate
+    assert controller.retry_after() == 3
+
+    for holder in holders + waiters:
+        holder.finish()
+    # Short executions pull the hold estimate, and with it Retry-After, down to the 1s floor
+    assert controller._hold_seconds < 0.5
+    assert controller.retry_after() == 1
+
+
+def test_raising_the_limit_admits_waiters():
+    controller = AdmissionController("test", limit=1, queue_size=None, timeout=5)
+    holder = Holder(controller)
+    holder.admitted.wait(2)
+    waiter = Holder(controller)
+    wait_until(lambda: queued(controller) == 1)
+
+    assert controller.configure(limit=2)["limit"] == 2
+    assert waiter.admitted.wait(2)
+    holder.finish()
+    waiter.finish()
+
+
+def test_zero_limit_disables_admission():
+    controller = AdmissionController("test", limit=0, queue_size=0, timeout=0)
+    with controller.admit(), controller.admit():
+        assert controller.status()["active"] == 0
@@ -0,0 +1,71 @@
+"""MinHash near-duplicate collapsing"""
+
+import pytest
+
+from data.dedup import MinHashDeduplicator, jaccard, lsh_bands, shingles
+
+WORDS = [f"word{i}" for i in range(40)]
+
+
+def chunk(words: list[str], source: str, **metadata) -> dict:
+    return {"text": " ".join(words), "metadata": {"source": source, **metadata}}
+
+
+def similarity(a: dict, b: dict) -> float:
+    return jaccard(shingles(a["text"], 5), shingles(b["text"], 5))
+
+
+def test_near_duplicates_collapse_to_longest_chunk():
+    original = chunk(WORDS, "a.md", tags=["adb"], type="guide")
+    extended = chunk(WORDS + ["extra1", "extra2"], "b.md", tags=["usb"], type="guide")
+    edited = chunk(WORDS[:-1] + ["changed"], "c.md", tags=["adb", "wifi"], type="guide")
+    unrelated = chunk([f"other{i}" for i in range(40)], "d.md", tags=["logcat"], type="guide")
+
+    kept, stats = MinHashDeduplicator(0.9).deduplicate([original, unrelated, extended, edited])
+
+    assert [c["text"] for c in kept] == [unrelated["text"], extended["text"]]
+    assert kept[0] is unrelated
+    merged = kept[1]["metadata"]
+    assert merged["tags"] == ["usb", "adb", "wifi"]
+    assert merged["sources"] == ["b.md", "a.md", "c.md"]
+    assert merged["duplicate_count"] == 2
+    assert merged["type"] == "guide"
+    # The chunk handed in is left untouched
+    assert extended["metadata"] == {"source": "b.md", "tags": ["usb"], "type": "guide"}
+    assert (stats.chunks_in, stats.chunks_out, stats.removed) == (4, 2, 2)
+
+
+@pytest.mark.parametrize("changed", [1, 3, 6])
+def test_pairs_just_below_threshold_are_kept(changed):
+    original = chunk(WORDS, "a.md")
+    edited = chunk(WORDS[:-changed] + [f"new{i}" for i in range(changed)], "b.md")
+    score = similarity(original, edited)
+
+    kept, _ = MinHashDeduplicator(score + 0.01).deduplicate([original, edited])
+    assert kept == [original, edited]
+
+    kept, _ = MinHashDeduplicator(score).deduplicate([original, edited])
+    assert len(kept) == 1
+    assert kept[0]["metadata"]["sources"] == ["a.md", "b.md"]
+
+
+def test_distinct_chunks_are_kept_in_order():
+    chunks = [chunk([f"doc{d}w{i}" for i in range(30)], f"{d}.md") for d in range(20)]
+    kept, stats = MinHashDeduplicator(0.8).deduplicate(chunks)
+    assert kept == chunks
+    assert stats.removed == 0
+
+
+def test_short_chunks_compare_as_one_shingle():
+    a = chunk(["adb", "devices"], "a.md")
+    b = chunk(["ADB", "Devices"], "b.md")
+    c = chunk(["adb", "reboot"], "c.md")
+    kept, _ = MinHashDeduplicator(0.9).deduplicate([a, b, c])
+    assert [k["metadata"]["source"] for k in kept] == ["a.md", "c.md"]
+
+
+def test_lsh_bands_keep_recall_at_threshold():
+    for threshold in (0.7, 0.85, 0.95):
+        bands, rows = lsh_bands(128, threshold)
+        assert bands * rows == 128
+        assert 1 - (1 - threshold**rows) ** bands >= 0.99
@@ -0,0 +1,37 @@
+"""Fast-path lookups against the shipped command DB and code patterns"""
+
+import pytest
+
+from agents.fast_path import CodePatternIndex
+from utils.config import settings
+
+
+@pytest.fixture(scope="module")
+def code_patterns() -> CodePatternIndex:
+    return CodePatternIndex.from_file(settings.code_patterns_path, 0.85)
+
+
+@pytest.mark.parametrize(
+    "query, operation",
+    [
+        ("python code to pull a file from the device", "pull_file"),
+        ("python code to pull /sdcard/DCIM/photo.jpg to ./photo.jpg", "pull_file"),
+        ("python script to pair with 192.168.0.7:37123 code 482913", "pair_device"),
+        ("python code to check if folder /sdcard/MyApp exists", "check_directory_exists"),
+    ],
+)
+def test_known_operation_is_answered(code_patterns, query, operation):
+    match = code_patterns.lookup(query)
+    assert match is not None
+    assert match.entry["operation"] == operation
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "python code to take a screenshot and pull it",
+        "python code to pull /sdcard/a.txt and then uninstall com.example.app",
+    ],
+)
+def test_unexplained_words_fall_through(code_patterns, query):
+    assert code_patterns.lookup(query) is None
@@ -0,0 +1,203 @@
+"""Resumable directory ingestion: checkpoints, fingerprint skipping and stale chunk removal"""
+
+import itertools
+import json
+import re
+import zlib
+
+import mongomock
+import numpy as np
+import pytest
+
+from data.chunking import TextChunker
+from data.dedup import MinHashDeduplicator
+from data.ingestion import DataIngestionPipeline, chunk_id
+from retrieval.vector_store import VectorStore
+from utils.config import settings
+
+
+class FakeEmbeddings:
+    """Bag-of-words vectors; the calls listed in ``fail`` raise instead"""
+
+    def __init__(self, fail: tuple[int, ...] = ()):
+        self.model_name = settings.embedding_model
+        self.fail = fail
+        self.calls = 0
+
+    def generate_embeddings(self, texts: list[str], show_progress_bar: bool = True) -> list:
+        self.calls += 1
+        if self.calls in self.fail:
+            raise ConnectionError(f"embedding call {self.calls} failed")
+        vectors = []
+        for text in texts:
+            vector = np.zeros(64, dtype=np.float32)
+            for word in re.findall(r"\w+", text.lower()):
+                vector[zlib.crc32(word.encode()) % 64] += 1
+            vectors.append(vector.tolist())
+        return vectors
+
+
+def commands(descriptions: dict[str, str]) -> list[dict]:
+    return [
+        {"command": command, "description": description, "source": "command_db"}
+        for command, description in descriptions.items()
+    ]
+
+
+def page(title: str, sentences: int) -> dict:
+    content = " ".join(
+        f"{title} explains step {i} of the procedure in detail." for i in range(sentences)
+    )
+    return {
+        "title": title,
+        "url": f"https://example.com/{title}",
+        "content": content,
+        "source": "docs",
+    }
+
+
+COMMANDS = {f"adb cmd{i}": f"Runs operation number {i} on the device" for i in range(10)}
+PAGES = [page("Pairing", 40), page("Logcat", 30)]
+
+
+def write_inputs(directory, command_descriptions=COMMANDS, pages=PAGES):
+    directory.mkdir(exist_ok=True)
+    (directory / "commands.json").write_text(json.dumps(commands(command_descriptions)))
+    (directory / "docs.json").write_text(json.dumps(pages))
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "ingest_batch_size", 4)
+    monkeypatch.setattr(settings, "ingest_max_retries", 1)
+    monkeypatch.setattr(settings, "ingest_retry_backoff_seconds", 0)
+
+
+@pytest.fixture(params=["mongomock", "sqlite"])
+def make_store(request, tmp_path):
+    """Factory of empty stores on the backend under test"""
+    numbers = itertools.count()
+
+    def make_store() -> VectorStore:
+        if request.param == "sqlite":
+            return VectorStore(database=str(tmp_path / f"kb{next(numbers)}.db"), backend="sqlite")
+        return VectorStore(client=mongomock.MongoClient(), database="test")
+
+    return make_store
+
+
+def pipeline(store, embeddings=None, chunk_size=200) -> DataIngestionPipeline:
+    return DataIngestionPipeline(
+        chunker=TextChunker(
+            chunk_size=chunk_size,
+            chunk_overlap=20,
+            hierarchical=True,
+            parent_chunk_size=400,
+            child_chunk_size=150,
+        ),
+        embedding_generator=embeddings or FakeEmbeddings(),
+        vector_store=store,
+        deduplicator=MinHashDeduplicator(0.9),
+    )
+
+
+def stored(store) -> tuple[set, set]:
+    return set(map(str, store.documents.find_ids({}))), set(map(str, store.parents.find_ids({})))
+
+
+def expected(directory, ingestion: DataIngestionPipeline) -> tuple[set, set]:
+    chunks = [
+        chunk
+        for path in sorted(directory.glob("*.json"))
+        for chunk in ingestion.load_chunks(str(path))
+    ]
+    chunks, _ = ingestion.deduplicate(chunks)
+    return (
+        {chunk_id(chunk) for chunk in chunks},
+        {chunk["parent"]["_id"] for chunk in chunks if "parent" in chunk},
+    )
+
+
+def test_interrupted_run_resumes_after_last_batch(make_store, tmp_path):
+    raw = tmp_path / "raw"
+    write_inputs(raw)
+    store = make_store()
+
+    # Call 2 fails once and is retried; calls 4 and 5 exhaust batch 3's retries
+    with pytest.raises(ConnectionError):
+        pipeline(store, FakeEmbeddings(fail=(2, 4, 5))).ingest_directory(str(raw))
+    checkpoint = store.ingestion_checkpoint()
+    assert checkpoint["status"] == "failed"
+    assert (checkpoint["committed"], checkpoint["batches"]) == (8, 2)
+    assert checkpoint["error"].startswith("Batch 3")
+
+    embeddings = FakeEmbeddings()
+    summary = pipeline(store, embeddings).ingest_directory(str(raw))
+    total = checkpoint["chunks"]
+    assert summary["total_inserted"] == total
+    assert embeddings.calls == -(-(total - 8) // 4)  # Only the batches left
+    assert store.ingestion_checkpoint()["status"] == "complete"
+
+    documents, parents = expected(raw, pipeline(store))
+    assert len(documents) == total and parents
+    assert stored(store) == (documents, parents)
+
+    # Same as an uninterrupted run
+    fresh = make_store()
+    pipeline(fresh).ingest_directory(str(raw))
+    assert stored(fresh) == stored(store)
+
+
+def test_unchanged_inputs_are_skipped(make_store, tmp_path):
+    raw = tmp_path / "raw"
+    write_inputs(raw)
+    store = make_store()
+    first = pipeline(store).ingest_directory(str(raw))
+
+    embeddings = FakeEmbeddings()
+    assert pipeline(store, embeddings).ingest_directory(str(raw)) == first
+    assert embeddings.calls == 0
+
+    # Changed chunking settings change the fingerprint, as does restart
+    embeddings = FakeEmbeddings()
+    pipeline(store, embeddings, chunk_size=300).ingest_directory(str(raw))
+    assert embeddings.calls > 0
+    embeddings = FakeEmbeddings()
+    pipeline(store, embeddings).ingest_directory(str(raw), restart=True)
+    assert embeddings.calls > 0
+
+
+def test_stale_documents_and_parents_are_removed(make_store, tmp_path):
+    raw = tmp_path / "raw"
+    write_inputs(raw)
+    store = make_store()
+    pipeline(store).ingest_directory(str(raw))
+    before_documents, before_parents = stored(store)
+
+    # One command edited, one removed, and the Logcat page dropped with all its sections
+    edited = {**COMMANDS, "adb cmd0": "Runs an edited operation on the device"}
+    del edited["adb cmd9"]
+    write_inputs(raw, edited, PAGES[:1])
+    summary = pipeline(store).ingest_directory(str(raw))
+
+    documents, parents = expected(raw, pipeline(store))
+    assert stored(store) == (documents, parents)
+    removed = len(before_documents - documents) + len(before_parents - parents)
+    assert len(before_parents - parents) > 0
+    assert summary["stale_removed"] == removed == store.ingestion_checkpoint()["stale_removed"]
+
+
+def test_stale_documents_kept_when_a_file_fails(make_store, tmp_path):
+    raw = tmp_path / "raw"
+    write_inputs(raw)
+    store = make_store()
+    pipeline(store).ingest_directory(str(raw))
+    before = stored(store)
+
+    write_inputs(raw, {"adb cmd0": "Runs an edited operation on the device"})
+    (raw / "docs.json").write_text("{not json")
+    summary = pipeline(store).ingest_directory(str(raw))
+
+    assert "stale_removed" not in summary
+    documents, parents = stored(store)
+    assert before[0] < documents and before[1] == parents
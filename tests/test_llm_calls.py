@@ -0,0 +1,76 @@
+"""Hedging of LLM calls that run within a request budget.
+
+Times are scaled down 10x: 0.9s stands for a 9s call, 0.8s for the 8s
+HEDGE_DELAY_SECONDS default.
+"""
+
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from utils import llm_calls
+from utils.admission import generator_admission
+from utils.config import settings
+from utils.deadline import DeadlineExceededError, start_deadline
+from utils.fake_llm import FakeChatModel
+from utils.llm_calls import invoke_llm
+
+MESSAGES = [HumanMessage(content="How do I install an apk?")]
+
+
+@pytest.fixture(autouse=True)
+def scaled_hedge_delay(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_delay_seconds", 0.8)
+    llm_calls._latencies.clear()
+    yield
+    start_deadline(None)
+
+
+def fake_llm(name: str, latency: float) -> FakeChatModel:
+    return FakeChatModel(model_name=name, latency=f"fixed:{latency * 1000:g}")
+
+
+def call(primary_latency: float) -> str:
+    return invoke_llm(
+        fake_llm("primary", primary_latency),
+        MESSAGES,
+        "test_llm",
+        hedge_llm=fake_llm("hedge", 0.0),
+    )
+
+
+def test_slow_call_within_budget_is_not_hedged():
+    deadline = start_deadline(2.0)
+    assert call(0.9).content
+    assert deadline.degradations == []
+
+
+def test_call_is_hedged_when_budget_runs_short():
+    deadline = start_deadline(1.2)
+    assert call(1.5).content
+    assert deadline.degradations == ["hedged", "hedge_used"]
+
+
+def test_hedge_waits_while_budget_covers_recent_p95():
+    llm_calls._latencies[("test_llm", "primary")].extend([0.5] * llm_calls.MIN_LATENCY_SAMPLES)
+    # Hedged at 1.2s with the 0.8s default; with a p95 of 0.5s not before 1.5s
+    deadline = start_deadline(2.0)
+    assert call(1.3).content
+    assert deadline.degradations == []
+
+
+def test_queued_call_gives_up_with_the_budget(monkeypatch):
+    monkeypatch.setattr(settings, "admission_timeout_seconds", 5.0)
+    monkeypatch.setattr(generator_admission, "limit", 1)
+    monkeypatch.setattr(generator_admission, "queue_size", None)
+    with generator_admission.admit():  # Holds the only slot
+        start_deadline(0.3)
+        with pytest.raises(DeadlineExceededError):
+            invoke_llm(fake_llm("primary", 0.0), MESSAGES, "test_llm")
+
+        # The queued call leaves the queue at the end of the budget, not after 5s
+        waited = time.monotonic()
+        while generator_admission.status()["queued"]:
+            assert time.monotonic() - waited < 1.0
+            time.sleep(0.01)
@@ -0,0 +1,98 @@
+"""Metadata postings answer filters the same way the storage backends do"""
+
+import mongomock
+import numpy as np
+import pytest
+
+from retrieval.metadata_index import MetadataIndex
+from retrieval.storage import SQLiteBackend
+from retrieval.vector_store import VectorStore
+
+TAGS = [["adb", "usb"], ["wifi"], ["adb", "wifi", "usb"], [], ["usb"]]
+
+
+def metadata(i: int) -> dict:
+    meta = {"type": ("command", "error", "guide")[i % 3], "command": f"adb cmd-{i}"}
+    if TAGS[i % 5]:
+        meta["tags"] = TAGS[i % 5]
+    if i % 7 == 0:
+        meta["severity"] = "high" if i % 14 == 0 else "low"
+    return meta
+
+
+@pytest.fixture(params=["mongomock", "sqlite"])
+def store(request, tmp_path) -> VectorStore:
+    if request.param == "sqlite":
+        store = VectorStore(database=str(tmp_path / "kb.db"), backend="sqlite")
+    else:
+        store = VectorStore(client=mongomock.MongoClient(), database="test")
+    rng = np.random.default_rng(0)
+    store.insert_documents(
+        [
+            {
+                "_id": f"d{i}",
+                "content": f"document {i}",
+                "metadata": metadata(i),
+                "embedding": rng.standard_normal(8).tolist(),
+            }
+            for i in range(64)
+        ]
+    )
+    return store
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"type": "command"},
+        {"type": {"$eq": "error"}},
+        {"tags": "usb"},
+        {"tags": ["wifi", "usb"]},
+        {"tags": {"$in": ["wifi", "missing"]}},
+        {"tags": {"$in": []}},
+        {"tags": {"$all": ["adb", "usb"]}},
+        {"tags": {"$all": ["adb", "missing"]}},
+        {"severity": "high"},
+        {"severity": "missing"},
+        {"command": "adb cmd-5"},
+        {"command": ["adb cmd-5", "adb cmd-6", "adb cmd-99"]},
+        {"type": "guide", "tags": {"$in": ["wifi"]}, "severity": "low"},
+    ],
+)
+def test_mask_matches_backend_filter(store, filters):
+    index = store.get_index()
+    assert index.metadata.supports(filters)
+    np.testing.assert_array_equal(
+        index.metadata.mask_for(filters), store._filtered_mask(index, filters)
+    )
+
+
+def test_empty_all_matches_nothing(store):
+    # As in Mongo since 2.6 (mongomock still matches every document)
+    index = store.get_index()
+    assert index.metadata.supports({"tags": {"$all": []}})
+    assert not index.metadata.mask_for({"tags": {"$all": []}}).any()
+    if isinstance(store.documents, SQLiteBackend):
+        assert store.documents.find_ids({"tags": {"$all": []}}) == []
+
+
+def test_dense_and_sparse_postings(store):
+    postings = store.get_index().metadata.postings
+    assert postings["type"]["command"].dtype == bool
+    assert postings["command"]["adb cmd-5"].dtype == np.int32
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"tags": {"$eq": ["adb", "usb"]}},
+        {"tags": {"$in": [["adb", "usb"]]}},
+        {"tags": {"$all": "adb"}},
+        {"tags": {"$size": 2}},
+        {"tags": {"$in": ["adb"], "$all": ["usb"]}},
+        {"content": "document 1"},
+    ],
+)
+def test_unsupported_filters_go_to_backend(filters):
+    index = MetadataIndex.from_metadata([metadata(i) for i in range(8)])
+    assert not index.supports(filters)
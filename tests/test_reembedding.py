@@ -0,0 +1,106 @@
+"""Re-embedding into a new model: reads stay on the old vectors until the switch"""
+
+import mongomock
+import numpy as np
+import pytest
+
+from data.reembedding import ReembeddingJob
+from retrieval.embeddings import embedding_version
+from retrieval.vector_index import normalize_rows
+from retrieval.vector_store import VectorStore
+from utils.config import settings
+
+OLD = settings.embedding_model
+NEW = "test/new-model"
+
+
+class FakeEmbeddings:
+    """4-dimensional vectors derived from the text length"""
+
+    model_name = NEW
+
+    def generate_embeddings(self, texts: list[str], show_progress_bar: bool = True) -> list:
+        return [[len(text), 1.0, len(text) % 3, 2.0] for text in texts]
+
+
+@pytest.fixture(params=["mongomock", "sqlite"])
+def store(request, tmp_path) -> VectorStore:
+    if request.param == "sqlite":
+        return VectorStore(database=str(tmp_path / "kb.db"), backend="sqlite")
+    return VectorStore(client=mongomock.MongoClient(), database="test")
+
+
+def old_documents(count: int, start: int = 0) -> list[dict]:
+    rng = np.random.default_rng(start)
+    return [
+        {
+            "_id": f"d{i:02d}",
+            "content": "x" * (i + 1),
+            "metadata": {"type": "command"},
+            "embedding": rng.standard_normal(8).tolist(),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def assert_vectors(index, documents: dict[str, list[float]]):
+    assert sorted(index.ids) == sorted(documents)
+    expected = normalize_rows([documents[doc_id] for doc_id in index.ids])
+    np.testing.assert_allclose(index.matrix, expected, rtol=1e-6)
+
+
+def test_switch_serves_new_vectors_and_old_stay_until_drop(store):
+    docs = old_documents(12)
+    store.insert_documents(docs, model=OLD)
+    old_vectors = {doc["_id"]: doc["embedding"] for doc in docs}
+    new_vectors = dict(
+        zip(
+            old_vectors,
+            FakeEmbeddings().generate_embeddings([doc["content"] for doc in docs]),
+            strict=True,
+        )
+    )
+
+    state = ReembeddingJob(store, FakeEmbeddings(), batch_size=5).run(switch=False)
+    assert (state["active"], state["target"], state["embedded"]) == (OLD, NEW, 12)
+    index = store.load_index()
+    assert index.model == OLD
+    assert_vectors(index, old_vectors)
+
+    # A document ingested with the old model after the run blocks the switch
+    store.insert_documents(old_documents(1, start=12), model=OLD)
+    with pytest.raises(ValueError, match="1 documents have no"):
+        ReembeddingJob.switch(store, NEW)
+    store.delete_documents(["d12"])
+
+    ReembeddingJob.switch(store, NEW)
+    index = store.load_index()
+    assert index.model == NEW
+    assert_vectors(index, new_vectors)
+
+    # The old vectors stay readable, so switching back is a rollback
+    assert_vectors(store.build_index(OLD), old_vectors)
+    with pytest.raises(ValueError, match="in use"):
+        ReembeddingJob.drop(store, NEW)
+
+    assert ReembeddingJob.drop(store, OLD) == 12
+    assert len(store.build_index(OLD)) == 0
+    assert_vectors(store.load_index(), new_vectors)
+    with pytest.raises(ValueError):
+        ReembeddingJob.switch(store, OLD)
+
+
+def test_run_resumes_and_switches(store):
+    store.insert_documents(old_documents(7), model=OLD)
+    job = ReembeddingJob(store, FakeEmbeddings(), batch_size=3)
+    store.documents.set_embeddings(
+        embedding_version(NEW),
+        [("d00", "x", [1.0, 0.0, 0.0, 0.0]), ("d01", "xx", [0.0, 1.0, 0.0, 0.0])],
+    )
+
+    state = job.run()
+    assert state["active"] == NEW and state["previous"] == OLD
+    index = store.load_index()
+    assert index.model == NEW and len(index) == 7
+    # Vectors stored before the run were kept, not encoded again
+    np.testing.assert_allclose(index.matrix[index.ids.index("d00")], [1.0, 0.0, 0.0, 0.0])
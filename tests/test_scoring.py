@@ -0,0 +1,126 @@
+"""Blocked top-k scoring against a brute-force argsort"""
+
+import numpy as np
+import pytest
+
+from retrieval.scoring import top_k_scores
+from retrieval.vector_index import normalize_rows
+
+
+def random_rows(num_rows: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return normalize_rows(np.random.default_rng(seed).standard_normal((num_rows, dim)))
+
+
+def brute_force(queries, matrix, k, min_score=None, mask=None, max_sim=False):
+    scores = queries @ matrix.T
+    if max_sim:
+        scores = scores.max(axis=0, keepdims=True)
+    rows = np.arange(matrix.shape[0]) if mask is None else np.flatnonzero(mask)
+    expected = []
+    for row_scores in scores[:, rows]:
+        best = np.sort(row_scores)[::-1][:k]
+        if min_score is not None:
+            best = best[best >= min_score]
+        expected.append(best)
+    return expected
+
+
+def assert_matches(results, queries, matrix, k, min_score=None, mask=None, max_sim=False):
+    expected = brute_force(queries, matrix, k, min_score, mask, max_sim)
+    assert len(results) == len(expected)
+    for i, ((idx, scores), want) in enumerate(zip(results, expected, strict=True)):
+        np.testing.assert_allclose(scores, want, rtol=1e-6, atol=1e-6)
+        assert len(set(idx.tolist())) == len(idx)
+        if mask is not None:
+            assert mask[idx].all()
+        if not max_sim:
+            # Tied rows may come back in any order, but each must carry its own score
+            np.testing.assert_allclose(matrix[idx] @ queries[i], scores, rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize("block_size", [7, 64, 1000])
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_matches_argsort(block_size, k):
+    matrix = random_rows(300)
+    queries = random_rows(4, seed=1)
+    results = top_k_scores(queries, matrix, k, block_size=block_size)
+    assert_matches(results, queries, matrix, k)
+    # Without ties the rows themselves are determined
+    for (idx, _), query in zip(results, queries, strict=True):
+        np.testing.assert_array_equal(idx, np.argsort(-(matrix @ query))[:k])
+
+
+def test_k_at_least_rows_returns_everything():
+    matrix = random_rows(12)
+    queries = random_rows(2, seed=1)
+    for k in (12, 50):
+        results = top_k_scores(queries, matrix, k, block_size=5)
+        assert_matches(results, queries, matrix, k)
+        assert [len(idx) for idx, _ in results] == [12, 12]
+
+
+def test_ties():
+    # Every score is exactly 0.6 or 0.8, so each block boundary splits tied rows
+    matrix = np.tile(np.eye(2, dtype=np.float32), (25, 1))
+    queries = np.array([[0.6, 0.8]], dtype=np.float32)
+    for k in (3, 25, 30):
+        [(idx, scores)] = top_k_scores(queries, matrix, k, block_size=4)
+        assert_matches([(idx, scores)], queries, matrix, k)
+        assert (idx[: min(k, 25)] % 2 == 1).all()
+
+
+@pytest.mark.parametrize("block_size", [8, 100])
+def test_mask_with_fewer_survivors_than_k(block_size):
+    matrix = random_rows(100)
+    queries = random_rows(3, seed=1)
+    mask = np.zeros(100, dtype=bool)
+    mask[[3, 17, 64]] = True
+    results = top_k_scores(queries, matrix, 10, block_size=block_size, mask=mask)
+    assert_matches(results, queries, matrix, 10, mask=mask)
+    assert all(sorted(idx.tolist()) == [3, 17, 64] for idx, _ in results)
+
+
+def test_empty_mask():
+    results = top_k_scores(random_rows(2, seed=1), random_rows(20), 5, mask=np.zeros(20, bool))
+    assert [len(idx) for idx, _ in results] == [0, 0]
+
+
+@pytest.mark.parametrize("density", [0.05, 0.15, 0.5, 0.9])
+def test_mask_gathered_and_dense_blocks(density):
+    # Blocks selecting at most GATHER_MAX_FRACTION of their rows are gathered, the rest scored whole
+    matrix = random_rows(500)
+    queries = random_rows(3, seed=1)
+    mask = np.random.default_rng(2).random(500) < density
+    results = top_k_scores(queries, matrix, 15, block_size=50, mask=mask)
+    assert_matches(results, queries, matrix, 15, mask=mask)
+
+
+def test_min_score_cutoff():
+    matrix = random_rows(200)
+    queries = random_rows(3, seed=1)
+    scores = np.sort(matrix @ queries[0])[::-1]
+    # Halfway between the 6th and 7th best scores of the first query
+    min_score = float((scores[5] + scores[6]) / 2)
+    results = top_k_scores(queries, matrix, 20, block_size=32, min_score=min_score)
+    assert_matches(results, queries, matrix, 20, min_score=min_score)
+    assert len(results[0][0]) == 6
+
+
+def test_min_score_keeps_equal_scores():
+    matrix = np.tile(np.eye(2, dtype=np.float32), (5, 1))
+    queries = np.array([[0.6, 0.8]], dtype=np.float32)
+    [(idx, scores)] = top_k_scores(queries, matrix, 10, block_size=3, min_score=np.float32(0.8))
+    assert len(idx) == 5
+    assert (scores == np.float32(0.8)).all()
+
+    [(idx, _)] = top_k_scores(queries, matrix, 10, min_score=1.0)
+    assert len(idx) == 0
+
+
+def test_max_sim_scores_each_row_by_its_best_window():
+    matrix = random_rows(120)
+    windows = random_rows(4, seed=1)
+    results = top_k_scores(windows, matrix, 10, block_size=16, max_sim=True)
+    assert_matches(results, windows, matrix, 10, max_sim=True)
+    [(idx, scores)] = results
+    np.testing.assert_allclose((windows @ matrix[idx].T).max(axis=0), scores, rtol=1e-6)
@@ -0,0 +1,104 @@
+"""Scatter-gather scoring across worker processes matches in-process scoring"""
+
+import os
+
+import numpy as np
+import pytest
+
+from retrieval import sharding
+from retrieval.scoring import top_k_scores
+from retrieval.sharding import ShardedScorer, mapped_source
+from retrieval.storage import SQLiteBackend
+from retrieval.vector_index import normalize_rows
+
+
+@pytest.fixture(scope="module")
+def scorer(tmp_path_factory):
+    scorer = ShardedScorer(3, directory=str(tmp_path_factory.mktemp("shards")))
+    yield scorer
+    scorer.close()
+
+
+def random_rows(num_rows: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return normalize_rows(np.random.default_rng(seed).standard_normal((num_rows, dim)))
+
+
+def assert_same(sharded, expected):
+    assert len(sharded) == len(expected)
+    for (idx, scores), (want_idx, want_scores) in zip(sharded, expected, strict=True):
+        np.testing.assert_array_equal(idx, want_idx)
+        np.testing.assert_allclose(scores, want_scores, rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"k": 10},
+        {"k": 500},
+        {"k": 10, "min_score": 0.3},
+        {"k": 10, "mask": "sparse"},
+        {"k": 10, "mask": "dense"},
+        {"k": 5, "max_sim": True},
+    ],
+)
+def test_merge_matches_single_process(scorer, options):
+    matrix = random_rows(301)
+    published = scorer.publish(matrix)
+    np.testing.assert_array_equal(published, matrix)
+
+    options = dict(options)
+    if "mask" in options:
+        density = 0.02 if options["mask"] == "sparse" else 0.7
+        options["mask"] = np.random.default_rng(1).random(301) < density
+    queries = random_rows(4, seed=2)
+    assert_same(
+        scorer.top_k_scores(queries, published, **options),
+        top_k_scores(queries, matrix, **options),
+    )
+
+
+def test_every_worker_maps_the_published_matrix(scorer):
+    published = scorer.publish(random_rows(50, seed=3))
+    source = mapped_source(published)
+    for executor in scorer._executors:
+        assert executor.submit(sharding._attached).result() == [source]
+    # Each shard always runs in the same worker
+    pids = [executor.submit(os.getpid).result() for executor in scorer._executors]
+    assert len(set(pids)) == 3
+    assert pids == [executor.submit(os.getpid).result() for executor in scorer._executors]
+
+
+def test_only_two_generations_are_kept(scorer):
+    for seed in range(4):
+        scorer.publish(random_rows(20, seed=seed))
+    assert len(os.listdir(scorer._dir)) == 2
+
+
+def test_unpublished_matrix_is_scored_in_process(scorer):
+    matrix = random_rows(40, seed=4)
+    queries = random_rows(2, seed=5)
+    assert_same(scorer.top_k_scores(queries, matrix, 5), top_k_scores(queries, matrix, 5))
+
+
+def test_sqlite_vector_file_is_shared_without_a_copy(scorer, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "kb.db"), "documents")
+    rng = np.random.default_rng(6)
+    backend.upsert(
+        [
+            {"_id": f"d{i}", "content": f"doc {i}", "embeddings": {"v": rng.standard_normal(16)}}
+            for i in range(60)
+        ]
+    )
+    matrix = backend.load_index("v").matrix
+    source = mapped_source(matrix)
+    assert source is not None and source[0].startswith(str(tmp_path))
+
+    files = set(os.listdir(scorer._dir))
+    published = scorer.publish(matrix)
+    assert published is matrix
+    assert set(os.listdir(scorer._dir)) <= files  # Nothing written to shared memory
+
+    queries = random_rows(3, seed=7)
+    assert_same(
+        scorer.top_k_scores(queries, published, 8), top_k_scores(queries, np.asarray(matrix), 8)
+    )
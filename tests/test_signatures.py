@@ -0,0 +1,135 @@
+"""Error signature matching: automaton and per-pattern scans, and how matches are ranked"""
+
+import mongomock
+import numpy as np
+import pytest
+
+from retrieval.hybrid_retriever import HybridRetriever
+from retrieval.signatures import Signature, SignatureMatcher, specificity
+from retrieval.vector_store import VectorStore
+from utils.config import settings
+
+# automaton_min_patterns for each scan: 0 always builds the automaton, a huge value never does
+SCANS = {"automaton": 0, "per_pattern": 10**9}
+
+
+def matcher(patterns: list[str], scan: str, **kwargs) -> SignatureMatcher:
+    signatures = [Signature(p, "error_indicator", "high", i) for i, p in enumerate(patterns)]
+    return SignatureMatcher(signatures, automaton_min_patterns=SCANS[scan], **kwargs)
+
+
+def found(matches) -> list[tuple[str, int, int]]:
+    return [(m.signature.pattern, m.count, m.first_offset) for m in matches]
+
+
+@pytest.mark.parametrize("scan", SCANS)
+def test_overlapping_patterns(scan):
+    patterns = ["error: device offline", "device offline now", "offline now", "abab abab abab"]
+    text = "adb: ERROR: Device offline now\nabab abab abab abab"
+    assert found(matcher(patterns, scan, min_pattern_length=0).scan(text)) == [
+        ("error: device offline", 1, 5),
+        ("device offline now", 1, 12),
+        ("offline now", 1, 19),
+        ("abab abab abab", 2, 31),
+    ]
+
+
+@pytest.mark.parametrize("scan", SCANS)
+def test_shared_pattern_reports_every_entry(scan):
+    signatures = [
+        Signature("Unable to start pairing client", "error_indicator", "high", "a"),
+        Signature("unable to start pairing client", "symptoms", "low", "b"),
+    ]
+    matches = SignatureMatcher(signatures, automaton_min_patterns=SCANS[scan]).scan(
+        "adb pair: unable to start pairing client; unable to start pairing client"
+    )
+    assert [(m.signature.doc_id, m.count, m.first_offset) for m in matches] == [
+        ("a", 2, 10),
+        ("b", 2, 10),
+    ]
+
+
+def test_scans_agree_on_many_patterns():
+    rng = np.random.default_rng(0)
+    words = ["adb", "device", "offline", "denied", "install", "failed", "shell", "error"]
+    patterns = list(
+        dict.fromkeys(" ".join(rng.choice(words, size=rng.integers(2, 5))) for _ in range(400))
+    )
+    text = " ".join(rng.choice(words, size=3000))
+    automaton = matcher(patterns, "automaton", min_pattern_length=0)
+    assert len(automaton) >= 300  # The size at which the automaton is used by default
+    # Patterns starting at the same offset may come back in either order
+    assert sorted(found(automaton.scan(text))) == sorted(
+        found(matcher(patterns, "per_pattern", min_pattern_length=0).scan(text))
+    )
+
+
+def test_short_patterns_are_not_matched():
+    m = matcher(["File exists", "  ", "permission denied"], "per_pattern")
+    assert len(m) == 1
+    assert found(m.scan("mkdir: File exists; permission denied")) == [("permission denied", 1, 20)]
+
+
+def test_specificity_grows_with_length():
+    assert specificity("permission denied") == pytest.approx(17 / 32)
+    assert specificity("INSTALL_FAILED_INSUFFICIENT_STORAGE") == 1.0
+
+
+class FakeEmbeddings:
+    """Query embeddings looked up by text"""
+
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.model_name = settings.embedding_model
+        self.vectors = vectors
+
+    def generate_embedding(self, text: str) -> list[float]:
+        return self.vectors[text]
+
+
+@pytest.fixture
+def retriever() -> HybridRetriever:
+    store = VectorStore(client=mongomock.MongoClient(), database="test")
+    docs = [
+        ("similar", [1.0, 0.0, 0.0], {}),
+        ("generic", [0.0, 1.0, 0.0], {"symptoms": ["permission denied"]}),
+        ("specific", [0.0, 0.0, 1.0], {"error_indicator": "INSTALL_FAILED_INSUFFICIENT_STORAGE"}),
+    ]
+    store.insert_documents(
+        [
+            {"_id": doc_id, "content": doc_id, "metadata": metadata, "embedding": embedding}
+            for doc_id, embedding, metadata in docs
+        ]
+    )
+    queries = {
+        "push failed: permission denied": [0.9, 0.1, 0.0],
+        "install: INSTALL_FAILED_INSUFFICIENT_STORAGE, permission denied": [0.9, 0.1, 0.0],
+        "permission denied": [0.2, 1.0, 0.0],
+    }
+    return HybridRetriever(FakeEmbeddings(queries), store)
+
+
+def retrieved(retriever, query) -> list[tuple[str, float]]:
+    results = retriever.retrieve(query, top_k=3, use_hybrid=False)
+    return [(doc["_id"], round(doc["score"], 3)) for doc in results]
+
+
+def test_generic_match_ranks_by_weighted_score(retriever):
+    # 0.531 for "permission denied" stays behind a 0.994 similarity hit
+    assert retrieved(retriever, "push failed: permission denied") == [
+        ("similar", 0.994),
+        ("generic", 0.531),
+        ("specific", 0.0),
+    ]
+
+
+def test_specific_match_leads(retriever):
+    assert [
+        doc_id
+        for doc_id, _ in retrieved(
+            retriever, "install: INSTALL_FAILED_INSUFFICIENT_STORAGE, permission denied"
+        )
+    ] == ["specific", "similar", "generic"]
+
+
+def test_generic_match_keeps_higher_similarity(retriever):
+    assert retrieved(retriever, "permission denied")[0] == ("generic", 0.981)
@@ -0,0 +1,99 @@
+"""Coalescing of concurrent identical calls"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import singleflight
+from utils.config import settings
+from utils.singleflight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def followers(monkeypatch) -> threading.Semaphore:
+    """Released once for every caller that joins a running call"""
+    monkeypatch.setattr(settings, "coalesce_requests", True)
+    joined = threading.Semaphore(0)
+    monkeypatch.setattr(singleflight, "record_coalesced", lambda scope: joined.release())
+    return joined
+
+
+class Blocking:
+    """Function that counts its calls and blocks until released"""
+
+    def __init__(self, outcome=None):
+        self.outcome = outcome
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, value):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return value * 2
+
+
+def run_concurrently(flight: SingleFlight, fn: Blocking, keys: list, followers) -> list:
+    """Start the leader, then the other callers, and release the leader once they all wait"""
+    with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+        futures = [pool.submit(flight.do, keys[0], fn, 21)]
+        assert fn.started.wait(5)
+        futures += [pool.submit(flight.do, key, fn, 21) for key in keys[1:]]
+        for _ in keys[1:]:
+            assert followers.acquire(timeout=5)
+        fn.release.set()
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_followers_share_the_leaders_result(followers):
+    flight, fn = SingleFlight("test"), Blocking()
+    results = run_concurrently(flight, fn, ["k"] * 8, followers)
+    assert fn.calls == 1
+    assert results[0] == (42, False)
+    assert results[1:] == [(42, True)] * 7
+
+
+def test_error_propagates_to_every_follower(followers):
+    error = ConnectionError("backend down")
+    flight, fn = SingleFlight("test"), Blocking(error)
+    results = run_concurrently(flight, fn, ["k"] * 5, followers)
+    assert fn.calls == 1
+    assert all(result is error for result in results)
+
+
+def test_key_is_released_after_completion(followers):
+    flight, fn = SingleFlight("test"), Blocking(ConnectionError("once"))
+    run_concurrently(flight, fn, ["k"] * 3, followers)
+    assert flight._calls == {}
+
+    # A new call runs the function again instead of reusing the finished outcome
+    fn.release.set()
+    fn.outcome = None
+    assert flight.do("k", fn, 5) == (10, False)
+    assert fn.calls == 2
+    assert flight._calls == {}
+
+
+def test_distinct_keys_do_not_wait_for_each_other():
+    flight, fn = SingleFlight("test"), Blocking()
+    other = flight.do("other", lambda: "fast")
+    assert other == ("fast", False)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        slow = pool.submit(flight.do, "slow", fn, 1)
+        assert fn.started.wait(5)
+        assert flight.do("other", lambda: "fast") == ("fast", False)
+        fn.release.set()
+        assert slow.result() == (2, False)
+
+
+def test_disabled_coalescing_runs_every_call(monkeypatch):
+    monkeypatch.setattr(settings, "coalesce_requests", False)
+    flight, fn = SingleFlight("test"), Blocking()
+    fn.release.set()
+    assert [flight.do("k", fn, 1) for _ in range(3)] == [(2, False)] * 3
+    assert fn.calls == 3
@@ -0,0 +1,96 @@
+"""SQLite backend: vector files through upsert, delete, compaction and index loads"""
+
+import glob
+
+import numpy as np
+import pytest
+
+from retrieval.storage import SQLiteBackend
+from retrieval.vector_index import normalize_rows
+
+VERSION = "test-model"
+
+
+@pytest.fixture
+def backend(tmp_path) -> SQLiteBackend:
+    return SQLiteBackend(str(tmp_path / "kb.db"), "documents")
+
+
+def document(doc_id: str, seed: int) -> dict:
+    vector = np.random.default_rng(seed).standard_normal(8).tolist()
+    return {
+        "_id": doc_id,
+        "content": f"content of {doc_id}",
+        "metadata": {"type": "command"},
+        "embeddings": {VERSION: vector},
+    }
+
+
+def expected_rows(documents: list[dict]) -> dict[str, np.ndarray]:
+    vectors = normalize_rows([doc["embeddings"][VERSION] for doc in documents])
+    return {doc["_id"]: vector for doc, vector in zip(documents, vectors, strict=True)}
+
+
+def assert_index(backend: SQLiteBackend, expected: dict[str, np.ndarray]):
+    index = backend.load_index(VERSION)
+    assert sorted(index.ids) == sorted(expected)
+    for row, doc_id in enumerate(index.ids):
+        np.testing.assert_allclose(index.matrix[row], expected[doc_id], rtol=1e-6)
+
+
+def test_round_trip_through_upsert_delete_and_compact(backend):
+    docs = [document(f"d{i}", i) for i in range(10)]
+    backend.upsert(docs)
+    assert_index(backend, expected_rows(docs))
+
+    replaced = [document("d3", 100), document("d7", 101)]
+    backend.upsert(replaced)
+    backend.delete(["d0", "d1"])
+    current = {doc["_id"]: doc for doc in docs + replaced if doc["_id"] not in ("d0", "d1")}
+    assert_index(backend, expected_rows(list(current.values())))
+
+    backend.compact(VERSION)
+    assert backend._vector_rows(VERSION, 8) == len(current)
+    assert_index(backend, expected_rows(list(current.values())))
+
+
+def test_sparse_file_is_compacted_on_delete(backend):
+    docs = [document(f"d{i}", i) for i in range(10)]
+    backend.upsert(docs)
+    backend.delete([f"d{i}" for i in range(6)])
+
+    assert backend._generation(VERSION) == 1
+    assert backend._vector_rows(VERSION, 8) == 4
+    assert_index(backend, expected_rows(docs[6:]))
+
+
+def test_other_reader_follows_compaction(backend, tmp_path):
+    docs = [document(f"d{i}", i) for i in range(6)]
+    backend.upsert(docs)
+    reader = SQLiteBackend(str(tmp_path / "kb.db"), "documents")
+    before = reader.load_index(VERSION)
+
+    backend.delete(["d0", "d2"])
+    backend.compact(VERSION)
+    backend.upsert([document("d9", 9)])
+    backend.compact(VERSION)
+
+    # An index mapped before compaction keeps its vectors; a new load sees the new rows
+    expected = expected_rows(docs)
+    for row, doc_id in enumerate(before.ids):
+        np.testing.assert_allclose(before.matrix[row], expected[doc_id], rtol=1e-6)
+    survivors = [doc for doc in docs if doc["_id"] not in ("d0", "d2")] + [document("d9", 9)]
+    assert_index(reader, expected_rows(survivors))
+
+
+def test_compaction_keeps_only_the_previous_generation(backend):
+    backend.upsert([document(f"d{i}", i) for i in range(4)])
+    for _ in range(3):
+        backend.compact(VERSION)
+
+    files = sorted(glob.glob(f"{backend.path}.documents.{VERSION}.*.f32"))
+    assert [path.rsplit(".", 2)[1] for path in files] == ["2", "3"]
+
+    backend.drop_embeddings(VERSION)
+    assert glob.glob(f"{backend.path}.documents.{VERSION}.*.f32") == []
+    assert len(backend.load_index(VERSION)) == 0